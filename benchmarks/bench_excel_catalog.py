@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Excel目录索引基准测试
+
+在包含大量文件的目录中，对比每次 glob 后逐个匹配文件名的旧写法和目录索引查找的耗时。
+
+用法: python benchmarks/bench_excel_catalog.py [--files 2000] [--lookups 500]
+"""
+
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def legacy_find(folder: str, extensions: list, filename: str):
+    """旧写法：每次 glob 目录，再按三条规则逐个文件匹配"""
+    excel_files = []
+    for ext in extensions:
+        excel_files.extend(glob.glob(os.path.join(folder, f"*.{ext}")))
+    excel_files = [f for f in excel_files if not os.path.basename(f).startswith('~$')]
+    for filepath in excel_files:
+        if os.path.basename(filepath) == filename:
+            return filepath
+        if os.path.basename(filepath) in [f"{filename}.{ext}" for ext in extensions]:
+            return filepath
+        if filename in os.path.basename(filepath):
+            return filepath
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Excel目录索引基准测试")
+    parser.add_argument("--files", type=int, default=2000, help="目录中的文件数")
+    parser.add_argument("--lookups", type=int, default=500, help="查找次数")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    import nonebot
+    nonebot.init(driver="~fastapi", log_level="WARNING")
+    from plugins.xlsx.excel_catalog import ExcelCatalog
+    from plugins.xlsx.excel_importer import IMPORT_EXTENSIONS
+
+    with tempfile.TemporaryDirectory() as folder:
+        for i in range(args.files):
+            open(os.path.join(folder, f"游戏{i}.{IMPORT_EXTENSIONS[i % len(IMPORT_EXTENSIONS)]}"), "w").close()
+        queries = [f"游戏{i * 7 % args.files}" for i in range(args.lookups)]
+
+        start = time.perf_counter()
+        for query in queries:
+            legacy_find(folder, IMPORT_EXTENSIONS, query)
+        legacy = time.perf_counter() - start
+
+        catalog = ExcelCatalog(folder, IMPORT_EXTENSIONS)
+        start = time.perf_counter()
+        for query in queries:
+            catalog.find(query)
+        indexed = time.perf_counter() - start
+
+    print(f"{args.files} 个文件，查找 {args.lookups} 次:")
+    print(f"  glob + 逐个匹配: {legacy * 1000 / args.lookups:.2f} ms/次")
+    print(f"  目录索引: {indexed * 1000 / args.lookups:.3f} ms/次（扫描 {catalog.scans} 次，{legacy / indexed:.0f}x）")
+
+
+if __name__ == "__main__":
+    main()
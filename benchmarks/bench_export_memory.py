@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""导出数据模型内存基准测试
+
+对比旧的数据模型（每个用户周期一个字典 + 记录元组列表，写入工作表前再按用户名组织一份）
+和紧凑记录模型（__slots__ + 日期编码/次数数组）读取大游戏数据时的内存峰值和保留内存。
+
+用法: python benchmarks/bench_export_memory.py [--users 5000] [--records 30]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def legacy_game_data(db_manager, game_name: str) -> dict:
+    """旧写法：字典 + 元组列表，再组织为 用户名 -> {周期: 用户} 的字典"""
+    game_id = db_manager.get_game_id(game_name)
+    with db_manager.snapshot() as snapshot:
+        users = [
+            {
+                'id': user.id,
+                'name': user.name,
+                'cycle': user.cycle,
+                'is_completed': user.is_completed,
+                'records': snapshot.cycle_records(game_id, user.id),
+            }
+            for user in snapshot.iter_cycles(game_id)
+        ]
+
+    organized_users = {}
+    for user in users:
+        organized_users.setdefault(user['name'], {})[user['cycle']] = user
+    return {'game_name': game_name, 'game_id': game_id, 'users': users, 'organized': organized_users}
+
+
+def measure(build) -> dict:
+    """返回构建过程的内存峰值和构建完成后仍占用的内存（MB）"""
+    gc.collect()
+    tracemalloc.start()
+    data = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return {"peak_mb": peak / (1024 * 1024), "retained_mb": current / (1024 * 1024)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导出数据模型内存基准测试")
+    parser.add_argument("--users", type=int, default=5000, help="用户数")
+    parser.add_argument("--records", type=int, default=30, help="每个用户的记录数")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    import nonebot
+    nonebot.init(driver="~fastapi", log_level="WARNING")
+    from plugins.xlsx.config import Config
+    from plugins.xlsx.database import DatabaseManager
+    from plugins.xlsx.excel_exporter import ExcelExporter
+
+    with tempfile.TemporaryDirectory() as excel_folder:
+        config = Config(excel_folder=excel_folder, completion_count=args.records + 1)
+        db_manager = DatabaseManager(config)
+        exporter = ExcelExporter(db_manager, config)
+        rows = [
+            [f"用户{i}"] + [f"{(n // 28) % 12 + 1:02d}-{n % 28 + 1:02d}_{n + 1}" for n in range(args.records)]
+            for i in range(args.users)
+        ]
+        db_manager.import_from_excel_data("基准测试", rows)
+        del rows
+
+        legacy = measure(lambda: legacy_game_data(db_manager, "基准测试"))
+        compact = measure(lambda: exporter.get_game_data("基准测试"))
+
+    print(f"{args.users} 个用户 x {args.records} 条记录:")
+    for label, result in (("字典+元组", legacy), ("紧凑记录模型", compact)):
+        print(f"  {label}: 内存峰值 {result['peak_mb']:.1f} MB, 保留 {result['retained_mb']:.1f} MB")
+    print(f"  内存峰值 {compact['peak_mb'] / legacy['peak_mb']:.0%}，保留内存 {compact['retained_mb'] / legacy['retained_mb']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""导出样式基准测试
+
+对比逐个单元格设置填充/对齐的旧写法和只写工作簿 + 命名样式的当前写法，
+统计生成大游戏工作簿的CPU时间、内存峰值、文件大小和样式表（cellXfs）条目数。
+两种写法的 cellXfs 相同（openpyxl 本身会合并相同的单元格样式），差别在于逐单元格的对象和样式开销。
+
+用法: python benchmarks/bench_export_styles.py [--users 3000] [--records 30] [--runs 5]
+"""
+
+import argparse
+import io
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_game_data(users: int, records: int) -> dict:
+    """生成模拟的游戏数据，一半周期已完成"""
+    from plugins.xlsx.record_model import CycleRecords
+
+    return {
+        'game_name': "基准测试",
+        'game_id': 1,
+        'users': [
+            CycleRecords(
+                i + 1, f"用户{i // 2}", i % 2 + 1, i % 2 == 0,
+                [(f"{(n // 28) % 12 + 1:02d}-{n % 28 + 1:02d}", n + 1) for n in range(records)]
+            )
+            for i in range(users)
+        ],
+    }
+
+
+def legacy_workbook(exporter, game_data: dict):
+    """旧写法：普通工作簿，逐个单元格设置对齐和填充，再循环一次给已完成周期上色"""
+    from openpyxl import Workbook
+
+    exporter._load_styles()
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "代肝记录"
+
+    organized_users = {}
+    for user in game_data['users']:
+        organized_users.setdefault(user.name, {})[user.cycle] = user
+
+    current_row = 1
+    for base_name, cycles in organized_users.items():
+        for cycle, user in sorted(cycles.items()):
+            display_name = f"{base_name}({cycle})" if cycle > 1 else base_name
+            ws.cell(row=current_row, column=1, value=display_name)
+            ws.cell(row=current_row, column=1).alignment = exporter.center_alignment
+            ws.cell(row=current_row, column=1).fill = exporter.yellow_fill
+            ws.row_dimensions[current_row].height = exporter.config.row_height
+
+            col = 2
+            for record_date, count in user.records():
+                ws.cell(row=current_row, column=col, value=f"{record_date}_{count}")
+                ws.cell(row=current_row, column=col).alignment = exporter.center_alignment
+                col += 1
+
+            if user.is_completed:
+                for c in range(2, col):
+                    ws.cell(row=current_row, column=c).fill = exporter.blue_fill
+
+            current_row += 1
+
+    ws.column_dimensions['A'].width = exporter.config.name_column_width
+    return wb
+
+
+def measure(builds: dict, game_data: dict, runs: int) -> dict:
+    """交替运行各写法（减少机器负载波动的影响），统计CPU时间中位数"""
+    timings = {label: [] for label in builds}
+    for build in builds.values():
+        # 预热：首次运行包含openpyxl的导入和初始化
+        build(game_data).save(io.BytesIO())
+    for _ in range(runs):
+        for label, build in builds.items():
+            start = time.process_time()
+            build(game_data).save(io.BytesIO())
+            timings[label].append(time.process_time() - start)
+
+    results = {}
+    for label, build in builds.items():
+        # 单独运行一次统计内存峰值，避免 tracemalloc 影响计时
+        tracemalloc.start()
+        wb = build(game_data)
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        data = buffer.getvalue()
+        styles = zipfile.ZipFile(io.BytesIO(data)).read("xl/styles.xml").decode()
+        match = re.search(r'<cellXfs count="(\d+)"', styles)
+        results[label] = {
+            "seconds": statistics.median(timings[label]),
+            "peak_mb": peak / (1024 * 1024),
+            "size": len(data),
+            "cell_xfs": int(match.group(1)) if match else 0,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导出样式基准测试")
+    parser.add_argument("--users", type=int, default=3000, help="用户周期数")
+    parser.add_argument("--records", type=int, default=30, help="每个周期的记录数")
+    parser.add_argument("--runs", type=int, default=5, help="运行次数（取中位数）")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    import nonebot
+    nonebot.init(driver="~fastapi", log_level="WARNING")
+    from plugins.xlsx.config import Config
+    from plugins.xlsx.database import DatabaseManager
+    from plugins.xlsx.excel_exporter import ExcelExporter
+
+    with tempfile.TemporaryDirectory() as excel_folder:
+        config = Config(excel_folder=excel_folder)
+        exporter = ExcelExporter(DatabaseManager(config), config)
+        game_data = make_game_data(args.users, args.records)
+
+        results = measure({
+            "逐单元格样式": lambda data: legacy_workbook(exporter, data),
+            "命名样式+只写": exporter.build_game_workbook,
+        }, game_data, args.runs)
+    legacy, current = results["逐单元格样式"], results["命名样式+只写"]
+
+    print(f"{args.users} 个用户周期 x {args.records} 条记录（{args.runs} 次CPU时间中位数）:")
+    for label, result in results.items():
+        print(f"  {label}: {result['seconds']:.2f} s, 内存峰值 {result['peak_mb']:.1f} MB, "
+              f"{result['size'] / 1024:.0f} KB, cellXfs {result['cell_xfs']}")
+    print(f"  耗时 {current['seconds'] / legacy['seconds']:.0%}，内存峰值 {current['peak_mb'] / legacy['peak_mb']:.0%}，"
+          f"文件大小 {current['size'] / legacy['size']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""数据校验基准测试
+
+在包含少量异常（重复次数、断档、缺失的完成标记、无记录的用户周期）的数据库上，
+对比不同批次大小下数据校验的耗时和峰值内存，并确认修复后不再有可自动修复的异常。
+
+用法: python benchmarks/bench_integrity_check.py [--games 5] [--users 4000] [--batch-sizes 100,500,5000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="数据校验基准测试")
+    parser.add_argument("--games", type=int, default=5, help="游戏数")
+    parser.add_argument("--users", type=int, default=4000, help="每个游戏的用户数")
+    parser.add_argument("--batch-sizes", default="100,500,5000", help="对比的批次大小")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    import nonebot
+    nonebot.init(driver="~fastapi", log_level="WARNING")
+    from plugins.xlsx.config import Config
+    from plugins.xlsx.database import DatabaseManager
+
+    with tempfile.TemporaryDirectory() as excel_folder:
+        config = Config(excel_folder=excel_folder, completion_count=30)
+        db_manager = DatabaseManager(config)
+        rows = []
+        for i in range(args.users):
+            counts = list(range(1, 21))
+            if i % 100 == 1:
+                counts.insert(5, 5)      # 重复次数
+            elif i % 100 == 2:
+                counts.remove(10)        # 断档
+            rows.append([f"用户{i}"] + [f"10-{n % 28 + 1:02d}_{n}" for n in counts])
+        rows.append(["无记录用户"])
+        for g in range(args.games):
+            db_manager.import_from_excel_data(f"游戏{g}", rows)
+
+        print(f"{args.games} 个游戏 x {args.users} 个用户，每个周期约20条记录:")
+        for batch_size in (int(size) for size in args.batch_sizes.split(",")):
+            tracemalloc.start()
+            start = time.perf_counter()
+            report = db_manager.check_integrity(batch_size=batch_size)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"  批次 {batch_size:>5}: {elapsed:.2f}s，峰值内存 {peak / 1024 / 1024:.1f} MB，"
+                  f"{report.records_scanned / elapsed:,.0f} 条记录/秒，发现 {report.total_issues} 处异常")
+
+        repaired = db_manager.check_integrity(repair=True)
+        after = db_manager.check_integrity()
+        print(f"修复 {repaired.total_repaired} 处（{repaired.batches} 个批次），"
+              f"修复后剩余 {after.total_issues} 处（可自动修复 {after.repairable} 处）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""分库写入吞吐基准测试
+
+多个线程同时为不同游戏执行 +1 命令，对比单库和分库模式下的写入吞吐。
+预热一轮后两种模式交替运行多轮，取中位数。
+
+用法: python benchmarks/bench_sharded_writes.py [--games 4] [--adds 200] [--rounds 5]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(sharding: bool, games: int, adds: int) -> float:
+    """返回每秒写入的 +1 次数"""
+    from plugins.xlsx.config import Config
+    from plugins.xlsx.database import DatabaseManager
+
+    with tempfile.TemporaryDirectory() as excel_folder:
+        config = Config(excel_folder=excel_folder, db_sharding=sharding, completion_count=adds + 1)
+        db_manager = DatabaseManager(config)
+        game_names = [f"游戏{i}" for i in range(games)]
+        for game_name in game_names:
+            db_manager.add_game(game_name)
+
+        def work(game_name: str):
+            for _ in range(adds):
+                db_manager.add_user_record("用户", game_name, 1)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=games) as executor:
+            list(executor.map(work, game_names))
+        elapsed = time.perf_counter() - start
+    return games * adds / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分库写入吞吐基准测试")
+    parser.add_argument("--games", type=int, default=4, help="同时写入的游戏数")
+    parser.add_argument("--adds", type=int, default=200, help="每个游戏的 +1 次数")
+    parser.add_argument("--rounds", type=int, default=5, help="每种模式运行的轮数")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    import nonebot
+    nonebot.init(driver="~fastapi", log_level="WARNING")
+
+    # 预热（导入模块、文件系统缓存），不计入结果
+    run(False, args.games, args.adds)
+    results = {False: [], True: []}
+    for _ in range(args.rounds):
+        for sharding in (False, True):
+            results[sharding].append(run(sharding, args.games, args.adds))
+    single = statistics.median(results[False])
+    sharded = statistics.median(results[True])
+    print(f"{args.games} 个游戏并发写入，每个 {args.adds} 次（{args.rounds} 轮中位数）:")
+    print(f"  单库: {single:.0f} 次/秒")
+    print(f"  分库: {sharded:.0f} 次/秒（{sharded / single:.2f}x）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""插件启动耗时基准测试
+
+在独立子进程中多次加载插件，统计导入耗时，并检查启动阶段没有加载openpyxl。
+
+用法: python benchmarks/bench_startup.py [--runs 10]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 子进程中执行的代码：初始化NoneBot后计时导入插件
+CHILD_CODE = r"""
+import json, sys, time
+import nonebot
+nonebot.init(driver="~fastapi")
+from nonebot.adapters.onebot.v11 import Adapter
+nonebot.get_driver().register_adapter(Adapter)
+start = time.perf_counter()
+nonebot.load_plugin("plugins.xlsx")
+elapsed = time.perf_counter() - start
+print(json.dumps({"import_ms": elapsed * 1000, "openpyxl_loaded": "openpyxl" in sys.modules}))
+"""
+
+
+def run_once(excel_folder: str) -> dict:
+    env = dict(os.environ, EXCEL_FOLDER=excel_folder, LOG_LEVEL="WARNING")
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD_CODE], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="插件启动耗时基准测试")
+    parser.add_argument("--runs", type=int, default=10, help="运行次数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as excel_folder:
+        results = [run_once(excel_folder) for _ in range(args.runs)]
+
+    timings = [r["import_ms"] for r in results]
+    print(f"插件导入耗时（{args.runs} 次）:")
+    print(f"  最小: {min(timings):.1f} ms")
+    print(f"  中位数: {statistics.median(timings):.1f} ms")
+    print(f"  最大: {max(timings):.1f} ms")
+    print(f"  启动时加载openpyxl: {'是' if any(r['openpyxl_loaded'] for r in results) else '否'}")
+
+
+if __name__ == "__main__":
+    main()
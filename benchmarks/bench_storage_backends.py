@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""存储后端基准测试
+
+对比 SQLite 和内存两种存储后端的 +1 写入吞吐、批量导入耗时和导出耗时。
+
+用法: python benchmarks/bench_storage_backends.py [--users 500] [--records 20] [--adds 2000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_rows(users: int, records: int) -> list:
+    """生成模拟的Excel行数据：用户名 + 日期_次数"""
+    return [
+        [f"用户{i}"] + [f"{(n // 28) % 12 + 1:02d}-{n % 28 + 1:02d}_{n + 1}" for n in range(records)]
+        for i in range(users)
+    ]
+
+
+def run(backend: str, rows: list, adds: int) -> dict:
+    """返回各项操作的耗时（秒）"""
+    from plugins.xlsx.config import Config
+    from plugins.xlsx.excel_exporter import ExcelExporter
+    from plugins.xlsx.services import create_storage
+
+    with tempfile.TemporaryDirectory() as excel_folder:
+        config = Config(excel_folder=excel_folder, storage_backend=backend, completion_count=adds + 1)
+        db_manager = create_storage(config)
+        exporter = ExcelExporter(db_manager, config)
+
+        start = time.perf_counter()
+        db_manager.import_from_excel_data("导入", rows)
+        imported = time.perf_counter() - start
+
+        db_manager.add_game("写入")
+        start = time.perf_counter()
+        for _ in range(adds):
+            db_manager.add_user_record("用户", "写入", 1)
+        written = time.perf_counter() - start
+
+        start = time.perf_counter()
+        exporter.export_game_to_buffer("导入")
+        exported = time.perf_counter() - start
+
+    return {"import": imported, "adds_per_second": adds / written, "export": exported}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="存储后端基准测试")
+    parser.add_argument("--users", type=int, default=500, help="导入的用户数")
+    parser.add_argument("--records", type=int, default=20, help="每个用户的记录数")
+    parser.add_argument("--adds", type=int, default=2000, help="+1 次数")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    import nonebot
+    nonebot.init(driver="~fastapi", log_level="WARNING")
+
+    rows = make_rows(args.users, args.records)
+    sqlite = run("sqlite", rows, args.adds)
+    memory = run("memory", rows, args.adds)
+    print(f"导入 {args.users} 个用户 x {args.records} 条记录，+1 {args.adds} 次:")
+    for label, result in (("SQLite", sqlite), ("内存", memory)):
+        print(f"  {label}: 导入 {result['import']:.2f} s, 写入 {result['adds_per_second']:.0f} 次/秒, "
+              f"导出 {result['export']:.2f} s")
+    print(f"  内存后端写入吞吐为 SQLite 的 {memory['adds_per_second'] / sqlite['adds_per_second']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""用户总览基准测试
+
+对比逐个游戏调用 get_user_summary（即每个游戏执行一次 /表格查询）和一次 get_user_overview 查询
+同一用户在所有游戏中进度的耗时。
+
+用法: python benchmarks/bench_user_overview.py [--games 50] [--users 200] [--runs 20]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(func, runs: int) -> float:
+    """返回多次运行耗时的中位数（毫秒）"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="用户总览基准测试")
+    parser.add_argument("--games", type=int, default=50, help="游戏数")
+    parser.add_argument("--users", type=int, default=200, help="每个游戏的用户数")
+    parser.add_argument("--runs", type=int, default=20, help="运行次数（取中位数）")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    import nonebot
+    nonebot.init(driver="~fastapi", log_level="WARNING")
+    from plugins.xlsx.config import Config
+    from plugins.xlsx.database import DatabaseManager
+
+    with tempfile.TemporaryDirectory() as excel_folder:
+        config = Config(excel_folder=excel_folder, completion_count=30)
+        db_manager = DatabaseManager(config)
+        rows = [[f"用户{i}"] + [f"10-{n % 28 + 1:02d}_{n + 1}" for n in range(10)] for i in range(args.users)]
+        game_names = [f"游戏{i}" for i in range(args.games)]
+        for game_name in game_names:
+            db_manager.import_from_excel_data(game_name, rows)
+
+        def per_game():
+            for game_name in game_names:
+                db_manager.get_user_summary("用户0", game_name)
+
+        per_game_ms = measure(per_game, args.runs)
+        overview_ms = measure(lambda: db_manager.get_user_overview("用户0"), args.runs)
+
+    print(f"{args.games} 个游戏 x {args.users} 个用户（{args.runs} 次取中位数）:")
+    print(f"  逐个游戏查询: {per_game_ms:.1f} ms")
+    print(f"  用户总览: {overview_ms:.1f} ms（{per_game_ms / overview_ms:.0f}x）")
+
+
+if __name__ == "__main__":
+    main()
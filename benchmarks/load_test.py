@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""端到端负载测试
+
+在本地加载插件的 NoneBot 中注入合成的 OneBot V11 群消息事件（不连接QQ），
+按配置的命令比例和并发数发送，记录每条命令的回复，统计各类命令的吞吐和 p50/p99 延迟。
+
+命令类型:
+- record: /<游戏名> <用户名> +1
+- batch: /<游戏名> <用户名> 3
+- lookup: /表格查询 <游戏名> <用户名>
+- overview: /用户总览 <用户名>
+- list: /文档导出 列表
+
+用法: python benchmarks/load_test.py [--requests 2000] [--concurrency 100]
+      [--mix record=8,lookup=1,overview=1] [--games 3] [--users 200] [--senders 5]
+      [--storage sqlite|memory] [--no-limits]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BOT_ID = 10000
+GROUP_ID = 20000
+# 发送命令的管理员账号从该ID开始编号（命令需要SUPERUSER权限）
+SENDER_BASE_ID = 30000
+
+COMMAND_TYPES = ["record", "batch", "lookup", "overview", "list"]
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """解析命令比例，如 "record=8,lookup=1,overview=1" """
+    mix = {}
+    for item in spec.split(","):
+        name, _, weight = item.strip().partition("=")
+        if name not in COMMAND_TYPES:
+            raise SystemExit(f"未知的命令类型: {name}（可选: {', '.join(COMMAND_TYPES)}）")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def make_command(kind: str, game: str, user: str) -> str:
+    if kind == "record":
+        return f"/{game} {user} +1"
+    if kind == "batch":
+        return f"/{game} {user} 3"
+    if kind == "lookup":
+        return f"/表格查询 {game} {user}"
+    if kind == "overview":
+        return f"/用户总览 {user}"
+    return "/文档导出 列表"
+
+
+def classify(replies: List[str]) -> str:
+    """按最后一条回复归类：ok、limited（限流/排队已满）、error、none（没有回复）"""
+    if not replies:
+        return "none"
+    if replies[-1].startswith("🚦"):
+        return "limited"
+    if replies[-1].startswith("❌"):
+        return "error"
+    return "ok"
+
+
+def percentile(values: List[float], p: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[p - 1]
+
+
+def load_plugin(excel_folder: str, args):
+    """初始化NoneBot并加载插件，返回插件主模块"""
+    os.environ["EXCEL_FOLDER"] = excel_folder
+    os.environ["STORAGE_BACKEND"] = args.storage
+    os.environ["SUPERUSERS"] = json.dumps([str(SENDER_BASE_ID + i) for i in range(args.senders)])
+    # 负载测试期间不需要周期完成后切换，也不需要定时任务
+    os.environ.setdefault("COMPLETION_COUNT", "1000000")
+    if args.no_limits:
+        # 关闭限流和并发上限，测量插件本身的处理能力
+        for name in ("RATE_LIMIT_USER_PER_MINUTE", "RATE_LIMIT_GAME_PER_MINUTE", "MAX_IN_FLIGHT_RECORDS"):
+            os.environ[name] = "0"
+    sys.path.insert(0, ROOT)
+
+    import nonebot
+    from nonebot.adapters.onebot.v11 import Adapter
+
+    nonebot.init(driver="~fastapi", log_level="WARNING")
+    nonebot.get_driver().register_adapter(Adapter)
+    nonebot.load_plugin("plugins.xlsx")
+    from plugins.xlsx import __main__ as plugin_main
+    return plugin_main
+
+
+def make_bot(replies: Dict[int, List[str]]):
+    """不连接QQ的机器人：回复按消息ID记录，其他API调用直接返回空结果"""
+    import nonebot
+    from nonebot.adapters.onebot.v11 import Adapter, Bot
+
+    class LoadTestBot(Bot):
+        async def send(self, event, message, **kwargs):
+            replies.setdefault(event.message_id, []).append(str(message))
+            return {"message_id": 0}
+
+        async def call_api(self, api: str, **data):
+            return {}
+
+    return LoadTestBot(nonebot.get_adapter(Adapter), str(BOT_ID))
+
+
+def make_event(message_id: int, sender_id: int, text: str):
+    from nonebot.adapters.onebot.v11 import GroupMessageEvent, Message
+    from nonebot.compat import type_validate_python
+
+    return type_validate_python(GroupMessageEvent, {
+        "time": int(time.time()), "self_id": BOT_ID, "post_type": "message", "sub_type": "normal",
+        "user_id": sender_id, "message_type": "group", "group_id": GROUP_ID, "message_id": message_id,
+        "message": Message(text), "original_message": Message(text), "raw_message": text, "font": 0,
+        "sender": {"user_id": sender_id, "nickname": "负载测试", "role": "admin"}, "to_me": False,
+    })
+
+
+async def run_load(bot, requests: List[Tuple[str, int, str]], concurrency: int,
+                   replies: Dict[int, List[str]]) -> Tuple[float, List[Tuple[str, float, int]]]:
+    """按并发数发送所有请求，返回 (总耗时, [(命令类型, 延迟, 消息ID)])"""
+    from nonebot.message import handle_event
+
+    queue = iter(enumerate(requests, 1))
+    results = []
+
+    async def worker():
+        for message_id, (kind, sender_id, text) in queue:
+            event = make_event(message_id, sender_id, text)
+            start = time.perf_counter()
+            await handle_event(bot, event)
+            results.append((kind, time.perf_counter() - start, message_id))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, results
+
+
+def report(elapsed: float, results: List[Tuple[str, float, int]], replies: Dict[int, List[str]]):
+    print(f"总计 {len(results)} 条命令，耗时 {elapsed:.2f}s，吞吐 {len(results) / elapsed:.0f} 条/秒")
+    print(f"{'类型':<10}{'数量':>7}{'条/秒':>9}{'p50(ms)':>10}{'p99(ms)':>10}{'最大(ms)':>10}  结果")
+    by_kind: Dict[str, List[Tuple[float, int]]] = {}
+    for kind, latency, message_id in results:
+        by_kind.setdefault(kind, []).append((latency, message_id))
+
+    for kind in COMMAND_TYPES:
+        if kind not in by_kind:
+            continue
+        latencies = [latency * 1000 for latency, _ in by_kind[kind]]
+        outcomes: Dict[str, int] = {}
+        queued = 0
+        for _, message_id in by_kind[kind]:
+            message_replies = replies.get(message_id, [])
+            outcome = classify(message_replies)
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+            queued += any(reply.startswith("⏳") for reply in message_replies)
+        summary = ", ".join(f"{name} {count}" for name, count in sorted(outcomes.items()))
+        if queued:
+            summary += f", 排队 {queued}"
+        print(f"{kind:<10}{len(latencies):>7}{len(latencies) / elapsed:>9.0f}{percentile(latencies, 50):>10.1f}"
+              f"{percentile(latencies, 99):>10.1f}{max(latencies):>10.1f}  {summary}")
+
+    errors = [replies[message_id][-1] for _, _, message_id in results
+              if classify(replies.get(message_id, [])) in ("error", "none") and replies.get(message_id)]
+    if errors:
+        print(f"错误示例: {errors[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="端到端负载测试")
+    parser.add_argument("--requests", type=int, default=2000, help="命令总数")
+    parser.add_argument("--concurrency", type=int, default=100, help="同时处理的命令数")
+    parser.add_argument("--mix", default="record=8,lookup=1,overview=1", help="命令比例，如 record=8,lookup=1")
+    parser.add_argument("--games", type=int, default=3, help="游戏数")
+    parser.add_argument("--users", type=int, default=200, help="玩家数（命令中的用户名）")
+    parser.add_argument("--senders", type=int, default=5, help="发送命令的管理员账号数")
+    parser.add_argument("--storage", default="sqlite", choices=["sqlite", "memory"], help="存储后端")
+    parser.add_argument("--no-limits", action="store_true", help="关闭限流和并发上限")
+    parser.add_argument("--seed", type=int, default=1, help="随机种子")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    rng = random.Random(args.seed)
+    games = [f"负载游戏{i}" for i in range(args.games)]
+    users = [f"玩家{i}" for i in range(args.users)]
+    kinds = rng.choices(list(mix), weights=list(mix.values()), k=args.requests)
+    requests = [
+        (kind, SENDER_BASE_ID + rng.randrange(args.senders), make_command(kind, rng.choice(games), rng.choice(users)))
+        for kind in kinds
+    ]
+
+    with tempfile.TemporaryDirectory() as excel_folder:
+        plugin_main = load_plugin(excel_folder, args)
+        db_manager = plugin_main.db_manager
+        # 预先为每个玩家写入一条记录，查询类命令都能命中
+        for game, user in itertools.product(games, users):
+            if db_manager.get_game_id(game) is None:
+                db_manager.add_game(game)
+            db_manager.add_user_record(user, game, 1)
+        plugin_main.register_game_commands()
+
+        replies: Dict[int, List[str]] = {}
+        bot = make_bot(replies)
+        print(f"存储后端: {args.storage}，并发: {args.concurrency}，比例: {args.mix}，"
+              f"限流: {'关闭' if args.no_limits else '按配置'}")
+        elapsed, results = asyncio.run(run_load(bot, requests, args.concurrency, replies))
+        report(elapsed, results, replies)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""并发记录压力测试
+
+同时为少量用户发起大量 +1 命令，检查每个用户周期内的次数没有重复或缺失：
+1. 通过命令处理函数在同一事件循环中并发执行（分条锁 + 工作线程）
+2. 多个线程绕过锁直接调用 add_user_record（只依赖数据库事务）
+
+用法: python benchmarks/stress_concurrent_records.py [--users 4] [--adds 200] [--threads 16]
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GAME_NAME = "压力测试"
+
+
+def load_plugin(excel_folder: str):
+    """初始化NoneBot并加载插件，返回插件主模块"""
+    os.environ["EXCEL_FOLDER"] = excel_folder
+    # 压力测试中不希望周期完成后切换，避免干扰次数连续性检查
+    os.environ.setdefault("COMPLETION_COUNT", "1000000")
+    sys.path.insert(0, ROOT)
+
+    import nonebot
+    from nonebot.adapters.onebot.v11 import Adapter
+
+    nonebot.init(driver="~fastapi", log_level="WARNING")
+    nonebot.get_driver().register_adapter(Adapter)
+    nonebot.load_plugin("plugins.xlsx")
+    from plugins.xlsx import __main__ as plugin_main
+    return plugin_main
+
+
+def check_records(db_path: str, expected: int) -> int:
+    """检查每个用户的次数是否恰好为 1..N，返回发现的问题数"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT u.name, r.count FROM records r JOIN users u ON u.id = r.user_id
+        ORDER BY u.name, r.count
+    ''')
+    counts = {}
+    for name, count in cursor.fetchall():
+        counts.setdefault(name, []).append(count)
+    conn.close()
+
+    problems = 0
+    for name, values in sorted(counts.items()):
+        duplicates = len(values) - len(set(values))
+        ok = values == list(range(1, expected + 1))
+        print(f"  {name}: {len(values)} 条记录，重复 {duplicates}，{'✅' if ok else '❌'}")
+        if not ok:
+            problems += 1
+    return problems
+
+
+async def run_commands(plugin_main, users: int, adds: int) -> float:
+    """通过命令的解析和记录函数并发添加记录"""
+    async def command(text: str) -> str:
+        error, username, count = plugin_main.parse_record_command(GAME_NAME, text)
+        return error or await plugin_main.add_record(GAME_NAME, username, count)
+
+    tasks = [
+        command(f"命令用户{u} +1")
+        for _ in range(adds) for u in range(users)
+    ]
+    start = time.perf_counter()
+    results = await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    failures = [r for r in results if not r.startswith("✅")]
+    if failures:
+        print(f"  失败 {len(failures)} 次，例如: {failures[0]}")
+    return elapsed
+
+
+def run_threads(db_manager, users: int, adds: int, threads: int) -> float:
+    """多个线程绕过锁直接写入数据库"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [
+            executor.submit(db_manager.add_user_record, f"线程用户{u}", GAME_NAME, 1)
+            for _ in range(adds) for u in range(users)
+        ]
+        for future in futures:
+            future.result()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="并发记录压力测试")
+    parser.add_argument("--users", type=int, default=4, help="用户数")
+    parser.add_argument("--adds", type=int, default=200, help="每个用户的 +1 次数")
+    parser.add_argument("--threads", type=int, default=16, help="直接写入时的线程数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as excel_folder:
+        plugin_main = load_plugin(excel_folder)
+        db_manager = plugin_main.db_manager
+        db_manager.add_game(GAME_NAME)
+        total = args.users * args.adds
+
+        elapsed = asyncio.run(run_commands(plugin_main, args.users, args.adds))
+        print(f"命令并发: {total} 次 +1，耗时 {elapsed:.2f}s（{total / elapsed:.0f} 次/秒）")
+
+        elapsed = run_threads(db_manager, args.users, args.adds, args.threads)
+        print(f"线程直写: {total} 次 +1，{args.threads} 线程，耗时 {elapsed:.2f}s（{total / elapsed:.0f} 次/秒）")
+
+        problems = check_records(db_manager.db_path, args.adds)
+
+    if problems:
+        print(f"❌ {problems} 个用户的次数不连续")
+        sys.exit(1)
+    print("✅ 所有用户的次数连续且无重复")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""离线数据校验：不连接QQ，直接校验（并可修复）插件的数据库
+
+机器人运行时也可以执行，修复时每批一个短事务，不会长时间阻塞记录命令。
+发现未修复的异常时退出码为1，便于在定时任务中使用。
+
+用法: python check_data.py [--repair] [--batch-size 500] [--folder <Excel目录>]
+"""
+
+import argparse
+import os
+import sys
+
+import nonebot
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="离线数据校验")
+    parser.add_argument("--repair", action="store_true", help="修复重复次数、缺失的完成标记和孤立数据")
+    parser.add_argument("--batch-size", type=int, default=None, help="每批读取（修复时每个事务处理）的用户周期数")
+    parser.add_argument("--folder", default=None, help="Excel目录（默认使用 EXCEL_FOLDER 配置）")
+    args = parser.parse_args()
+
+    if args.folder:
+        os.environ["EXCEL_FOLDER"] = args.folder
+
+    # 插件包导入时会注册命令，需要先初始化NoneBot
+    nonebot.init(log_level="WARNING")
+    from plugins.xlsx.services import services
+
+    db_manager = services.db_manager
+    if not db_manager.persistent:
+        print("❌ 内存存储没有可离线校验的数据")
+        return 1
+
+    print(f"数据库: {db_manager.location}")
+    report = db_manager.check_integrity(args.repair, args.batch_size)
+    print(report.summary())
+    if not args.repair and report.repairable:
+        print(f"💡 使用 --repair 可自动修复其中 {report.repairable} 处")
+    return 1 if report.total_issues > report.total_repaired else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
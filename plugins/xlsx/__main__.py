@@ -1,55 +1,64 @@
-from nonebot import on_command, get_driver
+from nonebot import on_command, on_message, get_driver
 from nonebot.adapters.onebot.v11 import Message, MessageSegment, Bot, GroupMessageEvent, PrivateMessageEvent, MessageEvent
 from nonebot.params import CommandArg
 from nonebot.permission import SUPERUSER
+from nonebot.rule import Rule
 from nonebot.exception import FinishedException
-from openpyxl import load_workbook, Workbook
-from openpyxl.styles import PatternFill, Alignment
+import asyncio
 import datetime
+import math
 import os
 import re
-import glob
+import shutil
+import tempfile
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, BinaryIO, List, Tuple, Union
 from .config import Config
-from .database import DatabaseManager
-from .excel_importer import ExcelImporter
-from .excel_exporter import ExcelExporter
-
-# 定义蓝色填充样式
-BLUE_FILL = PatternFill(start_color="ADD8E6", end_color="ADD8E6", fill_type="solid")
-
-# 定义居中对齐样式
-CENTER_ALIGNMENT = Alignment(horizontal='center', vertical='center')
-
-# 获取配置
-plugin_config = Config()
-# 初始化数据库管理器
-db_manager = DatabaseManager()
-# 初始化Excel导入器
-excel_importer = ExcelImporter()
-# 初始化Excel导出器
-excel_exporter = ExcelExporter()
+from .services import services
+from .file_uploader import FileUploader
+from .chat_file_importer import ChatFileImporter
+from .locks import StripedLocks
+from .backup import BackupManager
+from .rate_limit import AdmissionController
+from .reports import ReportCache, parse_time_of_day, seconds_until
+from .export_retention import ALL_GAMES_KEY
+from .storage import GameProgress
+
+# 获取共享的配置和服务（配置、数据库管理器只创建一次，openpyxl在首次导入/导出时才加载）
+plugin_config = services.config
+# 数据库管理器
+db_manager = services.db_manager
+# Excel导入器
+excel_importer = services.excel_importer
+# Excel导出器
+excel_exporter = services.excel_exporter
+# 初始化文件上传器
+file_uploader = FileUploader(plugin_config)
+# 初始化聊天文件导入器
+chat_file_importer = ChatFileImporter(plugin_config, excel_importer)
+# 记录命令按 (游戏, 用户) 分条加锁，同一用户的命令串行执行，不同用户互不阻塞
+record_locks = StripedLocks(plugin_config.record_lock_stripes)
+# 记录命令的准入控制（限流、并发上限）
+admission = AdmissionController(plugin_config)
+# 初始化数据库备份管理器
+backup_manager = BackupManager(db_manager, plugin_config)
+# 定时备份任务
+backup_task: Optional[asyncio.Task] = None
+# 报表缓存：数据未变化时直接返回预生成的导出文件
+report_cache = ReportCache(db_manager, excel_exporter, plugin_config)
+# 报表预生成任务
+report_task: Optional[asyncio.Task] = None
+# 在FastAPI驱动上注册只读HTTP接口
+if plugin_config.api_enabled:
+    from .http_api import register_http_api
+    if register_http_api(db_manager, plugin_config):
+        print(f"已开启HTTP接口: {plugin_config.api_prefix}")
+    else:
+        print("⚠️  当前驱动不是FastAPI，HTTP接口未开启")
 # 存储动态创建的命令处理器
 command_handlers = {}
-
-def find_latest_export_file(game_name: str) -> Optional[str]:
-    """查找指定游戏的最新导出文件"""
-    export_folder = os.path.join(plugin_config.excel_folder, "exports")
-    
-    if not os.path.exists(export_folder):
-        return None
-    
-    # 查找匹配的文件模式: {game_name}_export_MM-DD-HHMM.xlsx
-    pattern = f"{game_name}_export_*.xlsx"
-    matching_files = glob.glob(os.path.join(export_folder, pattern))
-    
-    if not matching_files:
-        return None
-    
-    # 按修改时间排序，获取最新的文件
-    matching_files.sort(key=os.path.getmtime, reverse=True)
-    return matching_files[0]
+# 支持的导出格式（zip 为每个游戏一个xlsx的压缩包，仅用于 all）
+EXPORT_FORMATS = ["xlsx", "csv", "tsv", "zip"]
 
 def get_games_from_database():
     """从数据库获取所有游戏名称"""
@@ -61,7 +70,7 @@ def register_game_commands():
     games = get_games_from_database()
     
     if plugin_config.debug_mode:
-        print(f"数据库路径: {db_manager.db_path}")
+        print(f"数据存储位置: {db_manager.location}")
         print(f"从数据库获取的游戏: {games}")
     
     if not games:
@@ -75,8 +84,26 @@ def register_game_commands():
         
         # 创建处理函数的闭包，确保每个命令都有自己的game_name
         def create_handler(game_name):
-            async def handler_func(args: Message = CommandArg()):
-                result = await handle_excel_command(game_name, args)
+            async def handler_func(event: MessageEvent, args: Message = CommandArg()):
+                # 先解析参数，格式错误的命令不消耗限流令牌
+                error, username, count = parse_record_command(game_name, args.extract_plain_text().strip())
+                if error:
+                    await handler.finish(error)
+                
+                # 排队已满时直接拒绝，不消耗限流令牌
+                if admission.is_full:
+                    await handler.finish("🚦 当前请求过多，请稍后再试")
+                
+                # 按发送者和游戏限流，避免刷屏或误操作挤占其他人的处理时间
+                retry_after = admission.check_rate(event.get_user_id(), game_name)
+                if retry_after > 0:
+                    await handler.finish(f"🚦 操作太频繁，请 {math.ceil(retry_after)} 秒后再试")
+                
+                if admission.will_queue:
+                    await handler.send("⏳ 当前请求较多，已排队处理...")
+                
+                async with admission.slot():
+                    result = await add_record(game_name, username, count)
                 await handler.finish(result)
             return handler_func
         
@@ -89,12 +116,10 @@ def register_game_commands():
         if plugin_config.debug_mode:
             print(f"已注册命令: {game_name} -> 数据库存储")
 
-async def handle_excel_command(game_name: str, args: Message = CommandArg()):
-    """通用Excel命令处理函数 - 使用SQLite数据库"""
-    cmd = args.extract_plain_text().strip()
-    
+def parse_record_command(game_name: str, cmd: str) -> Tuple[Optional[str], str, int]:
+    """解析记录命令参数，返回 (错误消息, 用户名, 次数)，解析成功时错误消息为 None"""
     if not cmd:
-        return f"❌ 命令格式错误！请使用以下格式：\n• /{game_name} <名字> +1\n• /{game_name} <名字> <次数>"
+        return f"❌ 命令格式错误！请使用以下格式：\n• /{game_name} <名字> +1\n• /{game_name} <名字> <次数>", "", 0
     
     # 解析命令格式
     # 支持格式：
@@ -103,7 +128,7 @@ async def handle_excel_command(game_name: str, args: Message = CommandArg()):
     
     parts = cmd.split()
     if len(parts) < 2:
-        return f"❌ 命令格式错误！请使用以下格式：\n• /{game_name} <名字> +1\n• /{game_name} <名字> <次数>"
+        return f"❌ 命令格式错误！请使用以下格式：\n• /{game_name} <名字> +1\n• /{game_name} <名字> <次数>", "", 0
     
     # 获取最后一部分作为次数参数
     count_part = parts[-1]
@@ -115,19 +140,31 @@ async def handle_excel_command(game_name: str, args: Message = CommandArg()):
     elif count_part.isdigit():
         count = int(count_part)
     else:
-        return f"❌ 无效的次数格式！请使用 +1 或数字（如：/{game_name} {username} 5）"
+        return f"❌ 无效的次数格式！请使用 +1 或数字（如：/{game_name} {username} 5）", username, 0
     
     # 验证次数范围
     if count <= 0 or count > 100:
-        return f"❌ 次数必须在1-100之间！"
+        return f"❌ 次数必须在1-100之间！", username, count
     
-    try:        # 添加用户记录
-        result = db_manager.add_user_record(username, game_name, count)
+    return None, username, count
+
+async def add_record(game_name: str, username: str, count: int) -> str:
+    """为用户添加记录并生成回复消息"""
+    try:
+        # 检查是否为新用户，若有相似的已有用户则给出提示（首次使用时需要构建索引，在线程中执行）
+        resolved, candidates = await asyncio.to_thread(db_manager.match_username, username, game_name)
+        hint = ""
+        if resolved != username and candidates:
+            hint = f"\n💡 {username} 是新用户，相似的已有用户: {', '.join(candidates)}"
+        
+        # 添加用户记录（在工作线程中执行，避免阻塞事件循环）
+        async with record_locks.lock_for((game_name, username)):
+            result = await asyncio.to_thread(db_manager.add_user_record, username, game_name, count)
         
         if count == 1:
-            return f"✅ 已为 {username} 添加1次 {game_name} 记录\n{result}"
+            return f"✅ 已为 {username} 添加1次 {game_name} 记录\n{result}{hint}"
         else:
-            return f"✅ 已为 {username} 添加{count}次 {game_name} 记录\n{result}"
+            return f"✅ 已为 {username} 添加{count}次 {game_name} 记录\n{result}{hint}"
             
     except Exception as e:
         return f"❌ 添加记录失败: {str(e)}"
@@ -136,55 +173,191 @@ async def handle_excel_command(game_name: str, args: Message = CommandArg()):
 xlsximport_handler = on_command("文档导入", priority=5, permission=SUPERUSER)
 
 @xlsximport_handler.handle()
-async def handle_xlsximport(args: Message = CommandArg()):
+async def handle_xlsximport(bot: Bot, event: MessageEvent, args: Message = CommandArg()):
     """处理Excel导入命令"""
     filename = args.extract_plain_text().strip()
     
     if not filename:
-        # 如果没有指定文件名，列出可用文件
-        result = excel_importer.list_available_files()
+        # 如果没有指定文件名，列出可用文件（目录扫描可能需要读取文件，在线程中执行）
+        result = await asyncio.to_thread(excel_importer.list_available_files)
         await xlsximport_handler.finish(result)
+    elif filename == "私聊":
+        # 等待用户私聊发送文件
+        if not isinstance(event, PrivateMessageEvent):
+            await xlsximport_handler.finish("❌ 请在私聊中使用 /文档导入 私聊")
+        chat_file_importer.start_private_session(event.user_id)
+        await xlsximport_handler.finish(f"📥 请在 {plugin_config.private_file_timeout} 秒内发送要导入的 .xlsx 文件")
+    elif filename == "群文件":
+        # 列出群文件中的xlsx文件供选择
+        if not isinstance(event, GroupMessageEvent):
+            await xlsximport_handler.finish("❌ 请在群聊中使用 /文档导入 群文件")
+        try:
+            files = await chat_file_importer.list_group_xlsx_files(bot, event.group_id)
+        except Exception as e:
+            await xlsximport_handler.finish(f"❌ 获取群文件列表失败: {str(e)}")
+        if not files:
+            await xlsximport_handler.finish("❌ 群文件中没有找到 .xlsx 文件")
+        
+        chat_file_importer.start_group_selection(event.group_id, event.user_id, files)
+        file_list = [
+            f"{i}. {f['file_name']} ({f.get('file_size', 0) / 1024:.1f}KB)"
+            for i, f in enumerate(files, 1)
+        ]
+        await xlsximport_handler.finish(
+            f"📁 群文件中的Excel文件:\n" + "\n".join(file_list)
+            + f"\n请在 {plugin_config.file_selection_timeout} 秒内回复序号选择要导入的文件"
+        )
     else:
-        # 导入指定文件
-        result = excel_importer.import_excel_file(filename)
+        # 导入指定文件（在线程中解析和写入，避免阻塞事件循环）
+        result = await asyncio.to_thread(excel_importer.import_excel_file, filename)
         
-        # 如果导入成功，重新注册游戏命令
+        # 如果导入成功，重新注册游戏命令并刷新用户名索引
         if result.startswith("✅"):
             register_game_commands()
+            await asyncio.to_thread(db_manager.build_name_index)
         
         await xlsximport_handler.finish(result)
 
+async def finish_chat_file_import(matcher, filename: str, data: bytes):
+    """导入聊天文件并回复结果"""
+    result = await chat_file_importer.import_file(filename, data)
+    
+    # 如果导入成功，重新注册游戏命令并刷新用户名索引
+    if result.startswith("✅"):
+        register_game_commands()
+        await asyncio.to_thread(db_manager.build_name_index)
+    
+    await matcher.finish(result)
+
+def _is_pending_private_file(event: MessageEvent) -> bool:
+    """私聊文件会话中收到文件"""
+    return (
+        isinstance(event, PrivateMessageEvent)
+        and chat_file_importer.has_private_session(event.user_id)
+        and any(seg.type == "file" for seg in event.message)
+    )
+
+def _is_pending_group_selection(event: MessageEvent) -> bool:
+    """群文件选择会话中收到序号"""
+    return (
+        isinstance(event, GroupMessageEvent)
+        and event.get_plaintext().strip().isdigit()
+        and chat_file_importer.get_group_selection(event.group_id, event.user_id) is not None
+    )
+
+# 注册私聊文件接收处理
+private_file_handler = on_message(rule=Rule(_is_pending_private_file), priority=4, permission=SUPERUSER, block=True)
+
+@private_file_handler.handle()
+async def handle_private_file(bot: Bot, event: PrivateMessageEvent):
+    """接收私聊发送的Excel文件并导入"""
+    chat_file_importer.end_private_session(event.user_id)
+    segment = next(seg for seg in event.message if seg.type == "file")
+    
+    try:
+        filename, data = await chat_file_importer.fetch_private_file(bot, segment)
+    except Exception as e:
+        await private_file_handler.finish(f"❌ 下载文件失败: {str(e)}")
+    
+    await finish_chat_file_import(private_file_handler, filename, data)
+
+# 注册群文件选择处理
+group_file_handler = on_message(rule=Rule(_is_pending_group_selection), priority=4, permission=SUPERUSER, block=True)
+
+@group_file_handler.handle()
+async def handle_group_file_selection(bot: Bot, event: GroupMessageEvent):
+    """根据序号下载群文件并导入"""
+    files = chat_file_importer.get_group_selection(event.group_id, event.user_id) or []
+    index = int(event.get_plaintext().strip())
+    
+    if not 1 <= index <= len(files):
+        await group_file_handler.finish(f"❌ 序号必须在1-{len(files)}之间")
+    
+    chat_file_importer.end_group_selection(event.group_id, event.user_id)
+    
+    try:
+        filename, data = await chat_file_importer.fetch_group_file(bot, event.group_id, files[index - 1])
+    except Exception as e:
+        await group_file_handler.finish(f"❌ 下载群文件失败: {str(e)}")
+    
+    await finish_chat_file_import(group_file_handler, filename, data)
+
 # 注册文档导出命令
 xlsxexport_handler = on_command("文档导出", priority=5, permission=SUPERUSER)
 
 @xlsxexport_handler.handle()
-async def handle_xlsxexport(args: Message = CommandArg()):
+async def handle_xlsxexport(bot: Bot, event: MessageEvent, args: Message = CommandArg()):
     """处理Excel导出命令"""
     args_text = args.extract_plain_text().strip()
-      # 检查是否包含 --upload 参数
+    
+    # 检查是否包含 --upload / --save 参数
     upload_file = "--upload" in args_text
     if upload_file:
         args_text = args_text.replace("--upload", "").strip()
+    save_copy = "--save" in args_text
+    if save_copy:
+        args_text = args_text.replace("--save", "").strip()
+    # 检查是否包含 --since-last 参数（只导出上次增量导出之后的新记录）
+    since_last = "--since-last" in args_text
+    if since_last:
+        args_text = args_text.replace("--since-last", "").strip()
+    
+    # 检查是否包含 --format <xlsx|csv|tsv> 参数
+    export_format = "xlsx"
+    format_match = re.search(r"--format\s+(\S+)", args_text)
+    if format_match:
+        export_format = format_match.group(1).lower()
+        args_text = (args_text[:format_match.start()] + args_text[format_match.end():]).strip()
+        if export_format not in EXPORT_FORMATS:
+            await xlsxexport_handler.finish(f"❌ 不支持的导出格式: {export_format}\n支持的格式: {', '.join(EXPORT_FORMATS)}")
     
     if not args_text:
-        await xlsxexport_handler.finish("❌ 请提供游戏名称或使用 'all' 导出所有游戏\n使用方法: /文档导出 <游戏名|all> [--upload]")
+        await xlsxexport_handler.finish("❌ 请提供游戏名称或使用 'all' 导出所有游戏\n使用方法: /文档导出 <游戏名|all|列表> [--format xlsx|csv|tsv|zip] [--since-last] [--upload [--save]]")
+    
+    if args_text == "列表":
+        # 游戏概览，数据未变化时直接返回预生成的文本
+        report, _ = await asyncio.to_thread(report_cache.fetch, "summary", ALL_GAMES_KEY)
+        await xlsxexport_handler.finish(report.message)
+    
+    if export_format in ("csv", "tsv") and args_text.lower() == "all":
+        await xlsxexport_handler.finish("❌ CSV/TSV 格式仅支持导出单个游戏")
+    if export_format == "zip" and (args_text.lower() != "all" or since_last):
+        await xlsxexport_handler.finish("❌ ZIP 打包仅支持 all（每个游戏一个xlsx）")
+    
+    if since_last:
+        if args_text.lower() == "all":
+            await xlsxexport_handler.finish("❌ 增量导出仅支持单个游戏")
+        if upload_file:
+            await handle_delta_export_and_upload(bot, event, args_text, save_copy, export_format)
+        else:
+            # 增量导出不使用报表缓存，保存成功后推进水位
+            result = await asyncio.to_thread(excel_exporter.export_game_delta, args_text, export_format)
+            await xlsxexport_handler.finish(result)
+    
+    if export_format == "zip":
+        if upload_file:
+            await handle_export_bundle_and_upload(bot, event, save_copy)
+        else:
+            # 每个游戏的工作簿依次流式写入导出目录中的zip文件
+            result = await asyncio.to_thread(excel_exporter.export_games_bundle)
+            await xlsxexport_handler.finish(result)
     
     if args_text.lower() == "all":
         if upload_file:
             # 导出所有游戏并上传合并文件
-            await handle_export_all_and_upload()
+            await handle_export_all_and_upload(bot, event, save_copy)
         else:
             # 使用合并导出功能，将所有游戏合并到一个Excel文件的不同sheet中
-            result = excel_exporter.export_all_games_to_single_file()
+            result = await export_report_to_folder(export_format, ALL_GAMES_KEY)
             await xlsxexport_handler.finish(result)
     else:
         game_name = args_text
         if upload_file:
             # 导出指定游戏并上传文件
-            await handle_export_and_upload(game_name)
+            await handle_export_and_upload(bot, event, game_name, save_copy, export_format)
         else:
-            # 执行单个游戏导出
-            result = excel_exporter.export_game_to_excel(game_name)
+            # 执行单个游戏导出（CSV/TSV 流式读取数据库并逐行写出）
+            result = await export_report_to_folder(export_format, game_name)
             await xlsxexport_handler.finish(result)
 
 # 注册创建表格命令
@@ -256,6 +429,17 @@ async def handle_xlsxlookup(args: Message = CommandArg()):
             await xlsxlookup_handler.finish("❌ 记录数量必须是数字！")
     
     try:
+        # 通过用户名索引匹配用户名（支持前缀、拼音首字母和近似匹配），在线程中执行
+        resolved, candidates = await asyncio.to_thread(db_manager.match_username, username, game_name)
+        matched_hint = ""
+        if resolved is None and candidates:
+            await xlsxlookup_handler.finish(
+                f"❌ 未找到用户 '{username}'，你是否想找: {', '.join(candidates)}"
+            )
+        if resolved is not None and resolved != username:
+            matched_hint = f"🔍 已匹配用户: {username} → {resolved}\n"
+            username = resolved
+        
         # 获取用户摘要信息
         summary = db_manager.get_user_summary(username, game_name, limit)
         
@@ -266,7 +450,7 @@ async def handle_xlsxlookup(args: Message = CommandArg()):
             await xlsxlookup_handler.finish(f"❌ 用户 '{username}' 在游戏 '{game_name}' 中没有记录")
         
         # 构建响应消息
-        response_msg = f"📊 查询结果\n"
+        response_msg = matched_hint + f"📊 查询结果\n"
         response_msg += f"🎮 游戏: {summary['game_name']}\n"
         response_msg += f"👤 用户: {summary['username']}\n"
         response_msg += f"📈 当前进度: {summary['completion_progress']}\n"
@@ -284,6 +468,132 @@ async def handle_xlsxlookup(args: Message = CommandArg()):
     except Exception as e:
         await xlsxlookup_handler.finish(f"❌ 查询失败: {str(e)}")
 
+# 注册用户总览命令
+xlsxoverview_handler = on_command("用户总览", priority=5, permission=SUPERUSER)
+
+def match_username_all_games(username: str) -> List[str]:
+    """在所有游戏的用户名索引中匹配用户名，返回去重后的候选用户名"""
+    candidates = []
+    for (game_name,) in db_manager.get_games_list():
+        resolved, names = db_manager.match_username(username, game_name)
+        for name in ([resolved] if resolved else []) + names:
+            if name not in candidates:
+                candidates.append(name)
+    return candidates
+
+def format_user_overview(username: str, overview: List[GameProgress]) -> str:
+    """生成用户总览消息"""
+    response_msg = f"📊 用户总览: {username}\n"
+    for progress in overview:
+        status = " ✅ 已完成" if progress.is_completed else ""
+        response_msg += f"🎮 {progress.game_name}: 第{progress.cycle}轮 {progress.count}/{plugin_config.completion_count}{status}"
+        response_msg += f" · 最后记录 {progress.last_record_date or '无'}\n"
+    response_msg += f"共 {len(overview)} 个游戏"
+    return response_msg
+
+@xlsxoverview_handler.handle()
+async def handle_xlsxoverview(args: Message = CommandArg()):
+    """处理跨游戏用户总览命令"""
+    username = args.extract_plain_text().strip()
+
+    if not username:
+        await xlsxoverview_handler.finish("❌ 请提供用户名！\n使用方法: /用户总览 <用户名>")
+
+    try:
+        overview = db_manager.get_user_overview(username)
+        matched_hint = ""
+        if not overview:
+            # 没有精确匹配时通过用户名索引查找候选
+            candidates = await asyncio.to_thread(match_username_all_games, username)
+            if len(candidates) != 1:
+                hint = f"，你是否想找: {', '.join(candidates)}" if candidates else ""
+                await xlsxoverview_handler.finish(f"❌ 未找到用户 '{username}' 的记录{hint}")
+            matched_hint = f"🔍 已匹配用户: {username} → {candidates[0]}\n"
+            username = candidates[0]
+            overview = db_manager.get_user_overview(username)
+
+        await xlsxoverview_handler.finish(matched_hint + format_user_overview(username, overview))
+
+    except FinishedException:
+        raise
+    except Exception as e:
+        await xlsxoverview_handler.finish(f"❌ 查询失败: {str(e)}")
+
+# 注册备份命令
+xlsxbackup_handler = on_command("备份", priority=5, permission=SUPERUSER)
+
+def format_backup_result(result: Dict[str, Any]) -> str:
+    """生成备份结果消息"""
+    size_mb = result["size"] / (1024 * 1024)
+    result_msg = f"✅ 数据库备份完成: {result['name']}\n"
+    result_msg += f"📄 文件: {len(result['files'])} 个，共 {size_mb:.2f} MB\n"
+    result_msg += f"🔍 完整性校验: 通过\n"
+    result_msg += f"⏱️ 耗时: {result['elapsed']:.2f} 秒"
+    if result["removed"]:
+        result_msg += f"\n🗑️ 已轮换删除 {len(result['removed'])} 个旧备份"
+    return result_msg
+
+@xlsxbackup_handler.handle()
+async def handle_xlsxbackup(args: Message = CommandArg()):
+    """处理数据库备份命令"""
+    arg = args.extract_plain_text().strip()
+    
+    if arg == "列表":
+        backups = backup_manager.list_backups()
+        if not backups:
+            await xlsxbackup_handler.finish("📂 还没有数据库备份")
+        await xlsxbackup_handler.finish("📂 已有的数据库备份:\n" + "\n".join(f"• {name}" for name in backups))
+    
+    try:
+        # 在线备份在工作线程中分步执行，不阻塞事件循环和写入
+        result = await asyncio.to_thread(backup_manager.create_backup)
+    except Exception as e:
+        await xlsxbackup_handler.finish(f"❌ 备份失败: {str(e)}")
+    
+    await xlsxbackup_handler.finish(format_backup_result(result))
+
+# 注册数据校验命令
+xlsxcheck_handler = on_command("数据校验", priority=5, permission=SUPERUSER)
+
+@xlsxcheck_handler.handle()
+async def handle_xlsxcheck(args: Message = CommandArg()):
+    """处理数据校验命令：/数据校验 只报告异常，/数据校验 修复 同时修复可自动修复的异常"""
+    arg = args.extract_plain_text().strip()
+    if arg not in ("", "修复"):
+        await xlsxcheck_handler.finish("❌ 用法: /数据校验 或 /数据校验 修复")
+    repair = arg == "修复"
+    
+    try:
+        # 分批扫描在工作线程中执行，修复时每批一个短事务，不长时间阻塞记录命令
+        report = await asyncio.to_thread(db_manager.check_integrity, repair)
+    except Exception as e:
+        await xlsxcheck_handler.finish(f"❌ 数据校验失败: {str(e)}")
+    
+    result_msg = report.summary()
+    if not repair and report.repairable:
+        result_msg += f"\n💡 发送 /数据校验 修复 可自动修复其中 {report.repairable} 处（重复次数、完成标记、孤立数据）"
+    await xlsxcheck_handler.finish(result_msg)
+
+async def run_scheduled_reports(time_of_day: str):
+    """每天在低峰时段预生成配置的报表"""
+    while True:
+        await asyncio.sleep(seconds_until(time_of_day))
+        try:
+            built = await asyncio.to_thread(report_cache.precompute)
+            print(f"报表预生成完成，共生成 {built} 个报表")
+        except Exception as e:
+            print(f"报表预生成失败: {e}")
+
+async def run_scheduled_backups(interval_hours: float):
+    """按固定间隔执行数据库备份"""
+    while True:
+        await asyncio.sleep(interval_hours * 3600)
+        try:
+            result = await asyncio.to_thread(backup_manager.create_backup)
+            print(f"定时备份完成: {result['name']}")
+        except Exception as e:
+            print(f"定时备份失败: {e}")
+
 # 注册xlsx帮助命令
 xlsx_help_handler = on_command("xlsx帮助", priority=5, permission=SUPERUSER)
 
@@ -300,22 +610,35 @@ async def handle_xlsx_help():
     help_msg += "📁 文件管理指令:\n"
     help_msg += "• /文档导入 - 列出可导入的Excel文件\n"
     help_msg += "• /文档导入 <文件名> - 导入指定Excel文件\n"
+    help_msg += "• /文档导入 私聊 - 在私聊中发送文件导入\n"
+    help_msg += "• /文档导入 群文件 - 从群文件中选择文件导入\n"
     help_msg += "• /文档导出 <游戏名> - 导出指定游戏数据\n"
     help_msg += "• /文档导出 all - 导出所有游戏数据\n"
-    help_msg += "• /文档导出 <游戏名|all> --upload - 导出并显示文件信息\n\n"
+    help_msg += "• /文档导出 all --format zip - 每个游戏一个xlsx，打包为zip\n"
+    help_msg += "• /文档导出 列表 - 查看可导出的游戏概览\n"
+    help_msg += "• /文档导出 <游戏名> --format csv|tsv - 导出为CSV/TSV\n"
+    help_msg += "• /文档导出 <游戏名> --since-last - 只导出上次增量导出之后的新记录\n"
+    help_msg += "• /文档导出 <游戏名|all> --upload - 导出并上传到当前聊天\n"
+    help_msg += "• /文档导出 <游戏名|all> --upload --save - 上传并在服务器保留副本\n\n"
     
     help_msg += "🎯 游戏管理指令:\n"
-    help_msg += "• /创建表格 <游戏名> - 创建新游戏并注册命令\n\n"
+    help_msg += "• /创建表格 <游戏名> - 创建新游戏并注册命令\n"
+    help_msg += "• /备份 - 立即备份数据库\n"
+    help_msg += "• /备份 列表 - 查看已有的数据库备份\n"
+    help_msg += "• /数据校验 - 检查重复次数、次数断档、完成标记和孤立数据\n"
+    help_msg += "• /数据校验 修复 - 检查并修复可自动修复的异常\n\n"
     
     help_msg += "📊 查询指令:\n"
     help_msg += "• /表格查询 <游戏名> <用户名> - 查询最新3条记录\n"
-    help_msg += "• /表格查询 <游戏名> <用户名> <数量> - 查询指定数量记录\n\n"
+    help_msg += "• /表格查询 <游戏名> <用户名> <数量> - 查询指定数量记录\n"
+    help_msg += "• /用户总览 <用户名> - 查看用户在所有游戏中的当前周期和进度\n"
+    help_msg += "  用户名支持前缀、拼音首字母和近似匹配\n\n"
     
     help_msg += "⚙️ 使用限制:\n"
     help_msg += "• 所有命令需要SUPERUSER权限\n"
     help_msg += "• 次数范围：1-100\n"
     help_msg += "• 查询记录数量范围：1-20\n"
-    help_msg += "• 支持文件格式：.xlsx、.xls\n\n"
+    help_msg += "• 支持文件格式：.xlsx、.csv、.tsv\n\n"
     
     help_msg += "💡 提示:\n"
     help_msg += "• 使用 /xlsx帮助 查看此帮助信息\n"
@@ -343,9 +666,46 @@ async def startup():
         except Exception as e:
             print(f"创建目录失败: {e}")
     
+    # 分库模式下将主数据库中的旧游戏数据迁移到各自的分库（在线程中执行，避免阻塞事件循环）
+    if plugin_config.db_sharding:
+        migrated = await asyncio.to_thread(db_manager.migrate_to_shards)
+        if migrated:
+            print(f"已将 {migrated} 个游戏迁移到独立的分库文件")
+    
     # 基于数据库注册游戏命令
     register_game_commands()
     
+    # 构建用户名索引（在线程中执行，避免阻塞事件循环）
+    await asyncio.to_thread(db_manager.build_name_index)
+    
+    # 按保留策略清理导出目录
+    removed = excel_exporter.retention.enforce()
+    if removed:
+        print(f"已清理 {len(removed)} 个过期导出文件")
+    
+    # 归档已完成周期的记录（在线程中执行，避免阻塞事件循环）
+    if plugin_config.archive_completed_cycles:
+        archived = await asyncio.to_thread(db_manager.archive_completed_cycles)
+        if archived:
+            print(f"已归档 {archived} 个已完成周期")
+    
+    # 启动报表预生成任务
+    global report_task
+    if plugin_config.report_precompute_time:
+        try:
+            parse_time_of_day(plugin_config.report_precompute_time)
+        except ValueError as e:
+            print(f"❌ REPORT_PRECOMPUTE_TIME 配置错误，未启动报表预生成: {e}")
+        else:
+            report_task = asyncio.create_task(run_scheduled_reports(plugin_config.report_precompute_time))
+            print(f"已启动报表预生成，每天 {plugin_config.report_precompute_time} 生成")
+    
+    # 启动定时备份任务
+    global backup_task
+    if plugin_config.backup_interval_hours > 0 and db_manager.persistent:
+        backup_task = asyncio.create_task(run_scheduled_backups(plugin_config.backup_interval_hours))
+        print(f"已启动定时备份，每 {plugin_config.backup_interval_hours} 小时备份一次")
+    
     if len(command_handlers) == 0:
         print("⚠️  没有注册任何命令!")
         print("解决方案:")
@@ -359,58 +719,79 @@ async def startup():
 
 @driver.on_shutdown
 async def shutdown():
+    # 停止定时任务
+    for task in (backup_task, report_task):
+        if task is not None:
+            task.cancel()
+    db_manager.close()
     print("Excel插件已关闭")
 
-async def upload_file_to_chat(file_path: str, filename: Optional[str] = None) -> Message:
-    """显示文件导出信息"""
+async def upload_file_to_chat(bot: Bot, event: MessageEvent, data: Union[bytes, BinaryIO], filename: str) -> Message:
+    """通过OneBot API将内存中的文件或已打开的临时文件上传到当前聊天"""
     try:
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"文件不存在: {file_path}")
+        await file_uploader.upload(bot, event, data, filename)
         
-        # 如果没有指定文件名，使用原文件名
-        if filename is None:
-            filename = os.path.basename(file_path)
-        
-        # 获取文件信息
-        file_size = os.path.getsize(file_path)
+        file_size = file_uploader.size_of(data)
         file_size_mb = file_size / (1024 * 1024)
         
         # 构建文件信息消息
         message = Message()
-        message += MessageSegment.text(f"📎 文件导出完成\n")
+        message += MessageSegment.text(f"📎 文件已上传\n")
         message += MessageSegment.text(f"📁 文件名: {filename}\n")
-        message += MessageSegment.text(f"📊 大小: {file_size_mb:.2f}MB ({file_size:,} bytes)\n")
-        message += MessageSegment.text(f"💾 保存路径: {file_path}\n")
-        message += MessageSegment.text(f"💡 请从服务器获取Excel文件")
+        message += MessageSegment.text(f"📊 大小: {file_size_mb:.2f}MB ({file_size:,} bytes)")
         
         return message
         
     except Exception as e:
-        raise Exception(f"文件处理失败: {str(e)}")
+        raise Exception(f"文件上传失败: {str(e)}")
+
+def format_report_message(report, cached: bool) -> str:
+    """生成导出结果消息，使用缓存的文件时注明生成时间"""
+    if not cached:
+        return report.message
+    created_at = datetime.datetime.fromtimestamp(report.created_at).strftime("%m-%d %H:%M")
+    return f"{report.message}\n⚡ 数据无变化，使用 {created_at} 生成的文件"
+
+async def export_report_to_folder(export_format: str, game_name: str) -> str:
+    """导出到导出目录，数据未变化时直接使用预生成的文件"""
+    report, cached = await asyncio.to_thread(report_cache.fetch, export_format, game_name)
+    if report.data is None:
+        return report.message
+    await asyncio.to_thread(save_export_copy, report.data, report.filename)
+    return format_report_message(report, cached)
 
-async def handle_export_and_upload(game_name: str):
-    """导出指定游戏并上传文件"""
+def save_export_copy(data: Union[bytes, BinaryIO], filename: str) -> str:
+    """将内存中的导出文件或已打开的临时文件另存到导出目录"""
+    os.makedirs(excel_exporter.export_folder, exist_ok=True)
+    file_path = os.path.join(excel_exporter.export_folder, filename)
+    with open(file_path, "wb") as f:
+        if isinstance(data, bytes):
+            f.write(data)
+        else:
+            data.seek(0)
+            shutil.copyfileobj(data, f)
+    excel_exporter.retention.register(file_path)
+    return file_path
+
+async def handle_export_and_upload(bot: Bot, event: MessageEvent, game_name: str, save_copy: bool = False,
+                                   export_format: str = "xlsx"):
+    """导出指定游戏到内存并上传文件"""
     try:
-        # 先导出文件
-        result = excel_exporter.export_game_to_excel(game_name)
+        # 在线程中生成文件内容，避免阻塞事件循环；数据未变化时直接使用预生成的文件
+        report, cached = await asyncio.to_thread(report_cache.fetch, export_format, game_name)
+        result, filename, data = format_report_message(report, cached), report.filename, report.data
         
-        if not result.startswith("✅"):
+        if data is None:
             await xlsxexport_handler.finish(result)
             return
         
-        # 查找最新的导出文件
-        file_path = find_latest_export_file(game_name)
-        
-        if not file_path:
-            await xlsxexport_handler.finish(f"❌ 未找到 {game_name} 的导出文件")
-            return
-        
-        filename = os.path.basename(file_path)
+        if save_copy:
+            save_export_copy(data, filename)
         
         # 上传文件
-        file_message = await upload_file_to_chat(file_path, filename)
+        file_message = await upload_file_to_chat(bot, event, data, filename)
         
-        # 发送结果消息和文件
+        # 发送结果消息和文件信息
         await xlsxexport_handler.send(f"📤 {result}")
         await xlsxexport_handler.finish(file_message)
         
@@ -420,42 +801,78 @@ async def handle_export_and_upload(game_name: str):
     except Exception as e:
         await xlsxexport_handler.finish(f"❌ 导出上传失败: {str(e)}")
 
-async def handle_export_all_and_upload():
-    """导出所有游戏并上传合并文件"""
+async def handle_delta_export_and_upload(bot: Bot, event: MessageEvent, game_name: str, save_copy: bool = False,
+                                         export_format: str = "xlsx"):
+    """增量导出指定游戏到内存并上传文件，上传成功后才推进水位"""
     try:
-        # 使用合并导出功能，将所有游戏合并到一个Excel文件的不同sheet中
-        result = excel_exporter.export_all_games_to_single_file()
+        result, filename, data, delta = await asyncio.to_thread(
+            excel_exporter.export_game_delta_to_buffer, game_name, export_format
+        )
         
-        if not result.startswith("📦"):
+        if data is None:
             await xlsxexport_handler.finish(result)
             return
         
-        # 查找最新的合并导出文件
-        export_folder = os.path.join(plugin_config.excel_folder, "exports")
+        if save_copy:
+            save_export_copy(data, filename)
         
-        if not os.path.exists(export_folder):
-            await xlsxexport_handler.finish("❌ 导出目录不存在")
-            return
+        # 上传文件，失败时水位保持不变，下次增量导出仍包含这些记录
+        file_message = await upload_file_to_chat(bot, event, data, filename)
+        await asyncio.to_thread(excel_exporter.commit_delta_export, delta)
+        
+        await xlsxexport_handler.send(f"📤 {result}")
+        await xlsxexport_handler.finish(file_message)
+        
+    except FinishedException:
+        # 重新抛出FinishedException，这是NoneBot的正常流程控制
+        raise
+    except Exception as e:
+        await xlsxexport_handler.finish(f"❌ 增量导出上传失败: {str(e)}")
+
+async def handle_export_bundle_and_upload(bot: Bot, event: MessageEvent, save_copy: bool = False):
+    """将每个游戏的工作簿打包为zip并上传，压缩包流式写入临时文件，不在内存中整体生成"""
+    try:
+        with tempfile.TemporaryFile() as bundle:
+            result, filename = await asyncio.to_thread(excel_exporter.export_games_bundle_to_stream, bundle)
+            
+            if filename is None:
+                await xlsxexport_handler.finish(result)
+                return
+            
+            if save_copy:
+                await asyncio.to_thread(save_export_copy, bundle, filename)
+            
+            await xlsxexport_handler.send(f"📤 {result}")
+            
+            # 上传时从临时文件逐块读取
+            file_message = await upload_file_to_chat(bot, event, bundle, filename)
+        await xlsxexport_handler.finish(file_message)
         
-        # 查找匹配的合并文件模式: all_games_export_MM-DD-HHMM.xlsx
-        import glob
-        pattern = "all_games_export_*.xlsx"
-        matching_files = glob.glob(os.path.join(export_folder, pattern))
+    except FinishedException:
+        # 重新抛出FinishedException，这是NoneBot的正常流程控制
+        raise
+    except Exception as e:
+        await xlsxexport_handler.finish(f"❌ 打包导出上传失败: {str(e)}")
+
+async def handle_export_all_and_upload(bot: Bot, event: MessageEvent, save_copy: bool = False):
+    """将所有游戏合并导出到内存并上传文件"""
+    try:
+        # 使用合并导出功能，将所有游戏合并到一个Excel文件的不同sheet中；数据未变化时直接使用预生成的文件
+        report, cached = await asyncio.to_thread(report_cache.fetch, "xlsx", ALL_GAMES_KEY)
+        result, filename, data = format_report_message(report, cached), report.filename, report.data
         
-        if not matching_files:
-            await xlsxexport_handler.finish("❌ 未找到合并导出文件")
+        if data is None:
+            await xlsxexport_handler.finish(result)
             return
         
-        # 按修改时间排序，获取最新的文件
-        matching_files.sort(key=os.path.getmtime, reverse=True)
-        file_path = matching_files[0]
-        filename = os.path.basename(file_path)
+        if save_copy:
+            save_export_copy(data, filename)
         
         # 发送结果消息
         await xlsxexport_handler.send(f"📤 {result}")
         
         # 上传合并文件
-        file_message = await upload_file_to_chat(file_path, filename)
+        file_message = await upload_file_to_chat(bot, event, data, filename)
         await xlsxexport_handler.finish(file_message)
         
     except FinishedException:
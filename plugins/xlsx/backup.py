@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List
+
+from .config import Config
+from .storage import StorageBackend
+
+# 备份目录名格式：backup_20250615-143000
+BACKUP_PREFIX = "backup_"
+BACKUP_TIME_FORMAT = "%Y%m%d-%H%M%S"
+# 分步备份时源数据库被反复修改导致重新开始的最大次数，超过后改为一次性复制
+MAX_BACKUP_RESTARTS = 3
+
+
+class BackupError(Exception):
+    """备份失败或备份校验未通过"""
+
+
+class _BackupRestarted(Exception):
+    """分步备份过程中源数据库被修改，备份从头开始"""
+
+
+class BackupManager:
+    """数据库在线备份：使用SQLite backup API分步复制，校验完整性后按数量轮换"""
+
+    def __init__(self, db_manager: StorageBackend, config: Config):
+        self.db_manager = db_manager
+        self.config = config
+        self.backup_folder = os.path.join(config.excel_folder, "backups")
+        # 同一时间只允许一个备份任务（定时备份和 /备份 命令共用）
+        self._lock = threading.Lock()
+
+    def create_backup(self) -> Dict[str, Any]:
+        """备份主数据库和所有分库，返回备份信息"""
+        if not self.db_manager.persistent:
+            raise BackupError("内存存储不支持备份")
+        if not self._lock.acquire(blocking=False):
+            raise BackupError("已有备份正在进行中")
+
+        try:
+            start = time.perf_counter()
+            os.makedirs(self.backup_folder, exist_ok=True)
+
+            name = self._new_backup_name()
+            # 先写入临时目录，全部校验通过后再重命名，避免留下不完整的备份
+            temp_dir = os.path.join(self.backup_folder, f".{name}.tmp")
+            backup_dir = os.path.join(self.backup_folder, name)
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+            try:
+                total_size = 0
+                files = []
+                for db_path in self.db_manager.all_db_paths():
+                    relative = os.path.relpath(db_path, self.config.excel_folder)
+                    target = os.path.join(temp_dir, relative)
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+
+                    self._backup_file(db_path, target)
+                    self._check_integrity(target)
+
+                    total_size += os.path.getsize(target)
+                    files.append(relative)
+
+                os.rename(temp_dir, backup_dir)
+            except Exception:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+                raise
+
+            removed = self.rotate()
+
+            if self.config.debug_mode:
+                print(f"数据库备份完成: {backup_dir} ({len(files)} 个文件, {total_size} bytes)")
+
+            return {
+                "name": name,
+                "path": backup_dir,
+                "files": files,
+                "size": total_size,
+                "elapsed": time.perf_counter() - start,
+                "removed": removed,
+            }
+        finally:
+            self._lock.release()
+
+    def _new_backup_name(self) -> str:
+        """生成不与已有备份重名的备份目录名"""
+        base = BACKUP_PREFIX + datetime.datetime.now().strftime(BACKUP_TIME_FORMAT)
+        name, index = base, 1
+        while os.path.exists(os.path.join(self.backup_folder, name)):
+            name = f"{base}_{index}"
+            index += 1
+        return name
+
+    def _backup_file(self, db_path: str, target: str):
+        """分步复制单个数据库文件，每步之间释放锁，不会长时间阻塞写入"""
+        source = sqlite3.connect(db_path, timeout=self.config.db_busy_timeout)
+        try:
+            pages = max(1, self.config.backup_pages_per_step)
+            sleep = max(0.0, self.config.backup_step_sleep_ms / 1000)
+            state = {"remaining": None, "restarts": 0}
+
+            def progress(status: int, remaining: int, total: int):
+                # 剩余页数变多说明源数据库被修改，备份已从头开始
+                if state["remaining"] is not None and remaining > state["remaining"]:
+                    state["restarts"] += 1
+                    if state["restarts"] > MAX_BACKUP_RESTARTS:
+                        raise _BackupRestarted()
+                state["remaining"] = remaining
+
+            try:
+                self._copy(source, target, pages=pages, progress=progress, sleep=sleep)
+            except _BackupRestarted:
+                # 写入频繁时改为一次性复制；WAL模式下这只是一个读事务，不阻塞写入
+                if self.config.debug_mode:
+                    print(f"备份多次重新开始，改为一次性复制: {db_path}")
+                self._copy(source, target, pages=-1)
+        finally:
+            source.close()
+
+    @staticmethod
+    def _copy(source: sqlite3.Connection, target: str, **kwargs):
+        if os.path.exists(target):
+            os.remove(target)
+        dest = sqlite3.connect(target)
+        try:
+            source.backup(dest, **kwargs)
+        finally:
+            dest.close()
+
+    @staticmethod
+    def _check_integrity(path: str):
+        """校验备份文件完整性"""
+        conn = sqlite3.connect(path)
+        try:
+            result = conn.execute("PRAGMA integrity_check").fetchone()[0]
+        finally:
+            conn.close()
+        if result != "ok":
+            raise BackupError(f"备份校验失败 {os.path.basename(path)}: {result}")
+
+    def list_backups(self) -> List[str]:
+        """列出已有的备份（按时间从新到旧）"""
+        if not os.path.isdir(self.backup_folder):
+            return []
+        names = [
+            name for name in os.listdir(self.backup_folder)
+            if name.startswith(BACKUP_PREFIX) and os.path.isdir(os.path.join(self.backup_folder, name))
+        ]
+        return sorted(names, reverse=True)
+
+    def rotate(self) -> List[str]:
+        """删除超出保留数量的旧备份，返回删除的备份名"""
+        keep = self.config.backup_keep
+        if keep <= 0:
+            return []
+
+        removed = self.list_backups()[keep:]
+        for name in removed:
+            shutil.rmtree(os.path.join(self.backup_folder, name), ignore_errors=True)
+            if self.config.debug_mode:
+                print(f"已删除旧备份: {name}")
+        return removed
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import base64
+import io
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from nonebot.adapters.onebot.v11 import Bot, MessageSegment
+from .config import Config
+from .excel_importer import ExcelImporter, IMPORT_EXTENSIONS
+
+
+class FileTooLargeError(Exception):
+    """下载文件超过大小限制"""
+
+
+async def download_file(url: str, max_bytes: int, timeout: float) -> bytes:
+    """通过httpx流式下载文件，超过大小限制或总超时时抛出异常"""
+    async def _download() -> bytes:
+        buffer = io.BytesIO()
+        async with httpx.AsyncClient(timeout=timeout, follow_redirects=True) as client:
+            async with client.stream("GET", url) as response:
+                response.raise_for_status()
+
+                content_length = response.headers.get("content-length")
+                if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+                    raise FileTooLargeError(f"文件大小 {int(content_length):,} bytes 超过限制 {max_bytes:,} bytes")
+
+                async for chunk in response.aiter_bytes():
+                    buffer.write(chunk)
+                    if buffer.tell() > max_bytes:
+                        raise FileTooLargeError(f"文件大小超过限制 {max_bytes:,} bytes")
+        return buffer.getvalue()
+
+    try:
+        return await asyncio.wait_for(_download(), timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"下载超时（{timeout}秒）")
+
+
+class ChatFileImporter:
+    """聊天文件导入：等待私聊发送的文件或选择群文件，下载后导入数据库"""
+
+    def __init__(self, config: Config, excel_importer: ExcelImporter):
+        self.config = config
+        self.excel_importer = excel_importer
+        self.max_bytes = int(config.max_import_file_mb * 1024 * 1024)
+        # 等待私聊文件的会话: user_id -> 截止时间
+        self._private_sessions: Dict[int, float] = {}
+        # 等待选择群文件的会话: (group_id, user_id) -> (截止时间, 候选文件列表)
+        self._group_sessions: Dict[Tuple[int, int], Tuple[float, List[Dict[str, Any]]]] = {}
+
+    # ===== 私聊文件 =====
+
+    def start_private_session(self, user_id: int):
+        """开始等待用户私聊发送文件"""
+        self._private_sessions[user_id] = time.monotonic() + self.config.private_file_timeout
+
+    def has_private_session(self, user_id: int) -> bool:
+        """检查用户是否有未过期的私聊文件会话"""
+        deadline = self._private_sessions.get(user_id)
+        if deadline is None:
+            return False
+        if time.monotonic() > deadline:
+            del self._private_sessions[user_id]
+            return False
+        return True
+
+    def end_private_session(self, user_id: int):
+        """结束私聊文件会话"""
+        self._private_sessions.pop(user_id, None)
+
+    async def fetch_private_file(self, bot: Bot, segment: MessageSegment) -> Tuple[str, bytes]:
+        """获取私聊文件内容，返回 (文件名, 文件内容)"""
+        data = segment.data
+        filename = data.get("name") or data.get("file") or "unknown.xlsx"
+        url = data.get("url")
+
+        if not url and data.get("file_id"):
+            # 部分OneBot实现需要通过 get_file 获取下载地址
+            info = await bot.call_api("get_file", file_id=data["file_id"])
+            filename = info.get("file_name") or filename
+            if info.get("base64"):
+                content = base64.b64decode(info["base64"])
+                if len(content) > self.max_bytes:
+                    raise FileTooLargeError(f"文件大小超过限制 {self.max_bytes:,} bytes")
+                return filename, content
+            url = info.get("url")
+
+        if not url:
+            raise ValueError("无法获取文件下载地址")
+
+        return filename, await download_file(url, self.max_bytes, self.config.private_file_timeout)
+
+    # ===== 群文件 =====
+
+    async def list_group_xlsx_files(self, bot: Bot, group_id: int) -> List[Dict[str, Any]]:
+        """列出群文件根目录中最新的可导入文件（最多 max_xlsx_records 个）"""
+        result = await bot.call_api("get_group_root_files", group_id=group_id)
+        files = [
+            f for f in (result.get("files") or [])
+            if str(f.get("file_name", "")).lower().endswith(tuple(f".{ext}" for ext in IMPORT_EXTENSIONS))
+        ]
+        files.sort(key=lambda f: f.get("upload_time", 0), reverse=True)
+        return files[:self.config.max_xlsx_records]
+
+    def start_group_selection(self, group_id: int, user_id: int, files: List[Dict[str, Any]]):
+        """开始等待用户选择群文件"""
+        deadline = time.monotonic() + self.config.file_selection_timeout
+        self._group_sessions[(group_id, user_id)] = (deadline, files)
+
+    def get_group_selection(self, group_id: int, user_id: int) -> Optional[List[Dict[str, Any]]]:
+        """获取未过期的群文件候选列表"""
+        session = self._group_sessions.get((group_id, user_id))
+        if session is None:
+            return None
+        deadline, files = session
+        if time.monotonic() > deadline:
+            del self._group_sessions[(group_id, user_id)]
+            return None
+        return files
+
+    def end_group_selection(self, group_id: int, user_id: int):
+        """结束群文件选择会话"""
+        self._group_sessions.pop((group_id, user_id), None)
+
+    async def fetch_group_file(self, bot: Bot, group_id: int, file: Dict[str, Any]) -> Tuple[str, bytes]:
+        """下载群文件，返回 (文件名, 文件内容)"""
+        size = file.get("file_size") or 0
+        if size > self.max_bytes:
+            raise FileTooLargeError(f"文件大小 {size:,} bytes 超过限制 {self.max_bytes:,} bytes")
+
+        result = await bot.call_api(
+            "get_group_file_url", group_id=group_id, file_id=file["file_id"], busid=file.get("busid", 0)
+        )
+        url = result.get("url")
+        if not url:
+            raise ValueError("无法获取群文件下载地址")
+
+        content = await download_file(url, self.max_bytes, self.config.group_file_timeout)
+        return file["file_name"], content
+
+    # ===== 导入 =====
+
+    async def import_file(self, filename: str, data: bytes) -> str:
+        """在工作线程中解析并导入文件，避免阻塞事件循环"""
+        if not filename.lower().endswith(tuple(f".{ext}" for ext in IMPORT_EXTENSIONS)):
+            return f"❌ 仅支持导入 {'/'.join('.' + ext for ext in IMPORT_EXTENSIONS)} 文件: {filename}"
+        return await asyncio.to_thread(self.excel_importer.import_excel_bytes, data, filename)
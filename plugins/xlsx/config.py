@@ -29,6 +29,109 @@ class Config(BaseModel):
     # 完成一个周期所需的次数
     completion_count: int = int(os.getenv("COMPLETION_COUNT", "30"))
     
+    # ===== 限流配置（默认全部关闭） =====
+    # 每个发送者每分钟允许的记录命令数，0表示不限制（建议20）
+    rate_limit_user_per_minute: float = float(os.getenv("RATE_LIMIT_USER_PER_MINUTE", "0"))
+    
+    # 每个发送者允许的突发命令数
+    rate_limit_user_burst: int = int(os.getenv("RATE_LIMIT_USER_BURST", "5"))
+    
+    # 每个游戏每分钟允许的记录命令数，0表示不限制（建议120）
+    rate_limit_game_per_minute: float = float(os.getenv("RATE_LIMIT_GAME_PER_MINUTE", "0"))
+    
+    # 每个游戏允许的突发命令数
+    rate_limit_game_burst: int = int(os.getenv("RATE_LIMIT_GAME_BURST", "20"))
+    
+    # 同时执行的记录命令上限，0表示不限制（建议8）
+    max_in_flight_records: int = int(os.getenv("MAX_IN_FLIGHT_RECORDS", "0"))
+    
+    # 并发已满时允许排队的记录命令数，超出时直接拒绝
+    max_queued_records: int = int(os.getenv("MAX_QUEUED_RECORDS", "32"))
+    
+    # ===== 文件上传配置 =====
+    # 超过该大小（MB）的文件使用 upload_file_stream 分块上传，否则使用base64直接上传
+    upload_stream_threshold_mb: float = float(os.getenv("UPLOAD_STREAM_THRESHOLD_MB", "4"))
+    
+    # 分块上传时每块的大小（KB）
+    upload_chunk_size_kb: int = int(os.getenv("UPLOAD_CHUNK_SIZE_KB", "512"))
+    
+    # ===== 导出目录保留配置（会删除导出文件，默认全部关闭） =====
+    # 导出目录最大总大小（MB），超出时按最近最少使用顺序删除，0表示不限制
+    export_max_total_mb: float = float(os.getenv("EXPORT_MAX_TOTAL_MB", "0"))
+    
+    # 导出文件最长保留天数，0表示不限制
+    export_max_age_days: float = float(os.getenv("EXPORT_MAX_AGE_DAYS", "0"))
+    
+    # 每个游戏最多保留的导出文件数，0表示不限制
+    export_keep_per_game: int = int(os.getenv("EXPORT_KEEP_PER_GAME", "0"))
+    
+    # ===== 数据库配置 =====
+    # 存储后端：sqlite（默认，保存在 records.db）或 memory（纯内存，进程退出后数据丢失）
+    storage_backend: str = os.getenv("STORAGE_BACKEND", "sqlite")
+    
+    # 数据库被锁定时的等待时间（秒）
+    db_busy_timeout: float = float(os.getenv("DB_BUSY_TIMEOUT", "30"))
+    
+    # 是否使用WAL日志模式：导出等读取操作在快照上进行，不会阻塞写入
+    # 开启后数据库旁会多出 -wal/-shm 文件，默认沿用回滚日志
+    db_wal_mode: bool = os.getenv("DB_WAL_MODE", "false").lower() == "true"
+    
+    # 是否按游戏分库存储：每个游戏使用独立的SQLite文件，records.db 只保存游戏目录
+    db_sharding: bool = os.getenv("DB_SHARDING", "false").lower() == "true"
+    
+    # 记录命令按 (游戏, 用户) 分条的锁数量，不同用户的命令可并行执行
+    record_lock_stripes: int = int(os.getenv("RECORD_LOCK_STRIPES", "64"))
+    
+    # ===== 报表预生成配置 =====
+    # 每天预生成报表的时间（HH:MM，如 04:00），默认留空表示不预生成
+    report_precompute_time: str = os.getenv("REPORT_PRECOMPUTE_TIME", "")
+    
+    # 预生成的报表：summary（游戏概览）、all（合并导出）、*（每个游戏）、<游戏名>[:csv|tsv]
+    report_precompute: str = os.getenv("REPORT_PRECOMPUTE", "summary,all")
+    
+    # 报表缓存的最大内存占用（MB）
+    report_cache_max_mb: float = float(os.getenv("REPORT_CACHE_MAX_MB", "64"))
+    
+    # ===== 备份配置 =====
+    # 自动备份间隔（小时），0表示不自动备份
+    backup_interval_hours: float = float(os.getenv("BACKUP_INTERVAL_HOURS", "24"))
+    
+    # 保留的备份数量，0表示不限制
+    backup_keep: int = int(os.getenv("BACKUP_KEEP", "7"))
+    
+    # 在线备份每步复制的页数，每步之间释放数据库锁
+    backup_pages_per_step: int = int(os.getenv("BACKUP_PAGES_PER_STEP", "256"))
+    
+    # 在线备份每步之间的等待时间（毫秒）
+    backup_step_sleep_ms: float = float(os.getenv("BACKUP_STEP_SLEEP_MS", "5"))
+    
+    # ===== HTTP接口配置 =====
+    # 是否在FastAPI驱动上开启只读JSON接口
+    api_enabled: bool = os.getenv("API_ENABLED", "false").lower() == "true"
+    
+    # 接口路径前缀
+    api_prefix: str = os.getenv("API_PREFIX", "/gamerecorder/api")
+    
+    # 访问令牌（Authorization: Bearer <令牌>），留空表示不校验
+    api_token: str = os.getenv("API_TOKEN", "")
+    
+    # 分页接口默认每页条数
+    api_page_size: int = int(os.getenv("API_PAGE_SIZE", "100"))
+    
+    # 分页接口每页最大条数
+    api_max_page_size: int = int(os.getenv("API_MAX_PAGE_SIZE", "1000"))
+    
+    # ===== 归档配置 =====
+    # 启动时是否将已完成周期的记录压缩归档（会改写记录表，默认关闭）
+    archive_completed_cycles: bool = os.getenv("ARCHIVE_COMPLETED_CYCLES", "false").lower() == "true"
+    
+    # ===== 数据校验配置 =====
+    # 数据校验每批读取（修复时每个事务处理）的用户周期数
+    integrity_batch_size: int = int(os.getenv("INTEGRITY_BATCH_SIZE", "500"))
+    
+    # 校验报告中最多列出的异常数
+    integrity_report_max_issues: int = int(os.getenv("INTEGRITY_REPORT_MAX_ISSUES", "10"))
+    
     # ===== 文件导入配置 =====
     # 文件选择超时时间（秒）
     file_selection_timeout: int = int(os.getenv("FILE_SELECTION_TIMEOUT", "30"))
@@ -43,6 +146,22 @@ class Config(BaseModel):
     # 群文件导入超时时间（秒）
     group_file_timeout: int = int(os.getenv("GROUP_FILE_TIMEOUT", "30"))
     
+    # 导入时每批写入的记录数
+    import_batch_size: int = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+    
+    # 导入报告中最多列出的被拒绝单元格数
+    import_report_max_rejects: int = int(os.getenv("IMPORT_REPORT_MAX_REJECTS", "10"))
+    
+    # 没有 _game_map 的多sheet文件（旧版合并导出）是否按sheet名拆分为多个游戏导入
+    # 默认关闭：普通工作簿只读取活动sheet，游戏名取自文件名
+    import_split_sheets: bool = os.getenv("IMPORT_SPLIT_SHEETS", "false").lower() == "true"
+    
+    # 导入多sheet合并文件时并行解析的线程数，0表示使用CPU核心数
+    import_workers: int = int(os.getenv("IMPORT_WORKERS", "0"))
+    
+    # 聊天文件导入的最大文件大小（MB）
+    max_import_file_mb: float = float(os.getenv("MAX_IMPORT_FILE_MB", "20"))
+    
     # ===== 查询配置 =====
     # 默认查询显示的最新记录数
     default_lookup_count: int = int(os.getenv("DEFAULT_LOOKUP_COUNT", "3"))
\ No newline at end of file
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import csv
+import os
+from typing import IO, Iterable, Iterator, List, Optional, Sequence
+
+# 支持的文本表格格式及其分隔符
+CSV_DELIMITERS = {
+    "csv": ",",
+    "tsv": "\t",
+}
+
+# 带BOM的UTF-8，便于Excel直接打开中文内容
+CSV_ENCODING = "utf-8-sig"
+
+
+def csv_format_of(filename: str) -> Optional[str]:
+    """根据文件扩展名返回文本表格格式（csv/tsv），不是文本表格时返回 None"""
+    ext = os.path.splitext(filename)[1].lower().lstrip(".")
+    return ext if ext in CSV_DELIMITERS else None
+
+
+def iter_csv_rows(stream: IO[str], fmt: str, skip_blank: bool = True) -> Iterator[List[str]]:
+    """逐行读取CSV/TSV数据，skip_blank 为真时跳过A列为空的行"""
+    for row in csv.reader(stream, delimiter=CSV_DELIMITERS[fmt]):
+        if skip_blank and not (row and row[0].strip()):
+            continue
+        yield row
+
+
+def write_csv_rows(stream: IO[str], rows: Iterable[Sequence[str]], fmt: str) -> int:
+    """逐行写入CSV/TSV数据，返回写入的行数"""
+    writer = csv.writer(stream, delimiter=CSV_DELIMITERS[fmt], lineterminator="\n")
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
@@ -3,18 +3,239 @@
 
 import sqlite3
 import os
+import sys
 import datetime
-from typing import List, Tuple, Optional, Dict, Any
+import itertools
+import threading
+from array import array
+from contextlib import contextmanager
+from typing import List, Tuple, Optional, Dict, Any, Iterable, Iterator
 from .config import Config
+from .import_pipeline import ImportReport, ParsedRow
+from .integrity import IntegrityReport
+from .record_model import CycleRecords, decode_record_date, encode_record_date
+from .storage import CycleInfo, GameProgress, StorageBackend, StorageSnapshot
 
-class DatabaseManager:
-    """数据库管理类"""
+# 分库模式下游戏数据库文件所在的子目录
+SHARD_FOLDER = "shards"
+
+
+def pack_cycle_records(records: List[Tuple[str, int]]) -> Optional[bytes]:
+    """将一个周期的记录压缩为字节串，无法无损编码时返回 None
+    
+    每条记录编码为两个无符号16位整数：日期（月*100+日）和次数
+    """
+    values = array('H')
+    for record_date, count in records:
+        code = encode_record_date(record_date)
+        if code is None or not (0 <= count <= 0xFFFF):
+            return None
+        values.append(code)
+        values.append(count)
+    
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values.tobytes()
+
+
+def unpack_cycle_records(data: bytes) -> List[Tuple[str, int]]:
+    """解压归档记录，返回 (日期, 次数) 列表"""
+    values = array('H')
+    values.frombytes(data)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    
+    return [(decode_record_date(values[i]), values[i + 1]) for i in range(0, len(values), 2)]
+
+
+def pack_record_ids(record_ids: List[int]) -> bytes:
+    """将一个周期的原始记录ID编码为小端64位整数，恢复归档时沿用这些ID"""
+    values = array('q', record_ids)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values.tobytes()
+
+
+def unpack_record_ids(data: bytes) -> List[int]:
+    values = array('q')
+    values.frombytes(data)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values.tolist()
+
+class DatabaseSnapshot(StorageSnapshot):
+    """只读快照：同一数据库文件上的所有读取看到同一时间点的数据，不阻塞写入
+    
+    WAL模式下使用读事务；其他日志模式下通过 backup 复制到内存数据库后读取。
+    """
+    
+    def __init__(self, db_manager: 'DatabaseManager', check_same_thread: bool = True):
+        self.db_manager = db_manager
+        # 为 False 时允许在不同线程中依次读取（如流式HTTP响应在线程池中逐块生成）
+        self.check_same_thread = check_same_thread
+        # 数据库文件 -> 快照连接，首次读取该文件时建立
+        self._connections: Dict[str, sqlite3.Connection] = {}
+    
+    def cursor(self, game_id: Optional[int] = None) -> sqlite3.Cursor:
+        """获取游戏数据所在数据库的快照游标"""
+        db_path = self.db_manager.db_path_for(game_id)
+        conn = self._connections.get(db_path)
+        if conn is None:
+            conn = self._connections[db_path] = self._open(db_path)
+        return conn.cursor()
+    
+    def _open(self, db_path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=self.check_same_thread)
+        journal_mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+        if journal_mode.lower() == 'wal':
+            # 读事务的快照在第一次读取时确定，之后的写入对本连接不可见
+            conn.execute('BEGIN')
+            conn.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+            return conn
+        
+        memory_conn = sqlite3.connect(':memory:', check_same_thread=self.check_same_thread)
+        conn.backup(memory_conn)
+        conn.close()
+        return memory_conn
     
-    def __init__(self):
-        self.config = Config()
+    def close(self):
+        for conn in self._connections.values():
+            conn.close()
+        self._connections.clear()
+    
+    def games(self) -> List[Tuple[str, int]]:
+        cursor = self.cursor()
+        cursor.execute('SELECT name, id FROM games ORDER BY name')
+        return cursor.fetchall()
+    
+    def iter_cycles(self, game_id: int, order_by_name: bool = True, start_id: int = 0,
+                    name: Optional[str] = None) -> Iterator[CycleInfo]:
+        query = 'SELECT id, name, cycle, is_completed FROM users WHERE game_id = ? AND id >= ?'
+        params: List[Any] = [game_id, start_id]
+        if name is not None:
+            query += ' AND name = ?'
+            params.append(name)
+        query += ' ORDER BY name, cycle' if order_by_name else ' ORDER BY id'
+        
+        # 使用独立的游标逐行读取，调用方可以在遍历过程中读取每个周期的记录
+        cursor = self.cursor(game_id)
+        cursor.execute(query, params)
+        for user_id, user_name, cycle, is_completed in cursor:
+            yield CycleInfo(user_id, user_name, cycle, bool(is_completed))
+    
+    def cycle_records(self, game_id: int, user_id: int) -> List[Tuple[str, int]]:
+        return self.db_manager.read_cycle_records(self.cursor(game_id), user_id)
+    
+    def cycle_summary(self, game_id: int, user_id: int) -> Tuple[int, Optional[str], int]:
+        cursor = self.cursor(game_id)
+        cursor.execute('SELECT COUNT(*) FROM records WHERE user_id = ?', (user_id,))
+        record_count = cursor.fetchone()[0]
+        if not record_count:
+            # 已归档的周期
+            return super().cycle_summary(game_id, user_id)
+        
+        cursor.execute(
+            'SELECT record_date, count FROM records WHERE user_id = ? ORDER BY id DESC LIMIT 1',
+            (user_id,)
+        )
+        last_date, last_count = cursor.fetchone()
+        return record_count, last_date, last_count
+    
+    def game_stats(self, game_id: int) -> Dict[str, Any]:
+        cursor = self.cursor(game_id)
+        cursor.execute('''
+            SELECT COUNT(DISTINCT name), COUNT(*), COALESCE(SUM(is_completed), 0)
+            FROM users WHERE game_id = ?
+        ''', (game_id,))
+        user_count, cycle_count, completed_count = cursor.fetchone()
+        
+        cursor.execute('''
+            SELECT COUNT(*), MAX(r.id) FROM records r
+            JOIN users u ON r.user_id = u.id
+            WHERE u.game_id = ?
+        ''', (game_id,))
+        live_count, last_record_id = cursor.fetchone()
+        
+        cursor.execute('''
+            SELECT COALESCE(SUM(a.record_count), 0) FROM archived_records a
+            JOIN users u ON a.user_id = u.id
+            WHERE u.game_id = ?
+        ''', (game_id,))
+        archived_count = cursor.fetchone()[0]
+        
+        last_record_date = None
+        if last_record_id is not None:
+            cursor.execute('SELECT record_date FROM records WHERE id = ?', (last_record_id,))
+            last_record_date = cursor.fetchone()[0]
+        
+        return {
+            "users": user_count,
+            "cycles": cycle_count,
+            "completed_cycles": completed_count,
+            "in_progress_cycles": cycle_count - completed_count,
+            "records": live_count + archived_count,
+            "archived_records": archived_count,
+            "last_record_date": last_record_date,
+            "completion_count": self.db_manager.config.completion_count,
+        }
+    
+    def game_delta(self, game_id: int, since: int) -> Tuple[List[CycleRecords], int, int]:
+        cursor = self.cursor(game_id)
+        cycles: Dict[int, CycleRecords] = {}
+        record_count = 0
+        last_record_id = since
+        
+        # records.id 是自增主键，按ID范围读取只扫描新增的记录
+        cursor.execute('''
+            SELECT r.id, u.id, u.name, u.cycle, u.is_completed, r.record_date, r.count
+            FROM records r JOIN users u ON u.id = r.user_id
+            WHERE r.id > ? AND u.game_id = ?
+            ORDER BY r.id
+        ''', (since, game_id))
+        for record_id, user_id, user_name, cycle, is_completed, record_date, count in cursor:
+            user = cycles.get(user_id)
+            if user is None:
+                user = cycles[user_id] = CycleRecords(user_id, user_name, cycle, bool(is_completed))
+            user.append(record_date, count)
+            record_count += 1
+            last_record_id = max(last_record_id, record_id)
+        
+        # 水位之后归档的周期整体导出（归档时保留了最后一条记录的ID）
+        cursor.execute('''
+            SELECT a.user_id, a.last_record_id, a.data, u.name, u.cycle, u.is_completed
+            FROM archived_records a JOIN users u ON u.id = a.user_id
+            WHERE a.last_record_id > ? AND u.game_id = ?
+        ''', (since, game_id))
+        for user_id, archived_last_id, data, user_name, cycle, is_completed in cursor:
+            user = cycles[user_id] = CycleRecords(user_id, user_name, cycle, bool(is_completed), unpack_cycle_records(data))
+            record_count += len(user)
+            last_record_id = max(last_record_id, archived_last_id)
+        
+        return list(cycles.values()), record_count, last_record_id
+
+
+class DatabaseManager(StorageBackend):
+    """数据库管理类（SQLite存储后端）"""
+    
+    def __init__(self, config: Optional[Config] = None):
+        super().__init__(config)
+        # 主数据库；分库模式下作为游戏目录（games 表记录每个游戏所在的分库文件）
         self.db_path = os.path.join(self.config.excel_folder, "records.db")
+        self.shard_folder = os.path.join(self.config.excel_folder, SHARD_FOLDER)
+        # 游戏ID -> 分库文件路径，未分库的游戏数据仍在主数据库中
+        self._shard_paths: Dict[int, str] = {}
+        self._shard_lock = threading.Lock()
+        # 游戏名 -> 游戏ID（游戏不会删除或改名，命中后记录命令不再查询主数据库）
+        self._game_ids: Dict[str, int] = {}
+        # 数据库文件 -> (写入连接, 锁)：记录命令复用每个库的一个连接，同一个库的写入在进程内排队，
+        # 不同分库互不等待，也避免每次写入都打开连接和关闭时的WAL检查点
+        self._writers: Dict[str, Tuple[sqlite3.Connection, threading.Lock]] = {}
         self.init_database()
     
+    @property
+    def location(self) -> str:
+        return self.db_path
+    
     def init_database(self):
         """初始化数据库"""
         # 确保目录存在
@@ -22,7 +243,42 @@ class DatabaseManager:
         
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
+        self._set_journal_mode(cursor)
+        self._create_tables(cursor)
+        
+        # 游戏目录：记录游戏数据所在的分库文件（旧数据库升级时补充该列）
+        cursor.execute('PRAGMA table_info(games)')
+        if 'shard' not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute('ALTER TABLE games ADD COLUMN shard TEXT')
+        self._upgrade_tables(cursor)
+        
+        cursor.execute('SELECT id, shard FROM games WHERE shard IS NOT NULL')
+        self._shard_paths = {
+            game_id: os.path.join(self.shard_folder, shard) for game_id, shard in cursor.fetchall()
+        }
+        
+        conn.commit()
+        conn.close()
+        
+        # 已有分库同样补充新增的表
+        for shard_path in set(self._shard_paths.values()):
+            shard_conn = sqlite3.connect(shard_path)
+            self._create_tables(shard_conn.cursor())
+            self._upgrade_tables(shard_conn.cursor())
+            shard_conn.commit()
+            shard_conn.close()
         
+        if self.config.debug_mode:
+            print(f"数据库初始化完成: {self.db_path}")
+            if self.config.db_sharding:
+                print(f"分库模式已启用，分库目录: {self.shard_folder}")
+    
+    def _set_journal_mode(self, cursor: sqlite3.Cursor):
+        """设置日志模式（WAL模式下读写互不阻塞）"""
+        cursor.execute(f"PRAGMA journal_mode={'WAL' if self.config.db_wal_mode else 'DELETE'}")
+    
+    def _create_tables(self, cursor: sqlite3.Cursor):
+        """创建数据表（主数据库和各分库使用相同的表结构）"""
         # 创建游戏表
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS games (
@@ -58,11 +314,195 @@ class DatabaseManager:
             )
         ''')
         
-        conn.commit()
+        # 按用户周期读取记录（查询、导出、接口分页）走索引，不再全表扫描
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_records_user ON records (user_id, id)')
+        
+        # 创建归档表：已完成周期的记录压缩为每个用户周期一行
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS archived_records (
+                user_id INTEGER PRIMARY KEY,
+                record_count INTEGER NOT NULL,
+                last_record_id INTEGER NOT NULL,
+                data BLOB NOT NULL,
+                archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                record_ids BLOB,
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+        ''')
+        
+        # 创建导出水位表：记录每个游戏增量导出到的最后一条记录ID
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS export_watermarks (
+                game_id INTEGER PRIMARY KEY,
+                last_record_id INTEGER NOT NULL,
+                exported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (game_id) REFERENCES games (id)
+            )
+        ''')
+        
+        # 创建数据版本表：每次写入在同一个事务中递增所属游戏的版本，
+        # 其他进程的写入和重启后的版本都以数据库为准（ETag、预生成报表据此判断数据是否变化）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS data_versions (
+                game_id INTEGER PRIMARY KEY,
+                version INTEGER NOT NULL
+            )
+        ''')
+    
+    def _upgrade_tables(self, cursor: sqlite3.Cursor):
+        """为旧数据库补充新增的列（新列追加在末尾，与新建表的列顺序一致）"""
+        cursor.execute('PRAGMA table_info(archived_records)')
+        if 'record_ids' not in [row[1] for row in cursor.fetchall()]:
+            # 归档周期的原始记录ID
+            cursor.execute('ALTER TABLE archived_records ADD COLUMN record_ids BLOB')
+    
+    def _bump_data_version(self, cursor: sqlite3.Cursor, game_id: int):
+        """在当前写入事务中递增游戏的数据版本（与数据一起提交或回滚）"""
+        cursor.execute('''
+            INSERT INTO data_versions (game_id, version) VALUES (?, 1)
+            ON CONFLICT(game_id) DO UPDATE SET version = version + 1
+        ''', (game_id,))
+    
+    def data_version(self, game_id: Optional[int] = None) -> int:
+        """从数据库读取游戏的数据版本；未指定游戏时为游戏数与所有游戏版本之和（只增不减）"""
+        if game_id is not None:
+            conn = self.connect(game_id)
+            result = conn.execute('SELECT version FROM data_versions WHERE game_id = ?', (game_id,)).fetchone()
+            conn.close()
+            return result[0] if result else 0
+        
+        conn = sqlite3.connect(self.db_path)
+        version = conn.execute('SELECT COUNT(*) FROM games').fetchone()[0]
         conn.close()
+        for db_path in self.all_db_paths():
+            conn = sqlite3.connect(db_path)
+            version += conn.execute('SELECT COALESCE(SUM(version), 0) FROM data_versions').fetchone()[0]
+            conn.close()
+        return version
+    
+    def db_path_for(self, game_id: Optional[int] = None) -> str:
+        """返回游戏数据所在的数据库文件，未指定游戏或未分库时返回主数据库"""
+        if game_id is None:
+            return self.db_path
+        return self._shard_paths.get(game_id, self.db_path)
+    
+    def connect(self, game_id: Optional[int] = None, **kwargs) -> sqlite3.Connection:
+        """连接游戏数据所在的数据库"""
+        return sqlite3.connect(self.db_path_for(game_id), **kwargs)
+    
+    def _writer(self, db_path: str) -> Tuple[sqlite3.Connection, threading.Lock]:
+        """获取数据库文件的写入连接，首次使用时建立"""
+        writer = self._writers.get(db_path)
+        if writer is None:
+            with self._shard_lock:
+                writer = self._writers.get(db_path)
+                if writer is None:
+                    conn = sqlite3.connect(db_path, timeout=self.config.db_busy_timeout,
+                                           isolation_level=None, check_same_thread=False)
+                    writer = self._writers[db_path] = (conn, threading.Lock())
+        return writer
+    
+    @contextmanager
+    def write_transaction(self, game_id: Optional[int] = None) -> Iterator[sqlite3.Cursor]:
+        """在游戏数据所在数据库的写入连接上执行 BEGIN IMMEDIATE 事务，出错时回滚"""
+        conn, lock = self._writer(self.db_path_for(game_id))
+        with lock:
+            cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                yield cursor
+                cursor.execute('COMMIT')
+            except BaseException:
+                if conn.in_transaction:
+                    cursor.execute('ROLLBACK')
+                raise
+    
+    def close(self):
+        """关闭写入连接"""
+        with self._shard_lock:
+            writers = list(self._writers.values())
+            self._writers.clear()
+        for conn, lock in writers:
+            with lock:
+                conn.close()
+    
+    def snapshot(self, check_same_thread: bool = True) -> 'DatabaseSnapshot':
+        """创建只读快照，用于导出等长时间读取"""
+        return DatabaseSnapshot(self, check_same_thread)
+    
+    def all_db_paths(self) -> List[str]:
+        """返回所有存放游戏数据的数据库文件（主数据库和各分库），用于跨库操作"""
+        return [self.db_path] + sorted(set(self._shard_paths.values()))
+    
+    def _create_shard(self, game_id: int) -> str:
+        """为游戏创建独立的分库文件，返回分库文件名"""
+        shard = f"game_{game_id}.db"
+        os.makedirs(self.shard_folder, exist_ok=True)
         
-        if self.config.debug_mode:
-            print(f"数据库初始化完成: {self.db_path}")
+        shard_conn = sqlite3.connect(os.path.join(self.shard_folder, shard))
+        self._set_journal_mode(shard_conn.cursor())
+        self._create_tables(shard_conn.cursor())
+        shard_conn.commit()
+        shard_conn.close()
+        return shard
+    
+    def migrate_to_shards(self) -> int:
+        """将主数据库中尚未分库的游戏迁移到各自的分库文件，返回迁移的游戏数"""
+        if not self.config.db_sharding:
+            return 0
+        
+        conn = sqlite3.connect(self.db_path, timeout=self.config.db_busy_timeout)
+        cursor = conn.cursor()
+        migrated = 0
+        
+        try:
+            cursor.execute('SELECT id, name FROM games WHERE shard IS NULL ORDER BY id')
+            for game_id, game_name in cursor.fetchall():
+                shard = self._create_shard(game_id)
+                shard_path = os.path.join(self.shard_folder, shard)
+                
+                # 通过 ATTACH 在同一个事务中复制数据、从主数据库删除并更新游戏目录，保留原有ID
+                cursor.execute('ATTACH DATABASE ? AS shard', (shard_path,))
+                try:
+                    # WAL模式下跨库事务不保证整体原子性，先清空上次中断时可能残留的数据
+                    for table in ('data_versions', 'export_watermarks', 'archived_records', 'records', 'users'):
+                        cursor.execute(f'DELETE FROM shard.{table}')
+                    cursor.execute('INSERT INTO shard.users SELECT * FROM main.users WHERE game_id = ?', (game_id,))
+                    cursor.execute('''
+                        INSERT INTO shard.records
+                        SELECT r.* FROM main.records r JOIN main.users u ON r.user_id = u.id
+                        WHERE u.game_id = ?
+                    ''', (game_id,))
+                    cursor.execute('''
+                        INSERT INTO shard.archived_records
+                        SELECT a.* FROM main.archived_records a JOIN main.users u ON a.user_id = u.id
+                        WHERE u.game_id = ?
+                    ''', (game_id,))
+                    cursor.execute('INSERT INTO shard.export_watermarks SELECT * FROM main.export_watermarks WHERE game_id = ?', (game_id,))
+                    cursor.execute('DELETE FROM main.export_watermarks WHERE game_id = ?', (game_id,))
+                    cursor.execute('INSERT INTO shard.data_versions SELECT * FROM main.data_versions WHERE game_id = ?', (game_id,))
+                    cursor.execute('DELETE FROM main.data_versions WHERE game_id = ?', (game_id,))
+                    cursor.execute('DELETE FROM main.records WHERE user_id IN (SELECT id FROM main.users WHERE game_id = ?)', (game_id,))
+                    cursor.execute('DELETE FROM main.archived_records WHERE user_id IN (SELECT id FROM main.users WHERE game_id = ?)', (game_id,))
+                    cursor.execute('DELETE FROM main.users WHERE game_id = ?', (game_id,))
+                    cursor.execute('UPDATE main.games SET shard = ? WHERE id = ?', (shard, game_id))
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                finally:
+                    cursor.execute('DETACH DATABASE shard')
+                
+                with self._shard_lock:
+                    self._shard_paths[game_id] = shard_path
+                migrated += 1
+                
+                if self.config.debug_mode:
+                    print(f"游戏 {game_name} 已迁移到分库: {shard_path}")
+        finally:
+            conn.close()
+        
+        return migrated
     
     def add_game(self, game_name: str) -> int:
         """添加游戏，返回游戏ID"""
@@ -72,7 +512,14 @@ class DatabaseManager:
         try:
             cursor.execute('INSERT INTO games (name) VALUES (?)', (game_name,))
             game_id = cursor.lastrowid
+            # 分库模式下新游戏直接使用独立的数据库文件
+            if self.config.db_sharding:
+                shard = self._create_shard(game_id)
+                cursor.execute('UPDATE games SET shard = ? WHERE id = ?', (shard, game_id))
             conn.commit()
+            if self.config.db_sharding:
+                with self._shard_lock:
+                    self._shard_paths[game_id] = os.path.join(self.shard_folder, shard)
             return game_id
         except sqlite3.IntegrityError:
             # 游戏已存在，获取ID
@@ -83,6 +530,10 @@ class DatabaseManager:
     
     def get_game_id(self, game_name: str) -> Optional[int]:
         """获取游戏ID"""
+        game_id = self._game_ids.get(game_name)
+        if game_id is not None:
+            return game_id
+        
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
@@ -90,11 +541,14 @@ class DatabaseManager:
         result = cursor.fetchone()
         conn.close()
         
-        return result[0] if result else None
+        if not result:
+            return None
+        self._game_ids[game_name] = result[0]
+        return result[0]
     
     def add_user(self, username: str, game_id: int, cycle: int = 1) -> int:
         """添加用户，返回用户ID"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.connect(game_id)
         cursor = conn.cursor()
         
         try:
@@ -103,7 +557,9 @@ class DatabaseManager:
                 (username, game_id, cycle)
             )
             user_id = cursor.lastrowid
+            self._bump_data_version(cursor, game_id)
             conn.commit()
+            self.name_index.add(game_id, username)
             return user_id
         except sqlite3.IntegrityError:
             # 用户已存在，获取ID
@@ -115,9 +571,20 @@ class DatabaseManager:
         finally:
             conn.close()
     
+    def _iter_name_entries(self) -> Iterable[Tuple[int, str]]:
+        """从所有数据库文件的用户表读取 (游戏ID, 用户名)"""
+        entries = []
+        for db_path in self.all_db_paths():
+            conn = sqlite3.connect(db_path)
+            cursor = conn.cursor()
+            cursor.execute('SELECT DISTINCT game_id, name FROM users')
+            entries.extend(cursor.fetchall())
+            conn.close()
+        return entries
+    
     def get_user_id(self, username: str, game_id: int, cycle: int = 1) -> Optional[int]:
         """获取用户ID"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.connect(game_id)
         cursor = conn.cursor()
         
         cursor.execute(
@@ -129,32 +596,335 @@ class DatabaseManager:
         
         return result[0] if result else None
     
-    def add_record(self, user_id: int, record_date: str, count: int):
-        """添加记录"""
-        conn = sqlite3.connect(self.db_path)
+    def add_record(self, user_id: int, record_date: str, count: int, game_id: Optional[int] = None):
+        """添加记录（分库模式下需要指定用户所属的游戏ID）"""
+        conn = self.connect(game_id)
         cursor = conn.cursor()
         
+        # 向已归档的周期追加记录时先恢复归档数据
+        self._restore_archived_cycle(cursor, user_id)
+        
         cursor.execute(
             'INSERT INTO records (user_id, record_date, count) VALUES (?, ?, ?)',
             (user_id, record_date, count)
         )
+        cursor.execute('SELECT game_id FROM users WHERE id = ?', (user_id,))
+        result = cursor.fetchone()
+        if result:
+            self._bump_data_version(cursor, result[0])
         conn.commit()
         conn.close()
     
-    def get_user_records(self, username: str, game_id: int, cycle: int = 1) -> List[Tuple[str, int]]:
-        """获取用户的所有记录"""
-        conn = sqlite3.connect(self.db_path)
+    def read_cycle_records(self, cursor: sqlite3.Cursor, user_id: int) -> List[Tuple[str, int]]:
+        """读取一个用户周期的所有记录（透明合并归档数据）"""
+        cursor.execute(
+            'SELECT record_date, count FROM records WHERE user_id = ? ORDER BY id',
+            (user_id,)
+        )
+        records = cursor.fetchall()
+        if records:
+            return records
+        return self._read_archived_cycle(cursor, user_id)
+    
+    def _read_archived_cycle(self, cursor: sqlite3.Cursor, user_id: int) -> List[Tuple[str, int]]:
+        """读取归档的周期记录，未归档时返回空列表"""
+        cursor.execute('SELECT data FROM archived_records WHERE user_id = ?', (user_id,))
+        result = cursor.fetchone()
+        return unpack_cycle_records(result[0]) if result else []
+    
+    def _restore_archived_cycle(self, cursor: sqlite3.Cursor, user_id: int):
+        """将归档的周期记录恢复到记录表"""
+        cursor.execute('SELECT data, record_ids FROM archived_records WHERE user_id = ?', (user_id,))
+        result = cursor.fetchone()
+        if not result:
+            return
+        records = unpack_cycle_records(result[0])
+        if result[1] is not None:
+            # 沿用原始记录ID（自增ID不会被复用），已增量导出的记录恢复后仍在水位之下，不会被再次导出
+            cursor.executemany(
+                'INSERT INTO records (id, user_id, record_date, count) VALUES (?, ?, ?, ?)',
+                [(record_id, user_id, record_date, count)
+                 for record_id, (record_date, count) in zip(unpack_record_ids(result[1]), records)]
+            )
+        else:
+            # 没有保存记录ID的旧归档只能使用新ID
+            cursor.executemany(
+                'INSERT INTO records (user_id, record_date, count) VALUES (?, ?, ?)',
+                [(user_id, record_date, count) for record_date, count in records]
+            )
+        cursor.execute('DELETE FROM archived_records WHERE user_id = ?', (user_id,))
+    
+    def archive_completed_cycles(self, batch_size: int = 200) -> int:
+        """将已完成周期的记录压缩归档，返回归档的周期数"""
+        archived = sum(self._archive_database(db_path, batch_size) for db_path in self.all_db_paths())
+        
+        if self.config.debug_mode:
+            print(f"归档完成，共归档 {archived} 个周期")
+        
+        return archived
+    
+    def _archive_database(self, db_path: str, batch_size: int) -> int:
+        """归档单个数据库文件中已完成的周期"""
+        conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
+        archived = 0
         
+        try:
+            while True:
+                cursor.execute('''
+                    SELECT u.id FROM users u
+                    WHERE u.is_completed
+                      AND NOT EXISTS (SELECT 1 FROM archived_records a WHERE a.user_id = u.id)
+                      AND EXISTS (SELECT 1 FROM records r WHERE r.user_id = u.id)
+                      -- 还有记录未被增量导出的周期暂不归档，避免归档后增量导出漏掉这些记录
+                      AND NOT EXISTS (
+                          SELECT 1 FROM export_watermarks w
+                          JOIN records r ON r.user_id = u.id AND r.id > w.last_record_id
+                          WHERE w.game_id = u.game_id
+                      )
+                    ORDER BY u.id
+                    LIMIT ?
+                ''', (batch_size,))
+                user_ids = [row[0] for row in cursor.fetchall()]
+                if not user_ids:
+                    break
+                
+                batch_archived = 0
+                for user_id in user_ids:
+                    cursor.execute(
+                        'SELECT id, record_date, count FROM records WHERE user_id = ? ORDER BY id',
+                        (user_id,)
+                    )
+                    rows = cursor.fetchall()
+                    data = pack_cycle_records([(record_date, count) for _, record_date, count in rows])
+                    if data is None:
+                        # 无法无损编码的周期保留原始记录
+                        continue
+                    
+                    cursor.execute(
+                        'INSERT INTO archived_records (user_id, record_count, last_record_id, data, record_ids) VALUES (?, ?, ?, ?, ?)',
+                        (user_id, len(rows), rows[-1][0], data, pack_record_ids([record_id for record_id, _, _ in rows]))
+                    )
+                    cursor.execute('DELETE FROM records WHERE user_id = ?', (user_id,))
+                    batch_archived += 1
+                
+                conn.commit()
+                archived += batch_archived
+                if batch_archived == 0:
+                    # 本批次全部无法归档，避免重复扫描
+                    break
+        finally:
+            conn.close()
+        
+        return archived
+
+    def check_integrity(self, repair: bool = False, batch_size: Optional[int] = None) -> IntegrityReport:
+        """逐个数据库文件按用户周期ID顺序分批扫描（透明读取归档数据），修复时每批一个事务"""
+        batch_size = max(1, batch_size or self.config.integrity_batch_size)
+        report = self._new_integrity_report()
+
+        conn = sqlite3.connect(self.db_path)
+        game_names = dict(conn.execute('SELECT id, name FROM games').fetchall())
+        conn.close()
+
+        removed_users = 0
+        for db_path in self.all_db_paths():
+            removed_users += self._check_database(db_path, game_names, report, repair, batch_size)
+
+        # 删除了无记录的用户周期后，已构建的用户名索引可能包含不再存在的用户名
+        if removed_users and self.name_index.is_built:
+            self.build_name_index()
+
+        if self.config.debug_mode:
+            print(f"数据校验完成，发现 {report.total_issues} 处异常，修复 {report.total_repaired} 处")
+
+        return report.finish()
+
+    def _check_database(self, db_path: str, game_names: Dict[int, str], report: IntegrityReport,
+                        repair: bool, batch_size: int) -> int:
+        """校验单个数据库文件，返回删除的用户周期数"""
+        conn = sqlite3.connect(db_path, timeout=self.config.db_busy_timeout, isolation_level=None)
+        cursor = conn.cursor()
+        archive_cursor = conn.cursor()
+        last_id = 0
+        removed_users = 0
+
+        try:
+            while True:
+                # 是否存在后续周期走 UNIQUE(name, game_id, cycle) 索引
+                cursor.execute('''
+                    SELECT u.id, u.game_id, u.name, u.cycle, u.is_completed,
+                           EXISTS (SELECT 1 FROM users v
+                                   WHERE v.name = u.name AND v.game_id = u.game_id AND v.cycle > u.cycle)
+                    FROM users u WHERE u.id > ? ORDER BY u.id LIMIT ?
+                ''', (last_id, batch_size))
+                users = cursor.fetchall()
+                # 最后一批不设上界，同时检查ID大于所有用户周期的孤立记录
+                upper_id = users[-1][0] if len(users) == batch_size else None
+                id_range = 'user_id > ?' + (' AND user_id <= ?' if upper_id is not None else '')
+                params = (last_id, upper_id) if upper_id is not None else (last_id,)
+
+                archive_cursor.execute(f'SELECT user_id, data, record_ids FROM archived_records WHERE {id_range}', params)
+                archived = {user_id: (data, record_ids) for user_id, data, record_ids in archive_cursor}
+                # 记录按 (user_id, id) 顺序流式读取（走 idx_records_user），与用户周期归并
+                cursor.execute(f'SELECT user_id, id, count FROM records WHERE {id_range} ORDER BY user_id, id', params)
+                groups = itertools.groupby(cursor, key=lambda row: row[0])
+                group = next(groups, None)
+
+                duplicate_ids: List[Tuple[int]] = []
+                duplicate_cycles = 0
+                archived_rewrites: List[Tuple[int, List[Tuple[str, int]], Optional[List[int]]]] = []
+                completed_ids: List[Tuple[int]] = []
+                orphan_user_ids: List[Tuple[int]] = []
+                orphan_record_ids: List[Tuple[int, int]] = []
+                changed_games = set()
+
+                def orphan_records(user_id: int, record_count: int):
+                    report.add_orphan_records(game_names.get(self._game_of_db(db_path), "未知游戏"), user_id, record_count)
+                    orphan_record_ids.append((user_id, user_id))
+
+                for user_id, game_id, name, cycle, is_completed, has_later_cycle in users:
+                    while group is not None and group[0] < user_id:
+                        orphan_records(group[0], sum(1 for _ in group[1]))
+                        group = next(groups, None)
+
+                    game_name = game_names.get(game_id, str(game_id))
+                    archived_data = archived.pop(user_id, None)
+                    if group is not None and group[0] == user_id:
+                        fix = report.inspect_cycle(game_name, user_id, name, cycle, bool(is_completed), bool(has_later_cycle),
+                                                   ((record_id, count) for _, record_id, count in group[1]))
+                        duplicate_ids.extend((record_id,) for record_id in fix.duplicates)
+                        duplicate_cycles += bool(fix.duplicates)
+                        group = next(groups, None)
+                    elif archived_data is not None:
+                        records = unpack_cycle_records(archived_data[0])
+                        fix = report.inspect_cycle(game_name, user_id, name, cycle, bool(is_completed), bool(has_later_cycle),
+                                                   enumerate(count for _, count in records))
+                        if fix.duplicates:
+                            removed = set(fix.duplicates)
+                            record_ids = unpack_record_ids(archived_data[1]) if archived_data[1] is not None else None
+                            archived_rewrites.append((
+                                user_id,
+                                [record for i, record in enumerate(records) if i not in removed],
+                                [record_id for i, record_id in enumerate(record_ids) if i not in removed] if record_ids else None,
+                            ))
+                    else:
+                        fix = report.inspect_cycle(game_name, user_id, name, cycle, bool(is_completed), bool(has_later_cycle), ())
+
+                    if fix.set_completed:
+                        completed_ids.append((user_id,))
+                    if fix.orphan:
+                        orphan_user_ids.append((user_id,))
+                    if fix.needed:
+                        changed_games.add(game_id)
+
+                while group is not None:
+                    orphan_records(group[0], sum(1 for _ in group[1]))
+                    group = next(groups, None)
+                for user_id, (data, _) in archived.items():
+                    orphan_records(user_id, len(data) // 4)
+
+                if repair and (duplicate_ids or archived_rewrites or completed_ids or orphan_user_ids or orphan_record_ids):
+                    # 无用户的记录不属于任何游戏，计入分库所属游戏（主数据库计入游戏ID 0）
+                    if orphan_record_ids:
+                        changed_games.add(self._game_of_db(db_path) or 0)
+                    removed_users += self._repair_batch(
+                        cursor, report, duplicate_ids, duplicate_cycles, archived_rewrites, completed_ids,
+                        orphan_user_ids, orphan_record_ids, changed_games
+                    )
+
+                if upper_id is None:
+                    break
+                last_id = upper_id
+        finally:
+            conn.close()
+
+        return removed_users
+
+    def _game_of_db(self, db_path: str) -> Optional[int]:
+        """分库文件所属的游戏ID，主数据库返回 None"""
+        return next((game_id for game_id, shard_path in self._shard_paths.items() if shard_path == db_path), None)
+
+    def _repair_batch(self, cursor: sqlite3.Cursor, report: IntegrityReport,
+                      duplicate_ids: List[Tuple[int]], duplicate_cycles: int,
+                      archived_rewrites: List[Tuple[int, List[Tuple[str, int]], Optional[List[int]]]],
+                      completed_ids: List[Tuple[int]],
+                      orphan_user_ids: List[Tuple[int]],
+                      orphan_record_ids: List[Tuple[int, int]],
+                      changed_games: Iterable[int]) -> int:
+        """在一个事务中修复一批用户周期的异常，返回删除的用户周期数"""
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            # 重复的记录只保留第一条
+            cursor.executemany('DELETE FROM records WHERE id = ?', duplicate_ids)
+            for user_id, records, record_ids in archived_rewrites:
+                cursor.execute(
+                    'UPDATE archived_records SET data = ?, record_count = ?, record_ids = ? WHERE user_id = ?',
+                    (pack_cycle_records(records), len(records),
+                     pack_record_ids(record_ids) if record_ids is not None else None, user_id)
+                )
+            cursor.executemany('UPDATE users SET is_completed = TRUE WHERE id = ?', completed_ids)
+            # 扫描后可能有新的 +1 写入，删除前再次确认周期仍然没有记录
+            cursor.executemany('''
+                DELETE FROM users WHERE id = ?
+                  AND NOT EXISTS (SELECT 1 FROM records WHERE user_id = users.id)
+                  AND NOT EXISTS (SELECT 1 FROM archived_records WHERE user_id = users.id)
+            ''', orphan_user_ids)
+            removed_users = cursor.rowcount if orphan_user_ids else 0
+            cursor.executemany(
+                'DELETE FROM records WHERE user_id = ? AND NOT EXISTS (SELECT 1 FROM users WHERE id = ?)',
+                orphan_record_ids
+            )
+            cursor.executemany(
+                'DELETE FROM archived_records WHERE user_id = ? AND NOT EXISTS (SELECT 1 FROM users WHERE id = ?)',
+                orphan_record_ids
+            )
+            for game_id in changed_games:
+                self._bump_data_version(cursor, game_id)
+            cursor.execute('COMMIT')
+        except Exception:
+            if cursor.connection.in_transaction:
+                cursor.execute('ROLLBACK')
+            raise
+
+        report.batches += 1
+        report.mark_repaired("duplicate", duplicate_cycles + len(archived_rewrites))
+        report.mark_repaired("completion", len(completed_ids))
+        report.mark_repaired("orphan_user", removed_users)
+        report.mark_repaired("orphan_records", len(orphan_record_ids))
+        return removed_users
+
+    def get_export_watermark(self, game_id: int) -> int:
+        """获取游戏的增量导出水位（上次导出的最后一条记录ID），从未导出时返回0"""
+        conn = self.connect(game_id)
+        cursor = conn.cursor()
+        cursor.execute('SELECT last_record_id FROM export_watermarks WHERE game_id = ?', (game_id,))
+        result = cursor.fetchone()
+        conn.close()
+        return result[0] if result else 0
+    
+    def set_export_watermark(self, game_id: int, last_record_id: int):
+        """增量导出完成后更新水位"""
+        conn = self.connect(game_id, timeout=self.config.db_busy_timeout)
+        cursor = conn.cursor()
         cursor.execute('''
-            SELECT r.record_date, r.count
-            FROM records r
-            JOIN users u ON r.user_id = u.id
-            WHERE u.name = ? AND u.game_id = ? AND u.cycle = ?
-            ORDER BY r.id
-        ''', (username, game_id, cycle))
+            INSERT INTO export_watermarks (game_id, last_record_id) VALUES (?, ?)
+            ON CONFLICT(game_id) DO UPDATE SET
+                last_record_id = MAX(last_record_id, excluded.last_record_id),
+                exported_at = CURRENT_TIMESTAMP
+        ''', (game_id, last_record_id))
+        conn.commit()
+        conn.close()
+    
+    def get_user_records(self, username: str, game_id: int, cycle: int = 1) -> List[Tuple[str, int]]:
+        """获取用户的所有记录"""
+        user_id = self.get_user_id(username, game_id, cycle)
+        if not user_id:
+            return []
         
-        result = cursor.fetchall()
+        conn = self.connect(game_id)
+        cursor = conn.cursor()
+        result = self.read_cycle_records(cursor, user_id)
         conn.close()
         return result
     
@@ -167,83 +937,83 @@ class DatabaseManager:
     
     def complete_user_cycle(self, username: str, game_id: int, cycle: int = 1):
         """标记用户周期完成"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.connect(game_id)
         cursor = conn.cursor()
         
         cursor.execute(
             'UPDATE users SET is_completed = TRUE WHERE name = ? AND game_id = ? AND cycle = ?',
             (username, game_id, cycle)
         )
+        self._bump_data_version(cursor, game_id)
         conn.commit()
         conn.close()
     
-    def import_from_excel_data(self, game_name: str, excel_data: List[List[str]]):
-        """从Excel数据导入到数据库"""
-        game_id = self.add_game(game_name)
+    def _write_parsed_rows(self, game_id: int, parsed_rows: Iterable[ParsedRow], report: ImportReport) -> int:
+        """写入阶段：在单个事务中按批次写入记录"""
+        batch_size = max(1, self.config.import_batch_size)
+        pending_records: List[Tuple[int, str, int]] = []
+        new_usernames = []
         
-        if self.config.debug_mode:
-            print(f"开始导入游戏: {game_name} (ID: {game_id})")
+        conn = self.connect(game_id)
+        cursor = conn.cursor()
         
-        imported_count = 0
+        def flush():
+            if pending_records:
+                cursor.executemany(
+                    'INSERT INTO records (user_id, record_date, count) VALUES (?, ?, ?)',
+                    pending_records
+                )
+                report.records_written += len(pending_records)
+                report.batches += 1
+                pending_records.clear()
         
-        for row_data in excel_data:
-            if not row_data or not row_data[0]:  # 跳过空行
-                continue
-            
-            username = str(row_data[0]).strip()
-            if not username:
-                continue
-            
-            # 解析用户名和周期
-            cycle = 1
-            original_username = username
-            
-            # 检查是否有周期标记，如 "用户名(2)"
-            if '(' in username and username.endswith(')'):
-                try:
-                    base_name, cycle_part = username.rsplit('(', 1)
-                    cycle = int(cycle_part.rstrip(')'))
-                    username = base_name
-                except (ValueError, IndexError):
-                    pass  # 如果解析失败，使用原始用户名
-            
-            # 获取或创建用户
-            user_id = self.get_user_id(username, game_id, cycle)
-            if not user_id:
-                user_id = self.add_user(username, game_id, cycle)
-            
-            # 处理记录数据（从第二列开始）
-            for record_data in row_data[1:]:
-                if not record_data or record_data in ['', '无', 'NaN', None]:
-                    continue
+        try:
+            for parsed in parsed_rows:
+                # 获取或创建用户
+                cursor.execute(
+                    'SELECT id FROM users WHERE name = ? AND game_id = ? AND cycle = ?',
+                    (parsed.username, game_id, parsed.cycle)
+                )
+                result = cursor.fetchone()
+                if result:
+                    user_id = result[0]
+                    # 向已归档的周期导入时先恢复归档数据
+                    self._restore_archived_cycle(cursor, user_id)
+                else:
+                    cursor.execute(
+                        'INSERT INTO users (name, game_id, cycle) VALUES (?, ?, ?)',
+                        (parsed.username, game_id, parsed.cycle)
+                    )
+                    user_id = cursor.lastrowid
+                    new_usernames.append(parsed.username)
+                    report.users_created += 1
                 
-                record_str = str(record_data).strip()
-                if not record_str or record_str == '无':
-                    continue
-                  # 解析记录格式：MM-DD_次数
-                try:
-                    if '_' in record_str:
-                        date_part, count_part = record_str.split('_', 1)
-                        # 处理特殊情况，如 "5-13_30(续)"
-                        count_part = count_part.split('(')[0].split('完')[0]
-                        count = int(count_part)
-                          # 添加记录
-                        self.add_record(user_id, date_part, count)
-                        imported_count += 1
-                        
-                        # 检查是否达到完成次数
-                        if count >= self.config.completion_count:
-                            self.complete_user_cycle(username, game_id, cycle)
-                            
-                except (ValueError, IndexError) as e:
-                    if self.config.debug_mode:
-                        print(f"解析记录失败: {record_str}, 错误: {e}")
-                    continue
+                completed = False
+                for cell in parsed.cells:
+                    pending_records.append((user_id, cell.record_date, cell.count))
+                    # 达到完成次数或带有"完"标记时标记周期完成
+                    if cell.count >= self.config.completion_count or cell.completed:
+                        completed = True
+                
+                if completed:
+                    cursor.execute('UPDATE users SET is_completed = TRUE WHERE id = ?', (user_id,))
+                
+                if len(pending_records) >= batch_size:
+                    flush()
+            
+            flush()
+            self._bump_data_version(cursor, game_id)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
         
-        if self.config.debug_mode:
-            print(f"导入完成，共导入 {imported_count} 条记录")
+        for username in new_usernames:
+            self.name_index.add(game_id, username)
         
-        return imported_count
+        return report.records_written
     
     def get_games_list(self) -> List[Tuple[str]]:
         """获取所有游戏列表"""
@@ -260,76 +1030,64 @@ class DatabaseManager:
         if not game_id:
             return f"❌ 游戏 {game_name} 不存在"
         
-        # 查找用户的最新周期
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT cycle, is_completed FROM users 
-            WHERE name = ? AND game_id = ? 
-            ORDER BY cycle DESC LIMIT 1
-        ''', (username, game_id))
-        
-        result = cursor.fetchone()
-        conn.close()
-        
-        if result:
-            cycle, is_completed = result
-            if is_completed:
-                # 如果当前周期已完成，创建新周期
-                cycle += 1
-        else:
-            # 新用户
-            cycle = 1
+        # 读取当前进度、写入记录在同一个 BEGIN IMMEDIATE 事务中完成，
+        # 避免并发的 +1 命令读到相同的计数；分库模式下只访问该游戏的分库
+        created_user = False
         
-        # 获取或创建用户
-        user_id = self.get_user_id(username, game_id, cycle)
-        if not user_id:
-            user_id = self.add_user(username, game_id, cycle)
-        
-        # 获取当前计数
-        current_count = self.get_user_latest_count(username, game_id, cycle)
-        
-        # 添加记录（支持批量添加）
-        records_added = []
-        total_new_count = current_count
-        
-        for i in range(count):
-            total_new_count += 1            # 获取当前日期
-            today = datetime.datetime.now().strftime("%m-%d")
+        with self.write_transaction(game_id) as cursor:
+            # 查找用户的最新周期
+            cursor.execute('''
+                SELECT id, cycle, is_completed FROM users 
+                WHERE name = ? AND game_id = ? 
+                ORDER BY cycle DESC LIMIT 1
+            ''', (username, game_id))
             
-            # 添加记录
-            self.add_record(user_id, today, total_new_count)
-            records_added.append(f"{today}_{total_new_count}")
+            result = cursor.fetchone()
             
-            # 检查是否达到完成次数
-            if total_new_count >= self.config.completion_count:
-                self.complete_user_cycle(username, game_id, cycle)
-                break
-        
-        # 生成结果消息
-        if count == 1:
-            # 单次记录的简洁消息
-            if total_new_count >= self.config.completion_count:
-                result_msg = f"✅ 已更新 {username} 的记录: {records_added[-1]} 🎉 恭喜完成{self.config.completion_count}次！"
+            if result and not result[2]:
+                user_id, cycle = result[0], result[1]
             else:
-                result_msg = f"✅ 已更新 {username} 的记录: {records_added[-1]}"
-        else:
-            # 批量记录的详细消息
+                # 新用户，或当前周期已完成时创建新周期
+                cycle = result[1] + 1 if result else 1
+                cursor.execute(
+                    'INSERT INTO users (name, game_id, cycle) VALUES (?, ?, ?)',
+                    (username, game_id, cycle)
+                )
+                user_id = cursor.lastrowid
+                created_user = True
+            
+            # 获取当前计数
+            cursor.execute(
+                'SELECT count FROM records WHERE user_id = ? ORDER BY id DESC LIMIT 1',
+                (user_id,)
+            )
+            result = cursor.fetchone()
+            current_count = result[0] if result else 0
+            
+            # 添加记录（支持批量添加）
+            today = datetime.datetime.now().strftime("%m-%d")
+            new_counts = self._next_counts(current_count, count)
+            new_records = [(user_id, today, new_count) for new_count in new_counts]
+            records_added = [f"{today}_{new_count}" for new_count in new_counts]
+            total_new_count = new_counts[-1] if new_counts else current_count
+            
+            cursor.executemany(
+                'INSERT INTO records (user_id, record_date, count) VALUES (?, ?, ?)',
+                new_records
+            )
             if total_new_count >= self.config.completion_count:
-                result_msg = f"✅ 已为 {username} 添加 {len(records_added)} 条记录\n"
-                result_msg += f"记录: {', '.join(records_added)}\n"
-                result_msg += f"🎉 恭喜完成{self.config.completion_count}次！"
-            else:
-                result_msg = f"✅ 已为 {username} 添加 {len(records_added)} 条记录\n"
-                result_msg += f"记录: {', '.join(records_added)}\n"
-                result_msg += f"当前进度: {total_new_count}/{self.config.completion_count}"
+                cursor.execute('UPDATE users SET is_completed = TRUE WHERE id = ?', (user_id,))
+            self._bump_data_version(cursor, game_id)
         
-        return result_msg
+        if created_user:
+            self.name_index.add(game_id, username)
+        
+        # 生成结果消息
+        return self._format_record_result(username, count, records_added, total_new_count)
     
     def get_user_latest_records(self, username: str, game_id: int, limit: int = 3, cycle: int = 1) -> List[Tuple[str, int]]:
         """获取用户最新的N条记录"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.connect(game_id)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -342,82 +1100,72 @@ class DatabaseManager:
         ''', (username, game_id, cycle, limit))
         
         result = cursor.fetchall()
+        if not result:
+            # 已归档的周期
+            user_id = self.get_user_id(username, game_id, cycle)
+            if user_id:
+                result = self._read_archived_cycle(cursor, user_id)[-limit:][::-1]
         conn.close()
         # 反转结果，使其按时间正序排列
         return result[::-1]
 
-    def get_user_summary(self, username: str, game_name: str, limit: int = 3) -> Dict[str, Any]:
-        """获取用户在指定游戏中的摘要信息"""
-        game_id = self.get_game_id(game_name)
-        if not game_id:
-            return {"error": f"游戏 '{game_name}' 不存在"}
-        
-        # 获取用户的最新记录
-        latest_records = self.get_user_latest_records(username, game_id, limit)
-        
-        if not latest_records:
-            return {
-                "username": username,
-                "game_name": game_name,
-                "total_count": 0,
-                "latest_records": [],
-                "has_records": False
-            }
-        
-        # 获取用户的总记录数
-        all_records = self.get_user_records(username, game_id)
-        total_count = len(all_records)
-        current_count = all_records[-1][1] if all_records else 0
-        
-        return {
-            "username": username,
-            "game_name": game_name,
-            "total_count": total_count,
-            "current_count": current_count,
-            "latest_records": latest_records,
-            "has_records": True,
-            "completion_progress": f"{current_count}/{self.config.completion_count}"
-        }
-    
+    def get_user_overview(self, username: str) -> List[GameProgress]:
+        """一次查询用户在所有游戏中最新周期的进度（分库模式下每个数据库文件查询一次）"""
+        rows = []
+        for db_path in self.all_db_paths():
+            conn = sqlite3.connect(db_path)
+            cursor = conn.cursor()
+            # 用户名 + 游戏 + 周期走 UNIQUE(name, game_id, cycle) 索引，最后一条记录走 idx_records_user，
+            # 查询代价只与该用户参与的游戏数有关
+            cursor.execute('''
+                SELECT u.game_id, (SELECT name FROM games WHERE id = u.game_id),
+                       u.cycle, u.is_completed, r.record_date, r.count, a.data
+                FROM users u
+                LEFT JOIN records r ON r.id = (SELECT MAX(id) FROM records WHERE user_id = u.id)
+                LEFT JOIN archived_records a ON a.user_id = u.id AND r.id IS NULL
+                WHERE u.name = ?
+                  AND u.cycle = (SELECT MAX(cycle) FROM users WHERE name = u.name AND game_id = u.game_id)
+            ''', (username,))
+            rows.extend(cursor.fetchall())
+            conn.close()
+
+        # 分库中没有游戏目录，游戏名从主数据库补充
+        shard_names: Dict[int, str] = {}
+        if any(row[1] is None for row in rows):
+            conn = sqlite3.connect(self.db_path)
+            shard_names = dict(conn.execute('SELECT id, name FROM games WHERE shard IS NOT NULL').fetchall())
+            conn.close()
+
+        overview = []
+        for game_id, game_name, cycle, is_completed, record_date, count, archived in rows:
+            if record_date is None and archived is not None:
+                # 已归档的周期取归档数据的最后一条记录
+                record_date, count = unpack_cycle_records(archived)[-1]
+            overview.append(GameProgress(
+                game_name or shard_names.get(game_id, str(game_id)), cycle, count or 0,
+                bool(is_completed), record_date
+            ))
+        return sorted(overview)
+
     def get_game_records_count(self, game_name: str) -> int:
         """获取指定游戏的总记录数"""
         game_id = self.get_game_id(game_name)
         if not game_id:
             return 0
             
-        conn = sqlite3.connect(self.db_path)
+        conn = self.connect(game_id)
         cursor = conn.cursor()
         
         cursor.execute('''
-            SELECT COUNT(*) FROM records r
-            JOIN users u ON r.user_id = u.id
-            WHERE u.game_id = ?
-        ''', (game_id,))
+            SELECT
+                (SELECT COUNT(*) FROM records r
+                 JOIN users u ON r.user_id = u.id
+                 WHERE u.game_id = ?)
+              + (SELECT COALESCE(SUM(a.record_count), 0) FROM archived_records a
+                 JOIN users u ON a.user_id = u.id
+                 WHERE u.game_id = ?)
+        ''', (game_id, game_id))
         
         result = cursor.fetchone()
         conn.close()
         return result[0] if result else 0
-
-    def import_from_excel_data_with_comparison(self, game_name: str, excel_data: List[List[str]]) -> Dict[str, Any]:
-        """从Excel数据导入到数据库，并返回对比结果"""
-        # 获取导入前的记录数
-        records_before = self.get_game_records_count(game_name)
-        is_existing_game = self.get_game_id(game_name) is not None
-        
-        # 执行导入
-        imported_count = self.import_from_excel_data(game_name, excel_data)
-        
-        # 获取导入后的记录数
-        records_after = self.get_game_records_count(game_name)
-        
-        # 计算新增记录数
-        new_records = records_after - records_before
-        
-        return {
-            "imported_count": imported_count,
-            "records_before": records_before,
-            "records_after": records_after,
-            "new_records": new_records,
-            "is_existing_game": is_existing_game,
-            "game_name": game_name
-        }
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import csv
+import os
+import posixpath
+import threading
+import time
+import zipfile
+from typing import Dict, List, Optional, Sequence, Tuple
+from xml.etree import ElementTree
+
+from .csv_io import CSV_DELIMITERS, CSV_ENCODING, csv_format_of
+
+# xlsx 中的XML命名空间
+_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+# 目录修改时间距扫描时间小于该值时，同一时间粒度内的后续修改可能不改变目录修改时间，下次仍重新扫描
+_RACY_WINDOW_NS = 2_000_000_000
+
+
+def read_xlsx_sheets(path: str, skip_sheets: Sequence[str] = ()) -> List[Tuple[str, int]]:
+    """直接读取xlsx压缩包中的XML，返回 [(sheet名, 行数)]，不加载工作簿"""
+    with zipfile.ZipFile(path) as archive:
+        workbook = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+        rels = ElementTree.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+        targets = {rel.get("Id"): rel.get("Target") for rel in rels.iter(f"{_PKG_REL_NS}Relationship")}
+
+        sheets = []
+        for sheet in workbook.iter(f"{_MAIN_NS}sheet"):
+            name = sheet.get("name")
+            target = targets.get(sheet.get(f"{_REL_NS}id"))
+            if name in skip_sheets or not target:
+                continue
+            # 关系中的路径可以是绝对路径（/xl/...）或相对于 xl/ 的路径
+            member = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+            sheets.append((name, _count_sheet_rows(archive, member)))
+        return sheets
+
+
+def _count_sheet_rows(archive: zipfile.ZipFile, member: str) -> int:
+    """统计sheet的行数：优先使用 dimension，没有时（如只写模式导出的文件）流式计数 row 元素"""
+    rows = 0
+    with archive.open(member) as stream:
+        for event, element in ElementTree.iterparse(stream, events=("end",)):
+            if element.tag == f"{_MAIN_NS}dimension":
+                ref = element.get("ref", "")
+                last = ref.split(":")[-1].lstrip("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+                if last.isdigit() and ref != "A1":
+                    return int(last)
+            elif element.tag == f"{_MAIN_NS}row":
+                rows += 1
+                element.clear()
+    return rows
+
+
+def count_csv_rows(path: str, fmt: str) -> int:
+    """统计CSV/TSV中A列非空的行数（与导入时跳过空行的规则一致）"""
+    with open(path, "r", encoding=CSV_ENCODING, newline="") as stream:
+        return sum(1 for row in csv.reader(stream, delimiter=CSV_DELIMITERS[fmt]) if row and row[0].strip())
+
+
+class CatalogEntry:
+    """目录中一个可导入文件的信息，sheet信息在首次需要时读取并缓存"""
+
+    __slots__ = ("path", "name", "size", "mtime", "sheets", "error")
+
+    def __init__(self, path: str, name: str, size: int, mtime: float):
+        self.path = path
+        self.name = name
+        self.size = size
+        self.mtime = mtime
+        # [(sheet名, 行数)]，CSV/TSV 只有一个 sheet名为 None 的条目
+        self.sheets: Optional[List[Tuple[Optional[str], int]]] = None
+        self.error: Optional[str] = None
+
+
+class ExcelCatalog:
+    """Excel目录的内存索引：目录修改时间不变时不重新扫描，按文件名精确/去扩展名查找不遍历文件"""
+
+    def __init__(self, folder: str, extensions: Sequence[str], skip_sheets: Sequence[str] = (),
+                 debug_mode: bool = False):
+        self.folder = folder
+        self.extensions = list(extensions)
+        self.skip_sheets = tuple(skip_sheets)
+        self.debug_mode = debug_mode
+        # 文件名 -> 文件信息
+        self._entries: Dict[str, CatalogEntry] = {}
+        # 按文件名排序的文件名列表（用于部分匹配和列表显示）
+        self._names: List[str] = []
+        self._dir_mtime: Optional[int] = None
+        self._racy = False
+        self._lock = threading.Lock()
+        self.scans = 0
+
+    def refresh(self, force: bool = False) -> bool:
+        """目录修改时间变化时重新扫描，返回是否重新扫描"""
+        with self._lock:
+            try:
+                dir_mtime = os.stat(self.folder).st_mtime_ns
+            except FileNotFoundError:
+                self._entries, self._names, self._dir_mtime = {}, [], None
+                return False
+            if not force and not self._racy and dir_mtime == self._dir_mtime:
+                return False
+
+            self._scan()
+            self._dir_mtime = dir_mtime
+            self._racy = time.time_ns() - dir_mtime < _RACY_WINDOW_NS
+            return True
+
+    def _scan(self):
+        """扫描目录，大小和修改时间都未变化的文件沿用已缓存的信息"""
+        self.scans += 1
+        entries = {}
+        with os.scandir(self.folder) as items:
+            for item in items:
+                name = item.name
+                # 过滤掉临时文件（以~$开头的文件）
+                if name.startswith("~$") or os.path.splitext(name)[1].lower().lstrip(".") not in self.extensions:
+                    continue
+                if not item.is_file():
+                    continue
+                stat = item.stat()
+                cached = self._entries.get(name)
+                if cached is not None and cached.size == stat.st_size and cached.mtime == stat.st_mtime:
+                    entries[name] = cached
+                else:
+                    entries[name] = CatalogEntry(item.path, name, stat.st_size, stat.st_mtime)
+        self._entries = entries
+        self._names = sorted(entries)
+
+        if self.debug_mode:
+            print(f"Excel目录已重新扫描: {len(entries)} 个文件")
+
+    def paths(self) -> List[str]:
+        """所有可导入文件的路径（按文件名排序）"""
+        self.refresh()
+        with self._lock:
+            return [self._entries[name].path for name in self._names]
+
+    def find(self, filename: str) -> Optional[str]:
+        """按文件名查找：精确匹配 > 补全扩展名 > 文件名部分匹配"""
+        self.refresh()
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry is None:
+                for ext in self.extensions:
+                    entry = self._entries.get(f"{filename}.{ext}")
+                    if entry is not None:
+                        break
+            if entry is None:
+                name = next((name for name in self._names if filename in name), None)
+                entry = self._entries[name] if name else None
+            return entry.path if entry else None
+
+    def entries(self) -> List[CatalogEntry]:
+        """所有文件的信息（含sheet名和行数，每个文件版本只读取一次）"""
+        self.refresh()
+        with self._lock:
+            entries = [self._entries[name] for name in self._names]
+            for entry in entries:
+                if entry.sheets is None and entry.error is None:
+                    self._load_sheets(entry)
+            return entries
+
+    def _load_sheets(self, entry: CatalogEntry):
+        try:
+            fmt = csv_format_of(entry.name)
+            if fmt is None:
+                entry.sheets = read_xlsx_sheets(entry.path, self.skip_sheets)
+            else:
+                entry.sheets = [(None, count_csv_rows(entry.path, fmt))]
+        except Exception as e:
+            entry.error = str(e)
+            if self.debug_mode:
+                print(f"读取文件信息失败: {entry.path}, 错误: {e}")
@@ -1,155 +1,212 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import io
 import os
-import sqlite3
-from openpyxl import Workbook
-from openpyxl.styles import PatternFill, Alignment, Font
-from typing import List, Tuple, Optional, Dict
+import re
+import zipfile
+from typing import IO, Iterator, List, Tuple, Optional, Dict, TYPE_CHECKING
 from datetime import datetime
 from .config import Config
-from .database import DatabaseManager
+from .record_model import CycleRecords
+from .storage import StorageBackend, StorageSnapshot
+from .export_retention import ExportRetentionManager, ALL_GAMES_KEY
+from .csv_io import CSV_ENCODING, write_csv_rows
+
+if TYPE_CHECKING:
+    from openpyxl import Workbook
+
+# 合并导出文件中保存 sheet名 -> 游戏名 映射的隐藏sheet
+SHEET_GAME_MAP_TITLE = "_game_map"
+
+# 导出文件使用的命名样式：用户名列（黄色）、记录、已完成周期的记录（蓝色）
+NAME_STYLE = "record_name"
+RECORD_STYLE = "record_value"
+COMPLETED_STYLE = "record_completed"
+
+# 打包导出（每个游戏一个xlsx的zip压缩包）在导出目录索引中使用的键
+BUNDLE_KEY = f"{ALL_GAMES_KEY}_bundle"
 
 class ExcelExporter:
     """Excel文件导出工具"""
     
-    def __init__(self):
-        self.config = Config()
-        self.db_manager = DatabaseManager()
-          # 定义样式
+    def __init__(self, db_manager: StorageBackend, config: Optional[Config] = None):
+        self.config = config or db_manager.config
+        self.db_manager = db_manager
+        self.export_folder = os.path.join(self.config.excel_folder, "exports")
+        self.retention = ExportRetentionManager(
+            self.export_folder,
+            max_total_bytes=int(self.config.export_max_total_mb * 1024 * 1024),
+            max_age_seconds=self.config.export_max_age_days * 86400,
+            keep_per_game=self.config.export_keep_per_game,
+            debug_mode=self.config.debug_mode,
+        )
+        self._styles_loaded = False
+    
+    def _load_styles(self):
+        """首次导出时延迟导入openpyxl并定义样式"""
+        if self._styles_loaded:
+            return
+        from openpyxl.styles import PatternFill, Alignment, Font
+        
+        # 定义样式
         self.blue_fill = PatternFill(start_color="ADD8E6", end_color="ADD8E6", fill_type="solid")
         self.header_fill = PatternFill(start_color="D3D3D3", end_color="D3D3D3", fill_type="solid")
         self.yellow_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")  # 黄色填充
         self.center_alignment = Alignment(horizontal='center', vertical='center')
         self.bold_font = Font(bold=True)
+        self._styles_loaded = True
     
-    def get_game_data(self, game_name: str) -> Optional[Dict]:
-        """获取游戏的完整数据"""
-        conn = sqlite3.connect(self.db_manager.db_path)
-        cursor = conn.cursor()
-        
+    def _new_workbook(self) -> 'Workbook':
+        """创建新的只写工作簿并注册命名样式（延迟导入openpyxl）
+        
+        只写模式逐行流式写出，单元格只引用共享的命名样式，不再逐个单元格设置填充和对齐。
+        """
+        from openpyxl import Workbook
+        from openpyxl.styles import NamedStyle
+        
+        self._load_styles()
+        wb = Workbook(write_only=True)
+        # 命名样式绑定到工作簿，每个工作簿使用独立的实例
+        wb.add_named_style(NamedStyle(NAME_STYLE, fill=self.yellow_fill, alignment=self.center_alignment))
+        wb.add_named_style(NamedStyle(RECORD_STYLE, alignment=self.center_alignment))
+        wb.add_named_style(NamedStyle(COMPLETED_STYLE, fill=self.blue_fill, alignment=self.center_alignment))
+        return wb
+    
+    def get_game_data(self, game_name: str, snapshot: Optional[StorageSnapshot] = None) -> Optional[Dict]:
+        """获取游戏的完整数据（在只读快照上读取，不阻塞写入）"""
         # 获取游戏ID
-        cursor.execute('SELECT id FROM games WHERE name = ?', (game_name,))
-        game_result = cursor.fetchone()
-        if not game_result:
-            conn.close()
+        game_id = self.db_manager.get_game_id(game_name)
+        if not game_id:
             return None
         
-        game_id = game_result[0]
-        
-        # 获取所有用户及其记录
-        cursor.execute('''
-            SELECT u.id, u.name, u.cycle, u.is_completed
-            FROM users u
-            WHERE u.game_id = ?
-            ORDER BY u.name, u.cycle
-        ''', (game_id,))
-        
-        users = cursor.fetchall()
-        
-        # 获取每个用户的记录
-        user_data = []
-        for user_id, user_name, cycle, is_completed in users:
-            cursor.execute('''
-                SELECT record_date, count
-                FROM records
-                WHERE user_id = ?
-                ORDER BY id
-            ''', (user_id,))
-            
-            records = cursor.fetchall()
-            user_data.append({
-                'id': user_id,
-                'name': user_name,
-                'cycle': cycle,
-                'is_completed': bool(is_completed),
-                'records': records
-            })
+        if snapshot is None:
+            with self.db_manager.snapshot() as snapshot:
+                return self.get_game_data(game_name, snapshot)
         
-        conn.close()
+        # 获取所有用户周期及其记录（按用户名、周期排序，记录以紧凑数组保存）
+        user_data = [
+            CycleRecords(user.id, user.name, user.cycle, user.is_completed, snapshot.cycle_records(game_id, user.id))
+            for user in snapshot.iter_cycles(game_id)
+        ]
         
         return {
             'game_name': game_name,
             'game_id': game_id,
-            'users': user_data        }
+            'users': user_data
+        }
     
-    def create_excel_file(self, game_data: Dict) -> str:
-        """根据游戏数据创建Excel文件"""
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "代肝记录"
-        
-        game_name = game_data['game_name']
-        users = game_data['users']
-        
-        if not users:
-            # 如果没有用户数据，创建空表格
-            # 不设置表头，直接设置行高
-            ws.row_dimensions[1].height = self.config.row_height
-        else:
-            # 组织数据：将同名用户的不同周期合并显示
-            organized_users = {}
-            for user in users:
-                base_name = user['name']
-                cycle = user['cycle']
-                
-                if base_name not in organized_users:
-                    organized_users[base_name] = []
-                
-                organized_users[base_name].append(user)
+    def iter_game_cycles(self, game_name: str) -> Optional[Iterator[CycleRecords]]:
+        """流式读取游戏数据，逐个返回用户周期"""
+        game_id = self.db_manager.get_game_id(game_name)
+        if not game_id:
+            return None
+        
+        def _iter():
+            # 在只读快照上逐个读取，导出过程中的新记录不会混入
+            with self.db_manager.snapshot() as snapshot:
+                for user in snapshot.iter_cycles(game_id):
+                    yield CycleRecords(user.id, user.name, user.cycle, user.is_completed,
+                                       snapshot.cycle_records(game_id, user.id))
+        
+        return _iter()
+    
+    @staticmethod
+    def _csv_row(user: CycleRecords) -> List[str]:
+        """用户周期在CSV/TSV中的一行：显示名 + 每条记录"""
+        return [user.display_name] + [f"{record_date}_{count}" for record_date, count in user.records()]
+    
+    def _write_game_csv(self, stream: IO[str], game_name: str, fmt: str) -> Optional[Dict[str, int]]:
+        """将游戏数据逐行写入CSV/TSV，返回统计信息"""
+        cycles = self.iter_game_cycles(game_name)
+        if cycles is None:
+            return None
+        
+        stats = {'users': 0, 'records': 0, 'completed': 0}
+        
+        def rows():
+            for user in cycles:
+                stats['users'] += 1
+                stats['records'] += len(user)
+                stats['completed'] += int(user.is_completed)
+                yield self._csv_row(user)
+        
+        write_csv_rows(stream, rows(), fmt)
+        return stats
+    
+    def _format_csv_export_result(self, game_name: str, stats: Dict[str, int], filename: str) -> str:
+        """生成CSV/TSV导出的结果消息"""
+        return f"✅ 导出成功!\n游戏: {game_name}\n用户数: {stats['users']}\n记录数: {stats['records']}\n完成用户: {stats['completed']}\n文件: {filename}"
+    
+    def export_game_to_csv(self, game_name: str, fmt: str = "csv") -> str:
+        """以流式方式导出指定游戏的数据到CSV/TSV文件"""
+        try:
+            os.makedirs(self.export_folder, exist_ok=True)
+            filename = self.make_export_filename(game_name, fmt)
+            file_path = os.path.join(self.export_folder, filename)
             
-            # 写入数据
-            current_row = 1
+            with open(file_path, 'w', encoding=CSV_ENCODING, newline='') as stream:
+                stats = self._write_game_csv(stream, game_name, fmt)
             
-            for base_name, user_cycles in organized_users.items():
-                # 按周期排序
-                user_cycles.sort(key=lambda x: x['cycle'])
-                
-                for user in user_cycles:
-                    cycle = user['cycle']
-                    is_completed = user['is_completed']
-                    records = user['records']
-                    
-                    # 确定用户名显示格式
-                    if cycle == 1:
-                        display_name = base_name
-                    else:
-                        display_name = f"{base_name}({cycle})"                    # 写入用户名
-                    ws.cell(row=current_row, column=1, value=display_name)
-                    ws.cell(row=current_row, column=1).alignment = self.center_alignment
-                    ws.cell(row=current_row, column=1).fill = self.yellow_fill  # A列用户名设置为黄色
-                    ws.row_dimensions[current_row].height = self.config.row_height
-                    
-                    # 写入记录
-                    col = 2
-                    for record_date, count in records:
-                        record_value = f"{record_date}_{count}"
-                        ws.cell(row=current_row, column=col, value=record_value)
-                        ws.cell(row=current_row, column=col).alignment = self.center_alignment
-                        col += 1
-                    
-                    # 如果周期已完成，设置记录列（除A列外）为蓝色背景
-                    if is_completed:
-                        for c in range(2, col):  # 从第2列开始，跳过A列用户名
-                            ws.cell(row=current_row, column=c).fill = self.blue_fill
-                    
-                    current_row += 1
-        
-        # 设置列宽
-        ws.column_dimensions['A'].width = self.config.name_column_width
+            if stats is None:
+                os.remove(file_path)
+                return f"❌ 未找到游戏: {game_name}"
+            
+            self.retention.register(file_path)
+            return self._format_csv_export_result(game_name, stats, filename)
+            
+        except Exception as e:
+            return f"❌ 导出失败: {str(e)}"
+    
+    def export_game_to_csv_buffer(self, game_name: str, fmt: str = "csv") -> Tuple[str, Optional[str], Optional[bytes]]:
+        """导出指定游戏的数据到内存中的CSV/TSV，返回 (结果消息, 文件名, 文件内容)"""
+        try:
+            stream = io.StringIO()
+            stats = self._write_game_csv(stream, game_name, fmt)
+            if stats is None:
+                return f"❌ 未找到游戏: {game_name}", None, None
+            
+            filename = self.make_export_filename(game_name, fmt)
+            data = stream.getvalue().encode(CSV_ENCODING)
+            return self._format_csv_export_result(game_name, stats, filename), filename, data
+            
+        except Exception as e:
+            return f"❌ 导出失败: {str(e)}", None, None
+    
+    def build_game_workbook(self, game_data: Dict) -> 'Workbook':
+        """根据游戏数据构建工作簿（不保存）"""
+        wb = self._new_workbook()
+        ws = wb.create_sheet(title="代肝记录")
+        self._fill_worksheet_data(ws, game_data)
+        return wb
+    
+    def create_excel_file(self, game_data: Dict) -> str:
+        """根据游戏数据创建Excel文件"""
+        wb = self.build_game_workbook(game_data)
         
         # 保存文件
-        export_folder = os.path.join(self.config.excel_folder, "exports")
-        os.makedirs(export_folder, exist_ok=True)
+        os.makedirs(self.export_folder, exist_ok=True)
         
         # 生成带时间戳的文件名
-        timestamp = datetime.now().strftime("%m-%d-%H%M")
-        filename = f"{game_name}_export_{timestamp}.xlsx"
-        file_path = os.path.join(export_folder, filename)
+        file_path = os.path.join(self.export_folder, self.make_export_filename(game_data['game_name']))
         
         wb.save(file_path)
+        self.retention.register(file_path)
         return file_path
     
+    def make_export_filename(self, game_name: str, ext: str = "xlsx") -> str:
+        """生成带时间戳的导出文件名"""
+        timestamp = datetime.now().strftime("%m-%d-%H%M")
+        return f"{game_name}_export_{timestamp}.{ext}"
+    
+    def _format_game_export_result(self, game_name: str, game_data: Dict, filename: str) -> str:
+        """生成单个游戏导出的结果消息"""
+        user_count = len(game_data['users'])
+        total_records = sum(len(user) for user in game_data['users'])
+        completed_users = sum(1 for user in game_data['users'] if user.is_completed)
+        
+        return f"✅ 导出成功!\n游戏: {game_name}\n用户数: {user_count}\n记录数: {total_records}\n完成用户: {completed_users}\n文件: {filename}"
+    
     def export_game_to_excel(self, game_name: str) -> str:
         """导出指定游戏的数据到Excel"""
         try:
@@ -161,55 +218,120 @@ class ExcelExporter:
             # 创建Excel文件
             file_path = self.create_excel_file(game_data)
             
-            # 统计信息
-            user_count = len(game_data['users'])
-            total_records = sum(len(user['records']) for user in game_data['users'])
-            completed_users = sum(1 for user in game_data['users'] if user['is_completed'])
-            
-            return f"✅ 导出成功!\n游戏: {game_name}\n用户数: {user_count}\n记录数: {total_records}\n完成用户: {completed_users}\n文件: {os.path.basename(file_path)}"
+            return self._format_game_export_result(game_name, game_data, os.path.basename(file_path))
             
         except Exception as e:
             return f"❌ 导出失败: {str(e)}"
     
-    def get_available_games(self) -> List[str]:
-        """获取可用的游戏列表"""
-        conn = sqlite3.connect(self.db_manager.db_path)
-        cursor = conn.cursor()
+    def export_game_to_buffer(self, game_name: str) -> Tuple[str, Optional[str], Optional[bytes]]:
+        """导出指定游戏的数据到内存，返回 (结果消息, 文件名, 文件内容)"""
+        try:
+            game_data = self.get_game_data(game_name)
+            if not game_data:
+                return f"❌ 未找到游戏: {game_name}", None, None
+            
+            wb = self.build_game_workbook(game_data)
+            filename = self.make_export_filename(game_name)
+            buffer = io.BytesIO()
+            wb.save(buffer)
+            
+            return self._format_game_export_result(game_name, game_data, filename), filename, buffer.getvalue()
+            
+        except Exception as e:
+            return f"❌ 导出失败: {str(e)}", None, None
+    
+    def get_game_delta(self, game_name: str) -> Optional[Dict]:
+        """读取自上次增量导出以来的新记录（按记录ID水位），结构与 get_game_data 相同"""
+        game_id = self.db_manager.get_game_id(game_name)
+        if not game_id:
+            return None
         
-        cursor.execute('SELECT name FROM games ORDER BY name')
-        games = cursor.fetchall()
-        conn.close()
+        since = self.db_manager.get_export_watermark(game_id)
+        with self.db_manager.snapshot() as snapshot:
+            users, record_count, last_record_id = snapshot.game_delta(game_id, since)
         
-        return [game[0] for game in games]
+        return {
+            'game_name': game_name,
+            'game_id': game_id,
+            'users': sorted(users, key=lambda user: (user.name, user.cycle)),
+            'record_count': record_count,
+            'since': since,
+            'last_record_id': last_record_id
+        }
     
-    def list_available_games(self) -> str:
-        """列出可用的游戏"""
-        games = self.get_available_games()
+    def _format_delta_export_result(self, game_name: str, delta: Dict, filename: str) -> str:
+        """生成增量导出的结果消息"""
+        completed_users = sum(1 for user in delta['users'] if user.is_completed)
+        scope = "全部记录（首次增量导出）" if delta['since'] == 0 else f"{delta['since'] + 1} - {delta['last_record_id']}"
         
-        if not games:
-            return "❌ 数据库中没有游戏数据"
+        return (f"✅ 增量导出成功!\n游戏: {game_name}\n记录范围: {scope}\n新增记录: {delta['record_count']}\n"
+                f"涉及用户: {len(delta['users'])}\n完成用户: {completed_users}\n文件: {filename}")
+    
+    def export_game_delta_to_buffer(self, game_name: str, fmt: str = "xlsx") -> Tuple[str, Optional[str], Optional[bytes], Optional[Dict]]:
+        """增量导出到内存，返回 (结果消息, 文件名, 文件内容, 增量数据)
         
-        game_list = []
-        for game_name in games:
-            # 获取统计信息
-            conn = sqlite3.connect(self.db_manager.db_path)
-            cursor = conn.cursor()
+        不会更新水位，调用方在文件保存或上传成功后调用 commit_delta_export
+        """
+        try:
+            delta = self.get_game_delta(game_name)
+            if not delta:
+                return f"❌ 未找到游戏: {game_name}", None, None, None
+            if not delta['users']:
+                return f"📭 {game_name} 自上次增量导出以来没有新记录", None, None, None
             
-            cursor.execute('''
-                SELECT COUNT(DISTINCT u.id) as user_count, COUNT(r.id) as record_count
-                FROM games g
-                LEFT JOIN users u ON g.id = u.game_id
-                LEFT JOIN records r ON u.id = r.user_id
-                WHERE g.name = ?
-            ''', (game_name,))
+            filename = self.make_export_filename(f"{game_name}_delta", fmt)
+            if fmt == "xlsx":
+                wb = self.build_game_workbook(delta)
+                buffer = io.BytesIO()
+                wb.save(buffer)
+                data = buffer.getvalue()
+            else:
+                stream = io.StringIO()
+                write_csv_rows(stream, map(self._csv_row, delta['users']), fmt)
+                data = stream.getvalue().encode(CSV_ENCODING)
             
-            result = cursor.fetchone()
-            user_count = result[0] if result[0] else 0
-            record_count = result[1] if result[1] else 0
+            return self._format_delta_export_result(game_name, delta, filename), filename, data, delta
             
-            conn.close()
+        except Exception as e:
+            return f"❌ 导出失败: {str(e)}", None, None, None
+    
+    def commit_delta_export(self, delta: Dict):
+        """增量导出文件交付后推进水位"""
+        self.db_manager.set_export_watermark(delta['game_id'], delta['last_record_id'])
+    
+    def export_game_delta(self, game_name: str, fmt: str = "xlsx") -> str:
+        """增量导出到导出目录，保存成功后推进水位"""
+        message, filename, data, delta = self.export_game_delta_to_buffer(game_name, fmt)
+        if data is None:
+            return message
+        
+        try:
+            os.makedirs(self.export_folder, exist_ok=True)
+            file_path = os.path.join(self.export_folder, filename)
+            with open(file_path, 'wb') as f:
+                f.write(data)
+            self.retention.register(file_path)
+            self.commit_delta_export(delta)
+            return message
             
-            game_list.append(f"• {game_name} ({user_count}用户, {record_count}记录)")
+        except Exception as e:
+            return f"❌ 导出失败: {str(e)}"
+    
+    def get_available_games(self) -> List[str]:
+        """获取可用的游戏列表"""
+        return sorted(game[0] for game in self.db_manager.get_games_list())
+    
+    def list_available_games(self) -> str:
+        """列出可用的游戏"""
+        game_list = []
+        with self.db_manager.snapshot() as snapshot:
+            for game_name, game_id in snapshot.games():
+                # 用户数按用户周期统计，记录数包含已归档的记录
+                stats = snapshot.game_stats(game_id)
+                game_list.append(f"• {game_name} ({stats['cycles']}用户, {stats['records']}记录)")
+        
+        if not game_list:
+            return "❌ 数据库中没有游戏数据"
         
         return f"📁 可导出的游戏:\n" + "\n".join(game_list)
     
@@ -231,6 +353,66 @@ class ExcelExporter:
         
         return f"📦 批量导出完成!\n成功: {success_count}/{len(games)}\n详情:\n" + "\n".join(results)
     
+    def build_all_games_workbook(self, games: List[str]) -> Tuple['Workbook', int, List[str]]:
+        """将所有游戏构建到一个工作簿的不同sheet中，返回 (工作簿, 成功数, 失败列表)"""
+        # 创建新的工作簿（只写模式没有默认sheet）
+        wb = self._new_workbook()
+        
+        success_count = 0
+        failed_games = []
+        sheet_game_map = []
+        # 所有游戏在同一个快照上读取，位于同一数据库文件的游戏数据相互一致
+        with self.db_manager.snapshot() as snapshot:
+            for game_name in games:
+                try:
+                    # 获取游戏数据
+                    game_data = self.get_game_data(game_name, snapshot)
+                    if not game_data:
+                        failed_games.append(f"{game_name}: 无数据")
+                        continue
+                    
+                    # 创建新的工作表，使用游戏名作为sheet名
+                    # 确保sheet名符合Excel规范（最多31字符，不能包含特殊字符）
+                    safe_sheet_name = self._make_safe_sheet_name(game_name)
+                    # 截断后重名时添加序号后缀，保持在31字符以内
+                    base_name, index = safe_sheet_name, 1
+                    while safe_sheet_name in wb.sheetnames or safe_sheet_name == SHEET_GAME_MAP_TITLE:
+                        suffix = f"_{index}"
+                        safe_sheet_name = base_name[:31 - len(suffix)] + suffix
+                        index += 1
+                    ws = wb.create_sheet(title=safe_sheet_name)
+                    
+                    # 填充数据
+                    self._fill_worksheet_data(ws, game_data)
+                    
+                    # 记录sheet名到游戏名的映射
+                    sheet_game_map.append((ws.title, game_name))
+                    success_count += 1
+                    
+                except Exception as e:
+                    failed_games.append(f"{game_name}: {str(e)}")
+        
+        # 写入隐藏的映射sheet，导入时据此将sheet还原为游戏
+        if sheet_game_map:
+            map_ws = wb.create_sheet(title=SHEET_GAME_MAP_TITLE)
+            for sheet_title, game_name in sheet_game_map:
+                map_ws.append([sheet_title, game_name])
+            map_ws.sheet_state = 'hidden'
+        
+        return wb, success_count, failed_games
+    
+    def _format_merged_export_result(self, total: int, success_count: int, failed_games: List[str], filename: str) -> str:
+        """生成合并导出的结果消息"""
+        result_lines = [f"📦 合并导出完成!"]
+        result_lines.append(f"成功: {success_count}/{total} 个游戏")
+        result_lines.append(f"文件: {filename}")
+        
+        if failed_games:
+            result_lines.append(f"失败的游戏:")
+            result_lines.extend([f"  • {fail}" for fail in failed_games])
+        
+        return "\n".join(result_lines)
+    
     def export_all_games_to_single_file(self) -> str:
         """将所有游戏导出到单个Excel文件的不同sheet中"""
         games = self.get_available_games()
@@ -238,51 +420,100 @@ class ExcelExporter:
         if not games:
             return "❌ 数据库中没有游戏数据"
         
-        # 创建新的工作簿
-        wb = Workbook()
-        # 删除默认的sheet
-        wb.remove(wb.active)
-        
-        success_count = 0
-        failed_games = []
-        
-        for game_name in games:
-            try:
-                # 获取游戏数据
-                game_data = self.get_game_data(game_name)
-                if not game_data:
-                    failed_games.append(f"{game_name}: 无数据")
-                    continue
-                
-                # 创建新的工作表，使用游戏名作为sheet名
-                # 确保sheet名符合Excel规范（最多31字符，不能包含特殊字符）
-                safe_sheet_name = self._make_safe_sheet_name(game_name)
-                ws = wb.create_sheet(title=safe_sheet_name)
-                
-                # 填充数据（复用create_excel_file的逻辑，但不保存文件）
-                self._fill_worksheet_data(ws, game_data)
-                
-                success_count += 1
-                
-            except Exception as e:
-                failed_games.append(f"{game_name}: {str(e)}")
+        wb, success_count, failed_games = self.build_all_games_workbook(games)
         
         if success_count == 0:
             return f"❌ 所有游戏导出失败:\n" + "\n".join(failed_games)
         
         # 保存合并文件
-        export_folder = os.path.join(self.config.excel_folder, "exports")
-        os.makedirs(export_folder, exist_ok=True)
+        os.makedirs(self.export_folder, exist_ok=True)
         
         # 生成带时间戳的文件名
-        timestamp = datetime.now().strftime("%m-%d-%H%M")
-        filename = f"all_games_export_{timestamp}.xlsx"
-        file_path = os.path.join(export_folder, filename)
+        filename = self.make_export_filename(ALL_GAMES_KEY)
+        file_path = os.path.join(self.export_folder, filename)
         
         wb.save(file_path)
+        self.retention.register(file_path)
         
-        result_lines = [f"📦 合并导出完成!"]
-        result_lines.append(f"成功: {success_count}/{len(games)} 个游戏")
+        return self._format_merged_export_result(len(games), success_count, failed_games, filename)
+    
+    def export_all_games_to_buffer(self) -> Tuple[str, Optional[str], Optional[bytes]]:
+        """将所有游戏合并导出到内存，返回 (结果消息, 文件名, 文件内容)"""
+        games = self.get_available_games()
+        
+        if not games:
+            return "❌ 数据库中没有游戏数据", None, None
+        
+        wb, success_count, failed_games = self.build_all_games_workbook(games)
+        
+        if success_count == 0:
+            return f"❌ 所有游戏导出失败:\n" + "\n".join(failed_games), None, None
+        
+        filename = self.make_export_filename(ALL_GAMES_KEY)
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        
+        return self._format_merged_export_result(len(games), success_count, failed_games, filename), filename, buffer.getvalue()
+    
+    def write_games_bundle(self, stream: IO[bytes], games: List[str]) -> Tuple[int, List[str]]:
+        """将每个游戏的工作簿依次写入zip压缩包，返回 (成功数, 失败列表)
+        
+        每个工作簿生成后直接保存到压缩包条目中，不在内存或导出目录中暂存
+        """
+        success_count = 0
+        failed_games = []
+        entry_names = set()
+        # xlsx 本身已经是压缩格式，条目直接存储，不重复压缩
+        with zipfile.ZipFile(stream, 'w', zipfile.ZIP_STORED, allowZip64=True) as bundle:
+            # 所有游戏在同一个快照上读取，与合并导出一致
+            with self.db_manager.snapshot() as snapshot:
+                for game_name in games:
+                    try:
+                        game_data = self.get_game_data(game_name, snapshot)
+                        if not game_data:
+                            failed_games.append(f"{game_name}: 无数据")
+                            continue
+                        
+                        # 游戏名中不能用于文件名的字符替换为下划线，重名时添加序号
+                        base_name = re.sub(r'[\\/:*?"<>|]', '_', game_name)
+                        entry_name, index = f"{base_name}.xlsx", 1
+                        while entry_name in entry_names:
+                            entry_name = f"{base_name}_{index}.xlsx"
+                            index += 1
+                        entry_names.add(entry_name)
+                        
+                        wb = self.build_game_workbook(game_data)
+                        with bundle.open(entry_name, 'w', force_zip64=True) as entry:
+                            wb.save(entry)
+                        success_count += 1
+                        
+                        if self.config.debug_mode:
+                            print(f"已写入压缩包: {entry_name}")
+                        
+                    except Exception as e:
+                        failed_games.append(f"{game_name}: {str(e)}")
+        
+        return success_count, failed_games
+    
+    def export_games_bundle_to_stream(self, stream: IO[bytes], filename: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        """将所有游戏的工作簿打包写入指定的二进制流，返回 (结果消息, 文件名)，失败时文件名为 None"""
+        filename = filename or self.make_export_filename(BUNDLE_KEY, "zip")
+        games = self.get_available_games()
+        
+        if not games:
+            return "❌ 数据库中没有游戏数据", None
+        
+        success_count, failed_games = self.write_games_bundle(stream, games)
+        
+        if success_count == 0:
+            return f"❌ 所有游戏导出失败:\n" + "\n".join(failed_games), None
+        
+        return self._format_bundle_export_result(len(games), success_count, failed_games, filename), filename
+    
+    def _format_bundle_export_result(self, total: int, success_count: int, failed_games: List[str], filename: str) -> str:
+        """生成打包导出的结果消息"""
+        result_lines = [f"📦 打包导出完成!"]
+        result_lines.append(f"成功: {success_count}/{total} 个游戏（每个游戏一个xlsx）")
         result_lines.append(f"文件: {filename}")
         
         if failed_games:
@@ -291,6 +522,26 @@ class ExcelExporter:
         
         return "\n".join(result_lines)
     
+    def export_games_bundle(self) -> str:
+        """将所有游戏分别导出为xlsx并打包为一个zip文件，直接流式写入导出目录"""
+        try:
+            os.makedirs(self.export_folder, exist_ok=True)
+            filename = self.make_export_filename(BUNDLE_KEY, "zip")
+            file_path = os.path.join(self.export_folder, filename)
+            
+            with open(file_path, 'wb') as stream:
+                result, filename = self.export_games_bundle_to_stream(stream, filename)
+            
+            if filename is None:
+                os.remove(file_path)
+                return result
+            
+            self.retention.register(file_path)
+            return result
+            
+        except Exception as e:
+            return f"❌ 打包导出失败: {str(e)}"
+    
     def _make_safe_sheet_name(self, name: str) -> str:
         """将游戏名转换为安全的Excel sheet名"""
         # Excel sheet名限制：最多31字符，不能包含 : \ / ? * [ ]
@@ -306,57 +557,32 @@ class ExcelExporter:
         return safe_name
     
     def _fill_worksheet_data(self, ws, game_data: Dict):
-        """填充工作表数据（从create_excel_file中提取的逻辑）"""
-        game_name = game_data['game_name']
-        users = game_data['users']
-        
-        if not users:
-            # 如果没有用户数据，创建空表格
-            # 不设置表头，直接设置行高
-            ws.row_dimensions[1].height = self.config.row_height
-        else:
-            # 组织数据：将同名用户的不同周期合并显示
-            organized_users = {}
-            for user in users:
-                base_name = user['name']
-                cycle = user['cycle']
-                
-                if base_name not in organized_users:
-                    organized_users[base_name] = {}
-                
-                organized_users[base_name][cycle] = {
-                    'is_completed': user['is_completed'],
-                    'records': user['records']                }
-            
-            # 不设置表头，从第1行开始显示用户数据
-            current_row = 1
-            
-            # 处理每个用户
-            for base_name, cycles in organized_users.items():
-                for cycle, cycle_data in sorted(cycles.items()):                    # 用户名列
-                    display_name = f"{base_name}({cycle})" if cycle > 1 else base_name
-                    ws.cell(row=current_row, column=1, value=display_name)
-                    ws.cell(row=current_row, column=1).alignment = self.center_alignment
-                    ws.cell(row=current_row, column=1).fill = self.yellow_fill  # A列用户名设置为黄色
-                    ws.row_dimensions[current_row].height = self.config.row_height
-                    
-                    is_completed = cycle_data['is_completed']
-                    records = cycle_data['records']
-                    
-                    # 添加记录数据
-                    col = 2
-                    for record_date, count in records:
-                        record_value = f"{record_date}_{count}"
-                        ws.cell(row=current_row, column=col, value=record_value)
-                        ws.cell(row=current_row, column=col).alignment = self.center_alignment
-                        col += 1
-                    
-                    # 如果周期已完成，设置记录列（除A列外）为蓝色背景
-                    if is_completed:
-                        for c in range(2, col):  # 从第2列开始，跳过A列用户名
-                            ws.cell(row=current_row, column=c).fill = self.blue_fill
-                    
-                    current_row += 1
+        """逐行写入工作表数据（只写工作表，需在写入行之前设置列宽和行高）
         
-        # 设置列宽
+        每个值使用新的只写单元格并引用命名样式，行生成器逐个产出，整行不会同时留在内存中。
+        """
+        from openpyxl.cell import WriteOnlyCell
+        
+        # 设置列宽和默认行高（所有行使用相同行高，不再逐行设置）
         ws.column_dimensions['A'].width = self.config.name_column_width
+        ws.sheet_format.defaultRowHeight = self.config.row_height
+        ws.sheet_format.customHeight = True
+        
+        def styled_cell(value, style: str):
+            cell = WriteOnlyCell(ws, value=value)
+            cell.style = style
+            return cell
+        
+        def row_cells(user: CycleRecords) -> Iterator:
+            # 用户名列（A列黄色）
+            yield styled_cell(user.display_name, NAME_STYLE)
+            
+            # 已完成周期的记录列使用蓝色背景
+            record_style = COMPLETED_STYLE if user.is_completed else RECORD_STYLE
+            for record_date, count in user.records():
+                yield styled_cell(f"{record_date}_{count}", record_style)
+        
+        # 不设置表头，从第1行开始显示用户数据
+        # 用户周期已按 (用户名, 周期) 排序，同名用户的不同周期相邻显示
+        for user in game_data['users']:
+            ws.append(row_cells(user))
@@ -1,161 +1,252 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import io
+import itertools
 import os
-import glob
-from openpyxl import load_workbook
-from typing import List, Optional
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
 from .config import Config
-from .database import DatabaseManager
+from .storage import StorageBackend
+from .csv_io import CSV_ENCODING, csv_format_of, iter_csv_rows
+from .excel_exporter import SHEET_GAME_MAP_TITLE
+from .excel_catalog import CatalogEntry, ExcelCatalog
+
+# 支持导入的文件扩展名
+IMPORT_EXTENSIONS = ['xlsx', 'csv', 'tsv']
+
+def read_sheet_rows(source: Union[str, bytes], sheet_name: str) -> List[List[str]]:
+    """读取指定sheet的所有行（每次调用独立打开工作簿，可并行执行）"""
+    from openpyxl import load_workbook
+    
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    wb = load_workbook(source, read_only=True)
+    try:
+        # 保留空行以便导入报告给出准确的行号
+        return [
+            [str(value) if value is not None else "" for value in row]
+            for row in wb[sheet_name].iter_rows(values_only=True)
+        ]
+    finally:
+        wb.close()
 
 class ExcelImporter:
     """Excel文件导入工具"""
     
-    def __init__(self):
-        self.config = Config()
-        self.db_manager = DatabaseManager()
+    def __init__(self, db_manager: StorageBackend, config: Optional[Config] = None):
+        self.config = config or db_manager.config
+        self.db_manager = db_manager
+        # 目标文件夹的文件索引，目录有变化时才重新扫描
+        self.catalog = ExcelCatalog(self.config.excel_folder, IMPORT_EXTENSIONS,
+                                    skip_sheets=[SHEET_GAME_MAP_TITLE], debug_mode=self.config.debug_mode)
     
     def get_excel_files(self) -> List[str]:
-        """获取目标文件夹中的所有xlsx文件"""
-        pattern = os.path.join(self.config.excel_folder, "*.xlsx")
-        excel_files = glob.glob(pattern)
-        # 过滤掉临时文件（以~$开头的文件）
-        excel_files = [f for f in excel_files if not os.path.basename(f).startswith('~$')]
-        return excel_files
+        """获取目标文件夹中的所有可导入文件（xlsx/csv/tsv）"""
+        return self.catalog.paths()
     
     def get_excel_file_by_name(self, filename: str) -> Optional[str]:
-        """根据文件名查找Excel文件"""
-        excel_files = self.get_excel_files()
-        
-        # 精确匹配
-        for filepath in excel_files:
-            if os.path.basename(filepath) == filename:
-                return filepath
-            # 不带扩展名的匹配
-            if os.path.basename(filepath) == f"{filename}.xlsx":
-                return filepath
-            # 文件名部分匹配
-            if filename in os.path.basename(filepath):
-                return filepath
+        """根据文件名查找Excel文件（精确匹配 > 不带扩展名匹配 > 文件名部分匹配）"""
+        return self.catalog.find(filename)
+    
+    def get_game_name(self, filename: str) -> str:
+        """从文件名提取游戏名（去掉扩展名）"""
+        name, ext = os.path.splitext(os.path.basename(filename))
+        if ext.lower().lstrip('.') in IMPORT_EXTENSIONS + ['xls']:
+            return name
+        return os.path.basename(filename)
+    
+    def iter_file_rows(self, source: Union[str, BinaryIO], filename: str, skip_blank: bool = True) -> Iterator[List[str]]:
+        """根据扩展名逐行读取xlsx或csv/tsv数据"""
+        fmt = csv_format_of(filename)
+        if fmt is None:
+            yield from self.iter_excel_rows(source, skip_blank)
+            return
         
-        return None
+        if isinstance(source, str):
+            with open(source, 'r', encoding=CSV_ENCODING, newline='') as stream:
+                yield from iter_csv_rows(stream, fmt, skip_blank)
+        else:
+            yield from iter_csv_rows(io.TextIOWrapper(source, encoding=CSV_ENCODING, newline=''), fmt, skip_blank)
     
-    def read_excel_data(self, file_path: str) -> List[List[str]]:
-        """读取Excel文件数据"""
+    def iter_excel_rows(self, source: Union[str, BinaryIO], skip_blank: bool = True) -> Iterator[List[str]]:
+        """以只读流式方式逐行读取Excel数据（source 可以是路径或文件对象）"""
+        # 延迟导入openpyxl，加快插件启动
+        from openpyxl import load_workbook
+        
+        wb = load_workbook(source, read_only=True)
         try:
-            wb = load_workbook(file_path)
             ws = wb.active
             
             if ws is None:
-                raise ValueError("Excel文件格式错误")            
-            data = []
-            for row in range(1, ws.max_row + 1):
-                row_data = []
-                for col in range(1, ws.max_column + 1):
-                    cell_value = ws.cell(row=row, column=col).value
-                    if cell_value is not None:
-                        row_data.append(str(cell_value))
-                    else:
-                        row_data.append("")
-                # 只添加非空行（至少A列有数据）
-                if row_data and row_data[0].strip():
-                    data.append(row_data)
-            
-            return data
+                raise ValueError("Excel文件格式错误")
             
+            for row in ws.iter_rows(values_only=True):
+                row_data = [str(value) if value is not None else "" for value in row]
+                # 保留空行以便导入报告给出准确的行号，空行由导入管道跳过
+                if skip_blank and not (row_data and row_data[0].strip()):
+                    continue
+                yield row_data
+        finally:
+            wb.close()
+    
+    def read_sheet_names(self, source: Union[str, BinaryIO]) -> Tuple[List[str], Dict[str, str]]:
+        """读取工作簿的sheet列表和 sheet名 -> 游戏名 映射"""
+        from openpyxl import load_workbook
+        
+        wb = load_workbook(source, read_only=True)
+        try:
+            sheet_names = [name for name in wb.sheetnames if name != SHEET_GAME_MAP_TITLE]
+            sheet_game_map = {}
+            if SHEET_GAME_MAP_TITLE in wb.sheetnames:
+                for row in wb[SHEET_GAME_MAP_TITLE].iter_rows(values_only=True):
+                    if len(row) >= 2 and row[0] and row[1]:
+                        sheet_game_map[str(row[0])] = str(row[1])
+            return sheet_names, sheet_game_map
+        finally:
+            wb.close()
+    
+    def import_multi_sheet(self, source: Union[str, bytes], filename: str,
+                           sheet_names: List[str], sheet_game_map: Dict[str, str]) -> str:
+        """导入多sheet的合并导出文件：并行解析各sheet，逐个游戏以单独事务提交"""
+        # 没有映射的sheet（旧版导出文件）按sheet名作为游戏名
+        targets = [(sheet, sheet_game_map.get(sheet, sheet)) for sheet in sheet_names]
+        workers = self.config.import_workers or os.cpu_count() or 1
+        workers = max(1, min(workers, len(targets)))
+        
+        results = []
+        failed = []
+        
+        def commit(game_name: str, rows: List[List[str]]):
+            if not any(row and row[0].strip() for row in rows):
+                failed.append(f"{game_name}: 没有有效数据")
+                return
+            result = self.db_manager.import_from_excel_data_with_comparison(game_name, rows)
+            results.append(result)
+        
+        if workers == 1:
+            for sheet, game_name in targets:
+                try:
+                    commit(game_name, read_sheet_rows(source, sheet))
+                except Exception as e:
+                    failed.append(f"{game_name}: {str(e)}")
+        else:
+            # 并行解析sheet（每个线程独立打开工作簿），解析完成一个就提交一个游戏
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(read_sheet_rows, source, sheet): game_name
+                    for sheet, game_name in targets
+                }
+                for future in as_completed(futures):
+                    game_name = futures[future]
+                    try:
+                        commit(game_name, future.result())
+                    except Exception as e:
+                        failed.append(f"{game_name}: {str(e)}")
+        
+        if not results:
+            return f"❌ 导入失败: {filename}\n" + "\n".join(failed)
+        
+        message = f"✅ 成功导入合并文件: {filename}\n"
+        message += f"🎮 游戏: {len(results)}/{len(targets)}\n"
+        for result in sorted(results, key=lambda r: r['game_name']):
+            status = "更新" if result['is_existing_game'] else "新建"
+            message += f"  • {result['game_name']}（{status}）: 导入 {result['imported_count']} 条，新增 {result['new_records']} 条\n"
+            report = result['report']
+            if report.total_rejected:
+                message += f"    ⚠️ 拒绝 {report.total_rejected} 项，首个: "
+                first = report.rejected[0]
+                message += f"{first.coordinate} '{first.value}': {first.reason}\n"
+        if failed:
+            message += f"失败的游戏:\n" + "\n".join(f"  • {fail}" for fail in failed)
+        
+        return message.rstrip("\n")
+    
+    def read_excel_data(self, file_path: str) -> List[List[str]]:
+        """读取Excel文件数据"""
+        try:
+            return list(self.iter_file_rows(file_path, file_path))
         except Exception as e:
             raise ValueError(f"读取Excel文件失败: {str(e)}")
     
-    def import_excel_file(self, filename: str) -> str:
-        """导入Excel文件到数据库"""
-        # 查找文件
-        file_path = self.get_excel_file_by_name(filename)
-        if not file_path:
-            available_files = [os.path.basename(f) for f in self.get_excel_files()]
-            return f"❌ 未找到文件: {filename}\n可用文件: {', '.join(available_files)}"
+    def _format_import_result(self, filename: str, result: Dict[str, Any]) -> str:
+        """生成导入结果消息"""
+        message = f"✅ 成功导入文件: {filename}\n"
+        message += f"🎮 游戏: {result['game_name']}\n"
         
-        # 获取游戏名（从文件名提取）
-        game_name = os.path.basename(file_path)
-        if game_name.endswith('.xlsx'):
-            game_name = game_name[:-5]
+        if result['is_existing_game']:
+            message += f"📊 数据库对比结果:\n"
+            message += f"  • 导入前记录数: {result['records_before']}\n"
+            message += f"  • 导入后记录数: {result['records_after']}\n"
+            message += f"  • 新增记录数: {result['new_records']}\n"
+            message += f"  • 处理记录数: {result['imported_count']}"
+            
+            if result['new_records'] == 0:
+                message += f"\n💡 提示: 没有新增记录，可能数据已存在"
+            elif result['new_records'] != result['imported_count']:
+                message += f"\n💡 提示: 部分记录可能已存在或重复"
+        else:
+            message += f"📝 新建游戏，导入记录数: {result['imported_count']}"
         
+        message += f"\n{result['report'].format_summary()}"
+        return message
+    
+    def _import_rows(self, source: Union[str, BinaryIO], filename: str) -> str:
+        """流式读取文件并直接导入数据库"""
         try:
-            # 读取Excel数据
-            excel_data = self.read_excel_data(file_path)
+            if csv_format_of(filename) is None:
+                # 带 _game_map 的合并导出文件按sheet还原为多个游戏；没有映射的旧版合并导出需要开启
+                # IMPORT_SPLIT_SHEETS，否则与普通工作簿一样只读取活动sheet，游戏名取自文件名
+                sheet_names, sheet_game_map = self.read_sheet_names(source)
+                if sheet_game_map or (self.config.import_split_sheets and len(sheet_names) > 1):
+                    if not isinstance(source, str):
+                        source.seek(0)
+                        source = source.read()
+                    return self.import_multi_sheet(source, filename, sheet_names, sheet_game_map)
+                if not isinstance(source, str):
+                    source.seek(0)
             
-            if not excel_data:
+            rows = self.iter_file_rows(source, filename, skip_blank=False)
+            # 预读到第一个非空行以判断是否有有效数据
+            leading_rows = []
+            for row in rows:
+                leading_rows.append(row)
+                if row and row[0].strip():
+                    break
+            else:
                 return f"❌ 文件 {filename} 没有有效数据"
             
             # 使用对比导入功能
-            result = self.db_manager.import_from_excel_data_with_comparison(game_name, excel_data)
+            result = self.db_manager.import_from_excel_data_with_comparison(
+                self.get_game_name(filename), itertools.chain(leading_rows, rows)
+            )
             
-            # 构建返回消息
-            message = f"✅ 成功导入文件: {filename}\n"
-            message += f"🎮 游戏: {result['game_name']}\n"
-            
-            if result['is_existing_game']:
-                message += f"📊 数据库对比结果:\n"
-                message += f"  • 导入前记录数: {result['records_before']}\n"
-                message += f"  • 导入后记录数: {result['records_after']}\n"
-                message += f"  • 新增记录数: {result['new_records']}\n"
-                message += f"  • 处理记录数: {result['imported_count']}"
-                
-                if result['new_records'] == 0:
-                    message += f"\n💡 提示: 没有新增记录，可能数据已存在"
-                elif result['new_records'] != result['imported_count']:
-                    message += f"\n💡 提示: 部分记录可能已存在或重复"
-            else:
-                message += f"📝 新建游戏，导入记录数: {result['imported_count']}"
-            
-            return message
+            return self._format_import_result(filename, result)
             
         except Exception as e:
             return f"❌ 导入失败: {str(e)}"
     
+    def import_excel_file(self, filename: str) -> str:
+        """导入Excel文件到数据库"""
+        # 查找文件
+        file_path = self.get_excel_file_by_name(filename)
+        if not file_path:
+            available_files = [os.path.basename(f) for f in self.get_excel_files()]
+            return f"❌ 未找到文件: {filename}\n可用文件: {', '.join(available_files)}"
+        
+        return self._import_rows(file_path, os.path.basename(file_path))
+    
     def import_excel(self, file_path: str) -> str:
         """通用Excel导入方法，支持任意路径的Excel文件"""
         if not os.path.exists(file_path):
             return f"❌ 文件不存在: {file_path}"
         
-        # 获取游戏名（从文件名提取）
-        game_name = os.path.basename(file_path)
-        if game_name.endswith('.xlsx'):
-            game_name = game_name[:-5]
-        elif game_name.endswith('.xls'):
-            game_name = game_name[:-4]
-        
-        try:
-            # 读取Excel数据
-            excel_data = self.read_excel_data(file_path)
-            
-            if not excel_data:
-                return f"❌ 文件 {os.path.basename(file_path)} 没有有效数据"
-            
-            # 使用对比导入功能
-            result = self.db_manager.import_from_excel_data_with_comparison(game_name, excel_data)
-            
-            # 构建返回消息
-            message = f"✅ 成功导入文件: {os.path.basename(file_path)}\n"
-            message += f"🎮 游戏: {result['game_name']}\n"
-            
-            if result['is_existing_game']:
-                message += f"📊 数据库对比结果:\n"
-                message += f"  • 导入前记录数: {result['records_before']}\n"
-                message += f"  • 导入后记录数: {result['records_after']}\n"
-                message += f"  • 新增记录数: {result['new_records']}\n"
-                message += f"  • 处理记录数: {result['imported_count']}"
-                
-                if result['new_records'] == 0:
-                    message += f"\n💡 提示: 没有新增记录，可能数据已存在"
-                elif result['new_records'] != result['imported_count']:
-                    message += f"\n💡 提示: 部分记录可能已存在或重复"
-            else:
-                message += f"📝 新建游戏，导入记录数: {result['imported_count']}"
-            
-            return message
-            
-        except Exception as e:
-            return f"❌ 导入失败: {str(e)}"
+        return self._import_rows(file_path, os.path.basename(file_path))
+    
+    def import_excel_bytes(self, data: bytes, filename: str) -> str:
+        """从内存中的文件内容导入（用于聊天文件），读取结果直接流入事务导入"""
+        return self._import_rows(io.BytesIO(data), filename)
     
     def list_available_files(self) -> str:
         """列出可用的Excel文件"""
@@ -164,10 +255,17 @@ class ExcelImporter:
         if not excel_files:
             return f"❌ 在目录 {self.config.excel_folder} 中未找到Excel文件"
         
-        file_list = []
-        for filepath in excel_files:
-            filename = os.path.basename(filepath)
-            game_name = filename[:-5] if filename.endswith('.xlsx') else filename
-            file_list.append(f"• {filename} ({game_name})")
-        
+        file_list = [self._format_catalog_entry(entry) for entry in self.catalog.entries()]
         return f"📁 可用的Excel文件:\n" + "\n".join(file_list)
+    
+    def _format_catalog_entry(self, entry: CatalogEntry) -> str:
+        """文件列表中的一项：文件名、游戏名、大小、修改时间、sheet和行数"""
+        modified = datetime.fromtimestamp(entry.mtime).strftime("%m-%d %H:%M")
+        line = f"• {entry.name} ({self.get_game_name(entry.name)}) {entry.size / 1024:.1f}KB, {modified}"
+        if entry.error is not None:
+            return line + ", ⚠️ 无法读取"
+        if len(entry.sheets) == 1:
+            sheet_name, rows = entry.sheets[0]
+            return line + (f", {rows}行" if sheet_name is None else f", {sheet_name}({rows}行)")
+        sheets = ", ".join(f"{sheet_name}({rows}行)" for sheet_name, rows in entry.sheets)
+        return line + f"\n  {len(entry.sheets)}个sheet: {sheets}"
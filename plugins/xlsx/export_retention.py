@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+# 导出文件名格式: {游戏名}_export_MM-DD-HHMM.{扩展名}，合并导出为 all_games_export_*
+EXPORT_FILENAME_PATTERN = re.compile(r'^(?P<game>.+)_export_\d{2}-\d{2}-\d{4}\.(?P<ext>\w+)$')
+
+# 合并导出文件在索引中使用的键
+ALL_GAMES_KEY = "all_games"
+
+
+class ExportFileInfo:
+    """导出文件信息"""
+
+    __slots__ = ('path', 'game', 'ext', 'size', 'mtime', 'last_used')
+
+    def __init__(self, path: str, game: str, ext: str, size: int, mtime: float):
+        self.path = path
+        self.game = game
+        self.ext = ext
+        self.size = size
+        self.mtime = mtime
+        self.last_used = mtime
+
+
+class ExportRetentionManager:
+    """导出目录保留策略管理，维护导出文件的内存索引"""
+
+    def __init__(self, export_folder: str, max_total_bytes: int = 0,
+                 max_age_seconds: float = 0, keep_per_game: int = 0, debug_mode: bool = False):
+        self.export_folder = export_folder
+        self.max_total_bytes = max_total_bytes
+        self.max_age_seconds = max_age_seconds
+        self.keep_per_game = keep_per_game
+        self.debug_mode = debug_mode
+        self._files: Dict[str, ExportFileInfo] = {}
+        self._lock = threading.Lock()
+        self._scanned = False
+
+    def _scan(self):
+        """启动后首次使用时扫描一次导出目录"""
+        self._scanned = True
+        if not os.path.isdir(self.export_folder):
+            return
+        with os.scandir(self.export_folder) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    self._add(entry.path, entry.stat())
+
+    def _add(self, path: str, stat: os.stat_result) -> Optional[ExportFileInfo]:
+        match = EXPORT_FILENAME_PATTERN.match(os.path.basename(path))
+        if not match:
+            return None
+        info = ExportFileInfo(path, match.group('game'), match.group('ext').lower(),
+                              stat.st_size, stat.st_mtime)
+        self._files[path] = info
+        return info
+
+    def register(self, file_path: str):
+        """登记新生成的导出文件，并执行保留策略"""
+        with self._lock:
+            if not self._scanned:
+                self._scan()
+            info = self._add(file_path, os.stat(file_path))
+            if info is not None:
+                info.last_used = time.time()
+            self._enforce(protected=file_path)
+
+    def total_size(self) -> int:
+        """导出目录中索引文件的总大小"""
+        with self._lock:
+            if not self._scanned:
+                self._scan()
+            return sum(info.size for info in self._files.values())
+
+    def enforce(self) -> List[str]:
+        """执行保留策略，返回被删除的文件列表"""
+        with self._lock:
+            if not self._scanned:
+                self._scan()
+            return self._enforce()
+
+    def _enforce(self, protected: Optional[str] = None) -> List[str]:
+        evict: List[ExportFileInfo] = []
+        files = list(self._files.values())
+
+        # 超过最长保留时间
+        if self.max_age_seconds > 0:
+            cutoff = time.time() - self.max_age_seconds
+            evict.extend(info for info in files if info.mtime < cutoff)
+
+        # 每个游戏只保留最新的N个文件
+        if self.keep_per_game > 0:
+            by_game: Dict[str, List[ExportFileInfo]] = {}
+            for info in files:
+                by_game.setdefault(info.game, []).append(info)
+            for game_files in by_game.values():
+                game_files.sort(key=lambda info: info.mtime, reverse=True)
+                evict.extend(game_files[self.keep_per_game:])
+
+        removed = self._remove([info for info in evict if info.path != protected])
+
+        # 总大小超限时按最近最少使用顺序删除
+        if self.max_total_bytes > 0:
+            remaining = sorted(self._files.values(), key=lambda info: info.last_used)
+            total = sum(info.size for info in remaining)
+            lru_evict = []
+            for info in remaining:
+                if total <= self.max_total_bytes:
+                    break
+                if info.path == protected:
+                    continue
+                lru_evict.append(info)
+                total -= info.size
+            removed.extend(self._remove(lru_evict))
+
+        if removed and self.debug_mode:
+            print(f"导出目录清理完成，删除 {len(removed)} 个文件")
+        return removed
+
+    def _remove(self, infos: List[ExportFileInfo]) -> List[str]:
+        removed = []
+        for info in infos:
+            if info.path not in self._files:
+                continue
+            try:
+                os.remove(info.path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                if self.debug_mode:
+                    print(f"删除导出文件失败: {info.path}, 错误: {e}")
+                continue
+            del self._files[info.path]
+            removed.append(info.path)
+        return removed
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import base64
+import hashlib
+import io
+import os
+import uuid
+from typing import IO, Any, Dict, Union
+
+from nonebot.adapters.onebot.v11 import Bot, GroupMessageEvent, MessageEvent
+from .config import Config
+
+
+class FileUploader:
+    """通过OneBot API上传文件到聊天（群文件或私聊文件）"""
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.chunk_size = max(1, config.upload_chunk_size_kb) * 1024
+        self.stream_threshold = int(config.upload_stream_threshold_mb * 1024 * 1024)
+
+    @staticmethod
+    def size_of(data: Union[bytes, IO[bytes]]) -> int:
+        """文件内容的字节数（内存中的内容或可定位的二进制文件）"""
+        if isinstance(data, bytes):
+            return len(data)
+        return data.seek(0, os.SEEK_END)
+
+    def _sha256(self, stream: IO[bytes]) -> str:
+        """逐块计算文件的SHA-256，完成后回到文件开头"""
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: stream.read(self.chunk_size), b""):
+            digest.update(chunk)
+        stream.seek(0)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _read_base64(stream: IO[bytes], size: int = -1) -> str:
+        """读取（最多size字节）并编码为base64"""
+        return base64.b64encode(stream.read(size)).decode()
+
+    async def upload(self, bot: Bot, event: MessageEvent, data: Union[bytes, IO[bytes]], filename: str) -> str:
+        """上传内存中的文件内容或已打开的二进制文件，返回OneBot实现端使用的文件标识"""
+        stream = io.BytesIO(data) if isinstance(data, bytes) else data
+        size = self.size_of(stream)
+        stream.seek(0)
+
+        # 读取、哈希和base64编码都在线程中执行，避免大文件阻塞事件循环
+        if size > self.stream_threshold:
+            # 大文件分块流式上传到OneBot实现端，再以返回的路径发送
+            file = await self._upload_stream(bot, stream, size, filename)
+        else:
+            file = "base64://" + await asyncio.to_thread(self._read_base64, stream)
+
+        if isinstance(event, GroupMessageEvent):
+            await bot.call_api("upload_group_file", group_id=event.group_id, file=file, name=filename)
+        else:
+            await bot.call_api("upload_private_file", user_id=event.user_id, file=file, name=filename)
+
+        if self.config.debug_mode:
+            print(f"文件上传完成: {filename} ({size} bytes)")
+        return file
+
+    async def _upload_stream(self, bot: Bot, stream: IO[bytes], size: int, filename: str) -> str:
+        """使用 upload_file_stream 分块上传，返回实现端保存的文件路径（逐块读取，不整体载入内存）"""
+        stream_id = uuid.uuid4().hex
+        total_chunks = (size + self.chunk_size - 1) // self.chunk_size
+
+        sha256 = await asyncio.to_thread(self._sha256, stream)
+
+        for index in range(total_chunks):
+            chunk_data = await asyncio.to_thread(self._read_base64, stream, self.chunk_size)
+            await bot.call_api(
+                "upload_file_stream",
+                stream_id=stream_id,
+                chunk_data=chunk_data,
+                chunk_index=index,
+                total_chunks=total_chunks,
+                file_size=size,
+                expected_sha256=sha256,
+                filename=filename,
+            )
+
+        result: Dict[str, Any] = await bot.call_api("upload_file_stream", stream_id=stream_id, is_complete=True)
+        file_path = result.get("file_path") if isinstance(result, dict) else None
+        if not file_path:
+            raise RuntimeError(f"分块上传未返回文件路径: {result}")
+        return file_path
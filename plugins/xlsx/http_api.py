@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import secrets
+import time
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from nonebot import get_driver
+from nonebot.drivers import ASGIMixin
+
+from .config import Config
+from .storage import StorageBackend
+
+# 内存后端的数据版本在进程重启后从头计数，ETag 中带上启动标识，避免与重启前的版本混淆
+# （SQLite后端的版本保存在数据库中，重启后仍然有效）
+_EPOCH = format(int(time.time() * 1000), "x")
+
+
+def make_etag(*parts: Any) -> str:
+    """根据数据版本生成 ETag"""
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """请求的 If-None-Match 是否包含当前 ETag（弱比较）"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+
+def parse_cursor(cursor: Optional[str]) -> Tuple[int, int]:
+    """解析分页游标 "<用户周期ID>[:<序号>]"，返回 (用户周期ID, 已返回的记录序号)"""
+    if not cursor:
+        return 0, 0
+    user_id, _, seq = cursor.partition(":")
+    try:
+        return int(user_id), int(seq or 0)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"无效的分页游标: {cursor}")
+
+
+class RecordsApi:
+    """只读JSON接口：游戏列表、用户周期摘要、分页记录、游戏统计和NDJSON全量导出
+
+    所有响应带有由数据版本生成的 ETag，数据未变化时轮询请求直接返回 304。
+    分页使用键集游标（按用户周期ID和周期内序号），翻页代价与页码无关。
+    """
+
+    def __init__(self, db_manager: StorageBackend, config: Config):
+        self.db_manager = db_manager
+        self.config = config
+        self._etag_prefix: Tuple[str, ...] = () if db_manager.persistent else (_EPOCH,)
+        dependencies = [Depends(self._check_token)] if config.api_token else []
+        self.router = APIRouter(dependencies=dependencies)
+
+        # 同步函数由FastAPI在线程池中执行，读取数据库不阻塞事件循环
+        self.router.add_api_route("/games", self.list_games, methods=["GET"])
+        self.router.add_api_route("/games/{game_name}/stats", self.game_stats, methods=["GET"])
+        self.router.add_api_route("/games/{game_name}/users", self.list_users, methods=["GET"])
+        self.router.add_api_route("/games/{game_name}/records", self.list_records, methods=["GET"])
+        self.router.add_api_route("/games/{game_name}/dump.ndjson", self.dump_game, methods=["GET"])
+
+    def _check_token(self, request: Request):
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not secrets.compare_digest(token.strip(), self.config.api_token):
+            raise HTTPException(status_code=401, detail="未授权")
+
+    def _page_limit(self, limit: Optional[int]) -> int:
+        return min(limit or self.config.api_page_size, self.config.api_max_page_size)
+
+    def _game_id(self, game_name: str) -> int:
+        game_id = self.db_manager.get_game_id(game_name)
+        if not game_id:
+            raise HTTPException(status_code=404, detail=f"未找到游戏: {game_name}")
+        return game_id
+
+    def _etag(self, *parts: Any) -> str:
+        return make_etag(*self._etag_prefix, *parts)
+
+    @staticmethod
+    def _not_modified(etag: str) -> Response:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    @staticmethod
+    def _json(content: Dict[str, Any], etag: str) -> JSONResponse:
+        return JSONResponse(content, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    def list_games(self, request: Request) -> Response:
+        """所有游戏及其统计信息"""
+        # 先读取版本再读取数据：读取期间有新写入时，下次请求会拿到新的 ETag
+        etag = self._etag("games", self.db_manager.data_version())
+        if etag_matches(request, etag):
+            return self._not_modified(etag)
+
+        games = []
+        with self.db_manager.snapshot() as snapshot:
+            for game_name, game_id in snapshot.games():
+                games.append({"id": game_id, "name": game_name, **snapshot.game_stats(game_id)})
+        return self._json({"games": games}, etag)
+
+    def game_stats(self, request: Request, game_name: str) -> Response:
+        """单个游戏的统计信息"""
+        game_id = self._game_id(game_name)
+        etag = self._etag("stats", game_id, self.db_manager.data_version(game_id))
+        if etag_matches(request, etag):
+            return self._not_modified(etag)
+
+        with self.db_manager.snapshot() as snapshot:
+            stats = snapshot.game_stats(game_id)
+        return self._json({"id": game_id, "name": game_name, **stats}, etag)
+
+    def list_users(self, request: Request, game_name: str, after: Optional[str] = None,
+                   limit: Optional[int] = Query(None, ge=1), user: Optional[str] = None) -> Response:
+        """用户周期摘要（当前次数、进度、最后记录日期），按用户周期ID分页"""
+        game_id = self._game_id(game_name)
+        etag = self._etag("users", game_id, self.db_manager.data_version(game_id))
+        if etag_matches(request, etag):
+            return self._not_modified(etag)
+
+        after_id, _ = parse_cursor(after)
+        limit = self._page_limit(limit)
+
+        users = []
+        with self.db_manager.snapshot() as snapshot:
+            for cycle in snapshot.iter_cycles(game_id, order_by_name=False, start_id=after_id + 1, name=user):
+                # 多读取一个周期，用于判断是否还有下一页
+                if len(users) > limit:
+                    break
+                record_count, last_date, current_count = snapshot.cycle_summary(game_id, cycle.id)
+                users.append({
+                    "id": cycle.id,
+                    "name": cycle.name,
+                    "cycle": cycle.cycle,
+                    "is_completed": cycle.is_completed,
+                    "records": record_count,
+                    "current_count": current_count,
+                    "progress": f"{current_count}/{self.config.completion_count}",
+                    "last_record_date": last_date,
+                })
+
+        next_cursor = None
+        if len(users) > limit:
+            users = users[:limit]
+            next_cursor = str(users[-1]["id"])
+        return self._json({"users": users, "next": next_cursor}, etag)
+
+    def list_records(self, request: Request, game_name: str, after: Optional[str] = None,
+                     limit: Optional[int] = Query(None, ge=1), user: Optional[str] = None) -> Response:
+        """按 (用户周期ID, 周期内序号) 分页返回记录，已归档的周期透明展开"""
+        game_id = self._game_id(game_name)
+        etag = self._etag("records", game_id, self.db_manager.data_version(game_id))
+        if etag_matches(request, etag):
+            return self._not_modified(etag)
+
+        after_id, after_seq = parse_cursor(after)
+        limit = self._page_limit(limit)
+
+        records = []
+        next_cursor = None
+        with self.db_manager.snapshot() as snapshot:
+            for cycle in snapshot.iter_cycles(game_id, order_by_name=False, start_id=after_id, name=user):
+                cycle_records = snapshot.cycle_records(game_id, cycle.id)
+                start = after_seq if cycle.id == after_id else 0
+                for seq in range(start, len(cycle_records)):
+                    if len(records) == limit:
+                        # 本页已满且后面还有记录，游标指向本页最后一条
+                        last = records[-1]
+                        next_cursor = f"{last['user_id']}:{last['seq']}"
+                        break
+                    record_date, count = cycle_records[seq]
+                    records.append({
+                        "user_id": cycle.id,
+                        "name": cycle.name,
+                        "cycle": cycle.cycle,
+                        "seq": seq + 1,
+                        "date": record_date,
+                        "count": count,
+                    })
+                if next_cursor:
+                    break
+
+        return self._json({"records": records, "next": next_cursor}, etag)
+
+    def dump_game(self, request: Request, game_name: str) -> Response:
+        """以NDJSON流式返回游戏的全部数据，每行一个用户周期"""
+        game_id = self._game_id(game_name)
+        etag = self._etag("dump", game_id, self.db_manager.data_version(game_id))
+        if etag_matches(request, etag):
+            return self._not_modified(etag)
+
+        return StreamingResponse(
+            self._iter_dump(game_id),
+            media_type="application/x-ndjson",
+            headers={"ETag": etag, "Cache-Control": "no-cache"},
+        )
+
+    def _iter_dump(self, game_id: int) -> Iterator[str]:
+        # 流式响应在线程池中逐块生成，相邻两块可能在不同线程中读取
+        with self.db_manager.snapshot(check_same_thread=False) as snapshot:
+            for cycle in snapshot.iter_cycles(game_id, order_by_name=False):
+                records = snapshot.cycle_records(game_id, cycle.id)
+                yield json.dumps({
+                    "id": cycle.id,
+                    "name": cycle.name,
+                    "cycle": cycle.cycle,
+                    "is_completed": cycle.is_completed,
+                    "records": [[record_date, count] for record_date, count in records],
+                }, ensure_ascii=False) + "\n"
+
+
+def register_http_api(db_manager: StorageBackend, config: Config) -> bool:
+    """在FastAPI驱动上注册只读接口，当前驱动不是FastAPI时返回 False"""
+    driver = get_driver()
+    app = driver.server_app if isinstance(driver, ASGIMixin) else None
+    if not isinstance(app, FastAPI):
+        return False
+
+    app.include_router(RecordsApi(db_manager, config).router, prefix=config.api_prefix)
+    return True
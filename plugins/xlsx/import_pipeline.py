@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""流式导入管道：读取 -> 解析 -> 校验 -> 批量写入
+
+每个阶段都是生成器，逐行处理数据，内存占用与文件大小无关。
+写入阶段由存储后端（StorageBackend）实现，各导入入口（本地文件、聊天文件、合并文件）共用同一管道。
+"""
+
+import re
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+# 记录单元格格式：MM-DD_次数，后面可带 "(续)"、"完" 等标记
+RECORD_PATTERN = re.compile(r'^(?P<date>[^_\s]+)_(?P<count>\d+)(?P<suffix>.*)$')
+# 续接上一周期的标记，如 "5-13_30(续)"
+CONTINUED_PATTERN = re.compile(r'\(续\)')
+# 完成标记，如 "5-13_30完"
+COMPLETED_PATTERN = re.compile(r'完')
+# 允许的后缀：任意个括号备注或"完"
+SUFFIX_PATTERN = re.compile(r'^(?:\s*(?:\([^)]*\)|完))*\s*$')
+# 用户名中的周期标记，如 "用户名(2)"
+USERNAME_CYCLE_PATTERN = re.compile(r'^(?P<name>.+)\((?P<cycle>-?\d+)\)$')
+# 日期格式：M-D 或 MM-DD
+DATE_PATTERN = re.compile(r'^(?P<month>\d{1,2})-(?P<day>\d{1,2})$')
+
+# 视为空单元格的值
+EMPTY_VALUES = {'', '无', 'NaN', 'None'}
+
+
+class ParsedCell(NamedTuple):
+    """解析后的记录单元格"""
+    column: int
+    record_date: str
+    count: int
+    completed: bool
+    continued: bool
+
+
+class ParsedRow(NamedTuple):
+    """解析后的一行（一个用户周期）"""
+    row: int
+    username: str
+    cycle: int
+    cells: List[ParsedCell]
+
+
+class RejectedCell(NamedTuple):
+    """被拒绝的单元格"""
+    row: int
+    column: int
+    value: str
+    stage: str
+    reason: str
+
+    @property
+    def coordinate(self) -> str:
+        return f"{column_letter(self.column)}{self.row}"
+
+
+def column_letter(column: int) -> str:
+    """将列号转换为Excel列字母，如 1 -> A，28 -> AB"""
+    letters = ""
+    while column > 0:
+        column, remainder = divmod(column - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+class ImportReport:
+    """导入报告：各阶段计数和前N个被拒绝的单元格"""
+
+    def __init__(self, game_name: str = "", max_rejects: int = 10):
+        self.game_name = game_name
+        self.max_rejects = max_rejects
+        self.rows_read = 0
+        self.rows_skipped = 0
+        self.rows_parsed = 0
+        self.rows_rejected = 0
+        self.cells_read = 0
+        self.cells_parsed = 0
+        self.cells_rejected = 0
+        self.records_valid = 0
+        self.records_written = 0
+        self.users_created = 0
+        self.batches = 0
+        self.rejected: List[RejectedCell] = []
+
+    def reject(self, row: int, column: int, value: Any, stage: str, reason: str):
+        """记录被拒绝的单元格（只保留前 max_rejects 个明细）"""
+        if column > 1:
+            self.cells_rejected += 1
+        else:
+            self.rows_rejected += 1
+        if len(self.rejected) < self.max_rejects:
+            self.rejected.append(RejectedCell(row, column, str(value), stage, reason))
+
+    @property
+    def total_rejected(self) -> int:
+        return self.cells_rejected + self.rows_rejected
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "game_name": self.game_name,
+            "reader": {"rows_read": self.rows_read, "rows_skipped": self.rows_skipped},
+            "parser": {
+                "rows_parsed": self.rows_parsed,
+                "cells_read": self.cells_read,
+                "cells_parsed": self.cells_parsed,
+            },
+            "validator": {
+                "records_valid": self.records_valid,
+                "rows_rejected": self.rows_rejected,
+                "cells_rejected": self.cells_rejected,
+            },
+            "writer": {
+                "records_written": self.records_written,
+                "users_created": self.users_created,
+                "batches": self.batches,
+            },
+            "rejected": [
+                {"coordinate": r.coordinate, "value": r.value, "stage": r.stage, "reason": r.reason}
+                for r in self.rejected
+            ],
+        }
+
+    def format_summary(self) -> str:
+        """生成简短的文本报告"""
+        lines = [
+            f"📋 导入报告: 读取 {self.rows_read} 行（跳过空行 {self.rows_skipped}），"
+            f"解析 {self.cells_parsed}/{self.cells_read} 个单元格，"
+            f"写入 {self.records_written} 条记录（{self.batches} 批）"
+        ]
+        if self.total_rejected:
+            lines.append(f"⚠️ 拒绝 {self.total_rejected} 项（行 {self.rows_rejected}，单元格 {self.cells_rejected}）:")
+            for r in self.rejected:
+                lines.append(f"  • {r.coordinate} '{r.value}': {r.reason}")
+            if self.total_rejected > len(self.rejected):
+                lines.append(f"  • ……另有 {self.total_rejected - len(self.rejected)} 项")
+        return "\n".join(lines)
+
+
+def read_rows(rows: Iterable[Sequence[Any]], report: ImportReport) -> Iterator[Tuple[int, Sequence[Any]]]:
+    """读取阶段：为每行编号（从1开始），跳过空行"""
+    for row_number, row in enumerate(rows, 1):
+        report.rows_read += 1
+        if not row or row[0] is None or not str(row[0]).strip():
+            report.rows_skipped += 1
+            continue
+        yield row_number, row
+
+
+def parse_rows(numbered_rows: Iterable[Tuple[int, Sequence[Any]]], report: ImportReport) -> Iterator[ParsedRow]:
+    """解析阶段：解析用户名周期和 MM-DD_次数 记录"""
+    for row_number, row in numbered_rows:
+        username = str(row[0]).strip()
+        cycle = 1
+
+        # 检查是否有周期标记，如 "用户名(2)"
+        match = USERNAME_CYCLE_PATTERN.match(username)
+        if match:
+            username = match.group('name')
+            cycle = int(match.group('cycle'))
+
+        cells = []
+        for column, value in enumerate(row[1:], 2):
+            if value is None:
+                continue
+            record_str = str(value).strip()
+            if record_str in EMPTY_VALUES:
+                continue
+
+            report.cells_read += 1
+            match = RECORD_PATTERN.match(record_str)
+            if not match or not SUFFIX_PATTERN.match(match.group('suffix')):
+                report.reject(row_number, column, record_str, "parser", "格式应为 MM-DD_次数")
+                continue
+
+            suffix = match.group('suffix')
+            cells.append(ParsedCell(
+                column,
+                match.group('date'),
+                int(match.group('count')),
+                bool(COMPLETED_PATTERN.search(suffix)),
+                bool(CONTINUED_PATTERN.search(suffix)),
+            ))
+            report.cells_parsed += 1
+
+        report.rows_parsed += 1
+        yield ParsedRow(row_number, username, cycle, cells)
+
+
+def validate_rows(parsed_rows: Iterable[ParsedRow], report: ImportReport) -> Iterator[ParsedRow]:
+    """校验阶段：检查周期、日期和次数的取值范围"""
+    for parsed in parsed_rows:
+        if not parsed.username.strip() or parsed.cycle < 1:
+            report.reject(parsed.row, 1, parsed.username, "validator", "用户名为空或周期无效")
+            continue
+
+        valid_cells = []
+        for cell in parsed.cells:
+            reason = _validate_cell(cell)
+            if reason:
+                report.reject(parsed.row, cell.column, f"{cell.record_date}_{cell.count}", "validator", reason)
+                continue
+            valid_cells.append(cell)
+
+        report.records_valid += len(valid_cells)
+        yield parsed._replace(cells=valid_cells)
+
+
+def _validate_cell(cell: ParsedCell) -> Optional[str]:
+    """校验单个记录，返回错误原因，合法时返回 None"""
+    match = DATE_PATTERN.match(cell.record_date)
+    if not match:
+        return "日期格式应为 MM-DD"
+    month, day = int(match.group('month')), int(match.group('day'))
+    if not (1 <= month <= 12 and 1 <= day <= 31):
+        return "日期超出范围"
+    if cell.count < 1:
+        return "次数必须大于0"
+    return None
+
+
+def run_pipeline(rows: Iterable[Sequence[Any]], report: ImportReport) -> Iterator[ParsedRow]:
+    """组合读取、解析、校验阶段，返回待写入的行"""
+    return validate_rows(parse_rows(read_rows(rows, report), report), report)
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""数据完整性校验
+
+按用户周期检查记录中的异常：
+- 重复次数：同一周期中同一次数出现多次（并发 +1 或重复导入）
+- 次数断档：周期内的次数没有从1开始连续递增
+- 完成标记不一致：达到完成次数或已有后续周期却未标记完成，或最新周期提前标记完成
+- 孤立数据：没有任何记录的用户周期、所属用户周期已不存在的记录
+
+各存储后端按周期ID顺序分批读取，逐个周期调用 IntegrityReport.inspect_cycle，
+内存占用只与批次大小有关；修复时每批在一个事务中完成。
+"""
+
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# 异常类型 -> 显示名称
+ISSUE_LABELS = {
+    "duplicate": "重复次数",
+    "gap": "次数断档",
+    "completion": "完成标记不一致",
+    "orphan_user": "无记录的用户周期",
+    "orphan_records": "无用户的记录",
+}
+
+# 断档描述中最多列出的缺失区间数
+_MAX_GAP_RANGES = 3
+
+
+class IntegrityIssue(NamedTuple):
+    """一处数据异常"""
+    kind: str
+    game_name: str
+    user_id: int
+    name: Optional[str]
+    cycle: int
+    detail: str
+
+    def describe(self) -> str:
+        if self.name is None:
+            return f"{self.game_name} 用户周期#{self.user_id}: {self.detail}"
+        display_name = f"{self.name}({self.cycle})" if self.cycle > 1 else self.name
+        return f"{self.game_name} {display_name}: {self.detail}"
+
+
+class CycleRepair(NamedTuple):
+    """一个用户周期需要的修复"""
+    # 需要删除的重复记录（记录ID；归档周期中为记录在归档数据中的位置）
+    duplicates: List[Any]
+    # 需要补上完成标记
+    set_completed: bool
+    # 周期没有任何记录，需要删除
+    orphan: bool
+
+    @property
+    def needed(self) -> bool:
+        return bool(self.duplicates) or self.set_completed or self.orphan
+
+
+def _missing_ranges(seen: Iterable[int]) -> List[Tuple[int, int]]:
+    """从1到最大次数之间缺失的次数区间"""
+    ranges = []
+    expected = 1
+    for count in sorted(seen):
+        if count > expected:
+            ranges.append((expected, count - 1))
+        expected = max(expected, count + 1)
+    return ranges
+
+
+def _format_ranges(ranges: List[Tuple[int, int]]) -> str:
+    parts = [str(start) if start == end else f"{start}-{end}" for start, end in ranges[:_MAX_GAP_RANGES]]
+    if len(ranges) > _MAX_GAP_RANGES:
+        parts.append("等")
+    return ", ".join(parts)
+
+
+class IntegrityReport:
+    """校验报告：各类异常和修复的计数，以及前N处异常的详情"""
+
+    def __init__(self, completion_count: int, max_issues: int = 10):
+        self.completion_count = completion_count
+        self.max_issues = max_issues
+        self.cycles_scanned = 0
+        self.records_scanned = 0
+        self.issues: Dict[str, int] = {kind: 0 for kind in ISSUE_LABELS}
+        self.repaired: Dict[str, int] = {kind: 0 for kind in ISSUE_LABELS}
+        # 可以自动修复的异常数（断档和提前完成需要人工核对）
+        self.repairable = 0
+        # 执行了修复的批次（事务）数
+        self.batches = 0
+        self.samples: List[IntegrityIssue] = []
+        self.elapsed = 0.0
+        self._started = time.perf_counter()
+
+    @property
+    def total_issues(self) -> int:
+        return sum(self.issues.values())
+
+    @property
+    def total_repaired(self) -> int:
+        return sum(self.repaired.values())
+
+    def add_issue(self, issue: IntegrityIssue, repairable: bool = True):
+        self.issues[issue.kind] += 1
+        if repairable:
+            self.repairable += 1
+        if len(self.samples) < self.max_issues:
+            self.samples.append(issue)
+
+    def mark_repaired(self, kind: str, count: int = 1):
+        self.repaired[kind] += count
+
+    def inspect_cycle(self, game_name: str, user_id: int, name: str, cycle: int, is_completed: bool,
+                      has_later_cycle: bool, records: Iterable[Tuple[Any, int]]) -> CycleRepair:
+        """检查一个用户周期，records 为按写入顺序排列的 (记录键, 次数)，返回需要的修复"""
+        self.cycles_scanned += 1
+        seen = set()
+        duplicates = []
+        duplicate_counts = []
+        record_count = 0
+        for key, count in records:
+            record_count += 1
+            if count in seen:
+                duplicates.append(key)
+                duplicate_counts.append(count)
+            else:
+                seen.add(count)
+        self.records_scanned += record_count
+
+        def issue(kind: str, detail: str) -> IntegrityIssue:
+            return IntegrityIssue(kind, game_name, user_id, name, cycle, detail)
+
+        if not record_count:
+            self.add_issue(issue("orphan_user", "没有任何记录"))
+            return CycleRepair([], False, True)
+
+        if duplicates:
+            counts = ", ".join(str(count) for count in sorted(set(duplicate_counts)))
+            self.add_issue(issue("duplicate", f"次数 {counts} 重复（{len(duplicates)} 条多余记录）"))
+
+        gaps = _missing_ranges(seen)
+        if gaps:
+            self.add_issue(issue("gap", f"缺少次数 {_format_ranges(gaps)}"), repairable=False)
+
+        max_count = max(seen)
+        set_completed = False
+        if not is_completed and (max_count >= self.completion_count or has_later_cycle):
+            reason = f"已达到 {max_count}/{self.completion_count} 次" if max_count >= self.completion_count else "已有后续周期"
+            self.add_issue(issue("completion", f"未标记完成（{reason}）"))
+            set_completed = True
+        elif is_completed and not has_later_cycle and max_count < self.completion_count:
+            # 可能来自导入时的"完"标记，只报告不修复
+            self.add_issue(issue(
+                "completion", f"最新周期已标记完成但只有 {max_count}/{self.completion_count} 次，下次记录会开始新周期"
+            ), repairable=False)
+
+        return CycleRepair(duplicates, set_completed, False)
+
+    def add_orphan_records(self, game_name: str, user_id: int, record_count: int):
+        """所属用户周期已不存在的记录"""
+        self.records_scanned += record_count
+        self.add_issue(IntegrityIssue("orphan_records", game_name, user_id, None, 0, f"{record_count} 条记录没有对应的用户周期"))
+
+    def finish(self) -> 'IntegrityReport':
+        self.elapsed = time.perf_counter() - self._started
+        return self
+
+    def summary(self) -> str:
+        """生成校验结果消息"""
+        result_msg = f"🔍 数据校验完成: 检查 {self.cycles_scanned} 个用户周期、{self.records_scanned} 条记录，耗时 {self.elapsed:.2f} 秒\n"
+        if not self.total_issues:
+            return result_msg + "✅ 未发现异常"
+
+        result_msg += f"⚠️ 发现 {self.total_issues} 处异常:\n"
+        for kind, label in ISSUE_LABELS.items():
+            if self.issues[kind]:
+                result_msg += f"• {label}: {self.issues[kind]}\n"
+
+        result_msg += f"\n📋 前 {len(self.samples)} 处异常:\n"
+        result_msg += "\n".join(f"• {issue.describe()}" for issue in self.samples)
+
+        if self.total_repaired:
+            repaired = "、".join(f"{ISSUE_LABELS[kind]} {count}" for kind, count in self.repaired.items() if count)
+            result_msg += f"\n\n🛠️ 已修复 {self.total_repaired} 处（{self.batches} 个批次）: {repaired}"
+        if self.repairable < self.total_issues:
+            result_msg += f"\n💡 {self.total_issues - self.repairable} 处断档或提前完成需要人工核对，不会自动修复"
+        return result_msg
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import zlib
+from typing import Hashable, List, Optional
+
+
+class StripedLocks:
+    """分条的 asyncio 锁：同一个键总是映射到同一把锁，不同键大概率使用不同的锁"""
+
+    def __init__(self, stripes: int = 64):
+        self.stripes = max(1, stripes)
+        # asyncio.Lock 在首次使用时创建，确保绑定到运行中的事件循环
+        self._locks: List[Optional[asyncio.Lock]] = [None] * self.stripes
+
+    def _index(self, key: Hashable) -> int:
+        # 使用稳定的哈希，避免字符串哈希随机化导致不同进程间映射不一致
+        return zlib.crc32(repr(key).encode("utf-8")) % self.stripes
+
+    def lock_for(self, key: Hashable) -> asyncio.Lock:
+        """获取键对应的锁"""
+        index = self._index(key)
+        lock = self._locks[index]
+        if lock is None:
+            lock = self._locks[index] = asyncio.Lock()
+        return lock
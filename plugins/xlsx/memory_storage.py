@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+import itertools
+import sys
+import threading
+from array import array
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .config import Config
+from .import_pipeline import ImportReport, ParsedRow
+from .integrity import CycleRepair, IntegrityReport
+from .record_model import CycleRecords
+from .storage import CycleInfo, GameProgress, StorageBackend, StorageSnapshot
+
+
+class _Cycle:
+    """一个用户周期：记录按列存放（记录ID、日期、次数），只追加不修改"""
+
+    __slots__ = ("id", "game_id", "name", "cycle", "is_completed", "record_ids", "dates", "counts")
+
+    def __init__(self, cycle_id: int, game_id: int, name: str, cycle: int):
+        self.id = cycle_id
+        self.game_id = game_id
+        self.name = name
+        self.cycle = cycle
+        self.is_completed = False
+        self.record_ids = array('q')
+        # 日期字符串经过驻留，相同日期的记录共用同一个对象
+        self.dates: List[str] = []
+        self.counts = array('q')
+
+    def append(self, record_id: int, record_date: str, count: int):
+        self.record_ids.append(record_id)
+        self.dates.append(sys.intern(record_date))
+        self.counts.append(count)
+
+
+class _CycleView(NamedTuple):
+    """快照中的用户周期：创建快照时的状态和记录数"""
+    info: CycleInfo
+    cycle: _Cycle
+    length: int
+
+
+class MemorySnapshot(StorageSnapshot):
+    """内存快照：创建时复制周期的元数据和记录数，记录数组只追加，读取时按记录数截取"""
+
+    def __init__(self, storage: 'MemoryStorage'):
+        self.completion_count = storage.config.completion_count
+        with storage._lock:
+            self._games = sorted(storage._games.items())
+            self._game_cycles: Dict[int, List[_CycleView]] = {
+                game_id: [
+                    _CycleView(CycleInfo(c.id, c.name, c.cycle, c.is_completed), c, len(c.counts))
+                    for c in cycles.values()
+                ]
+                for game_id, cycles in storage._game_cycles.items()
+            }
+        self._cycles = {view.info.id: view for views in self._game_cycles.values() for view in views}
+
+    def games(self) -> List[Tuple[str, int]]:
+        return list(self._games)
+
+    def iter_cycles(self, game_id: int, order_by_name: bool = True, start_id: int = 0,
+                    name: Optional[str] = None) -> Iterator[CycleInfo]:
+        infos = [
+            view.info for view in self._game_cycles.get(game_id, [])
+            if view.info.id >= start_id and (name is None or view.info.name == name)
+        ]
+        if order_by_name:
+            infos.sort(key=lambda info: (info.name, info.cycle))
+        return iter(infos)
+
+    def cycle_records(self, game_id: int, user_id: int) -> List[Tuple[str, int]]:
+        view = self._cycles.get(user_id)
+        if view is None:
+            return []
+        return list(zip(view.cycle.dates[:view.length], view.cycle.counts[:view.length]))
+
+    def cycle_summary(self, game_id: int, user_id: int) -> Tuple[int, Optional[str], int]:
+        view = self._cycles.get(user_id)
+        if view is None or not view.length:
+            return 0, None, 0
+        return view.length, view.cycle.dates[view.length - 1], view.cycle.counts[view.length - 1]
+
+    def game_stats(self, game_id: int) -> Dict[str, Any]:
+        views = self._game_cycles.get(game_id, [])
+        completed_count = sum(1 for view in views if view.info.is_completed)
+        last_record_id, last_record_date = 0, None
+        for view in views:
+            if view.length and view.cycle.record_ids[view.length - 1] > last_record_id:
+                last_record_id = view.cycle.record_ids[view.length - 1]
+                last_record_date = view.cycle.dates[view.length - 1]
+
+        return {
+            "users": len({view.info.name for view in views}),
+            "cycles": len(views),
+            "completed_cycles": completed_count,
+            "in_progress_cycles": len(views) - completed_count,
+            "records": sum(view.length for view in views),
+            "archived_records": 0,
+            "last_record_date": last_record_date,
+            "completion_count": self.completion_count,
+        }
+
+    def game_delta(self, game_id: int, since: int) -> Tuple[List[CycleRecords], int, int]:
+        users = []
+        record_count = 0
+        last_record_id = since
+        for view in self._game_cycles.get(game_id, []):
+            cycle = view.cycle
+            # 记录ID全局递增，每个周期内有序，二分查找水位之后的第一条记录
+            start = bisect_right(cycle.record_ids, since, 0, view.length)
+            if start >= view.length:
+                continue
+            users.append(CycleRecords(
+                view.info.id, view.info.name, view.info.cycle, view.info.is_completed,
+                zip(cycle.dates[start:view.length], cycle.counts[start:view.length])
+            ))
+            record_count += view.length - start
+            last_record_id = max(last_record_id, cycle.record_ids[view.length - 1])
+        return users, record_count, last_record_id
+
+
+class MemoryStorage(StorageBackend):
+    """纯内存存储后端：数据保存在字典和数组中，进程退出后丢失，用于测试、临时部署和基准对比"""
+
+    persistent = False
+
+    def __init__(self, config: Optional[Config] = None):
+        super().__init__(config)
+        # 所有写入在同一把锁内完成，读取在快照上进行
+        self._lock = threading.RLock()
+        # 游戏名 -> 游戏ID（按创建顺序）
+        self._games: Dict[str, int] = {}
+        # 游戏ID -> {(用户名, 周期): 用户周期}（按创建顺序，即周期ID顺序）
+        self._game_cycles: Dict[int, Dict[Tuple[str, int], _Cycle]] = {}
+        # (游戏ID, 用户名) -> 最新周期
+        self._latest_cycles: Dict[Tuple[int, str], _Cycle] = {}
+        self._watermarks: Dict[int, int] = {}
+        self._game_ids = itertools.count(1)
+        self._cycle_ids = itertools.count(1)
+        self._record_ids = itertools.count(1)
+
+        if self.config.debug_mode:
+            print("内存存储初始化完成（数据不会写入磁盘）")
+
+    @property
+    def location(self) -> str:
+        return "内存（进程退出后数据丢失）"
+
+    def snapshot(self, check_same_thread: bool = True) -> MemorySnapshot:
+        return MemorySnapshot(self)
+
+    def add_game(self, game_name: str) -> int:
+        with self._lock:
+            game_id = self._games.get(game_name)
+            if game_id is not None:
+                return game_id
+            game_id = self._games[game_name] = next(self._game_ids)
+            self._game_cycles[game_id] = {}
+        self._bump_version(game_id)
+        return game_id
+
+    def get_game_id(self, game_name: str) -> Optional[int]:
+        return self._games.get(game_name)
+
+    def get_games_list(self) -> List[Tuple[str]]:
+        with self._lock:
+            return [(game_name,) for game_name in self._games]
+
+    def get_game_records_count(self, game_name: str) -> int:
+        game_id = self.get_game_id(game_name)
+        if not game_id:
+            return 0
+        with self._lock:
+            return sum(len(cycle.counts) for cycle in self._game_cycles[game_id].values())
+
+    def _get_or_create_cycle(self, game_id: int, username: str, cycle_number: int) -> Tuple[_Cycle, bool]:
+        """获取或创建用户周期（调用方需持有锁），返回 (用户周期, 是否新建)"""
+        cycles = self._game_cycles[game_id]
+        cycle = cycles.get((username, cycle_number))
+        if cycle is not None:
+            return cycle, False
+
+        cycle = cycles[(username, cycle_number)] = _Cycle(next(self._cycle_ids), game_id, username, cycle_number)
+        latest = self._latest_cycles.get((game_id, username))
+        if latest is None or cycle_number > latest.cycle:
+            self._latest_cycles[(game_id, username)] = cycle
+        return cycle, True
+
+    def add_user_record(self, username: str, game_name: str, count: int = 1) -> str:
+        game_id = self.get_game_id(game_name)
+        if not game_id:
+            return f"❌ 游戏 {game_name} 不存在"
+
+        with self._lock:
+            created_user = False
+            cycle = self._latest_cycles.get((game_id, username))
+            if cycle is None or cycle.is_completed:
+                # 新用户，或当前周期已完成时创建新周期
+                cycle_number = cycle.cycle + 1 if cycle else 1
+                cycle, created_user = self._get_or_create_cycle(game_id, username, cycle_number)
+
+            current_count = cycle.counts[-1] if cycle.counts else 0
+            today = datetime.datetime.now().strftime("%m-%d")
+            new_counts = self._next_counts(current_count, count)
+            for new_count in new_counts:
+                cycle.append(next(self._record_ids), today, new_count)
+            total_new_count = new_counts[-1] if new_counts else current_count
+            if total_new_count >= self.config.completion_count:
+                cycle.is_completed = True
+
+        self._bump_version(game_id)
+        if created_user:
+            self.name_index.add(game_id, username)
+
+        records_added = [f"{today}_{new_count}" for new_count in new_counts]
+        return self._format_record_result(username, count, records_added, total_new_count)
+
+    def get_user_records(self, username: str, game_id: int, cycle: int = 1) -> List[Tuple[str, int]]:
+        with self._lock:
+            user_cycle = self._game_cycles.get(game_id, {}).get((username, cycle))
+            if user_cycle is None:
+                return []
+            return list(zip(user_cycle.dates, user_cycle.counts))
+
+    def get_user_overview(self, username: str) -> List[GameProgress]:
+        overview = []
+        with self._lock:
+            for game_name, game_id in self._games.items():
+                cycle = self._latest_cycles.get((game_id, username))
+                if cycle is None:
+                    continue
+                last_date = cycle.dates[-1] if cycle.dates else None
+                last_count = cycle.counts[-1] if cycle.counts else 0
+                overview.append(GameProgress(game_name, cycle.cycle, last_count, cycle.is_completed, last_date))
+        return sorted(overview)
+
+    def _iter_name_entries(self) -> Iterable[Tuple[int, str]]:
+        with self._lock:
+            return list({(game_id, name) for game_id, cycles in self._game_cycles.items() for name, _ in cycles})
+
+    def _write_parsed_rows(self, game_id: int, parsed_rows: Iterable[ParsedRow], report: ImportReport) -> int:
+        """逐行读取解析结果并写入，整个导入持有锁（与SQLite后端的单个写事务一致），失败时撤销已写入的数据"""
+        batch_size = max(1, self.config.import_batch_size)
+        new_usernames = []
+        # 新建的周期及其创建前的最新周期，失败时按相反顺序删除
+        created: List[Tuple[_Cycle, Optional[_Cycle]]] = []
+        # 导入前已存在的周期 -> (周期, 原记录数, 原完成标记)，失败时截回原记录数
+        touched: Dict[int, Tuple[_Cycle, int, bool]] = {}
+        pending = 0
+
+        with self._lock:
+            try:
+                for parsed in parsed_rows:
+                    previous_latest = self._latest_cycles.get((game_id, parsed.username))
+                    cycle, is_new = self._get_or_create_cycle(game_id, parsed.username, parsed.cycle)
+                    if is_new:
+                        created.append((cycle, previous_latest))
+                        new_usernames.append(parsed.username)
+                        report.users_created += 1
+                    elif cycle.id not in touched:
+                        touched[cycle.id] = (cycle, len(cycle.counts), cycle.is_completed)
+
+                    for cell in parsed.cells:
+                        cycle.append(next(self._record_ids), cell.record_date, cell.count)
+                        # 达到完成次数或带有"完"标记时标记周期完成
+                        if cell.count >= self.config.completion_count or cell.completed:
+                            cycle.is_completed = True
+
+                    # 与SQLite后端一致地统计写入批次
+                    pending += len(parsed.cells)
+                    if pending >= batch_size:
+                        report.records_written += pending
+                        report.batches += 1
+                        pending = 0
+
+                if pending:
+                    report.records_written += pending
+                    report.batches += 1
+            except BaseException:
+                self._undo_import(game_id, created, touched.values())
+                raise
+
+        self._bump_version(game_id)
+        for username in new_usernames:
+            self.name_index.add(game_id, username)
+
+        return report.records_written
+
+    def _undo_import(self, game_id: int, created: List[Tuple[_Cycle, Optional[_Cycle]]],
+                     touched: Iterable[Tuple[_Cycle, int, bool]]):
+        """撤销导入写入的数据（调用方需持有锁）
+
+        导入期间一直持有锁，已创建的快照记录的长度都不超过导入前的记录数，截断数组不影响快照读取
+        """
+        for cycle, length, is_completed in touched:
+            del cycle.record_ids[length:]
+            del cycle.dates[length:]
+            del cycle.counts[length:]
+            cycle.is_completed = is_completed
+
+        cycles = self._game_cycles[game_id]
+        for cycle, previous_latest in reversed(created):
+            del cycles[(cycle.name, cycle.cycle)]
+            if self._latest_cycles.get((game_id, cycle.name)) is cycle:
+                if previous_latest is None:
+                    del self._latest_cycles[(game_id, cycle.name)]
+                else:
+                    self._latest_cycles[(game_id, cycle.name)] = previous_latest
+
+    def get_export_watermark(self, game_id: int) -> int:
+        return self._watermarks.get(game_id, 0)
+
+    def set_export_watermark(self, game_id: int, last_record_id: int):
+        with self._lock:
+            self._watermarks[game_id] = max(self._watermarks.get(game_id, 0), last_record_id)
+
+    def check_integrity(self, repair: bool = False, batch_size: Optional[int] = None) -> IntegrityReport:
+        """按周期ID顺序分批检查，每批持有一次锁；内存中不存在归档数据和无用户的记录"""
+        batch_size = max(1, batch_size or self.config.integrity_batch_size)
+        report = self._new_integrity_report()
+
+        with self._lock:
+            game_names = {game_id: game_name for game_name, game_id in self._games.items()}
+            cycles = sorted((cycle for cycles in self._game_cycles.values() for cycle in cycles.values()),
+                            key=lambda cycle: cycle.id)
+
+        removed_names = False
+        for start in range(0, len(cycles), batch_size):
+            changed_games = set()
+            with self._lock:
+                for cycle in cycles[start:start + batch_size]:
+                    latest = self._latest_cycles.get((cycle.game_id, cycle.name))
+                    fix = report.inspect_cycle(
+                        game_names[cycle.game_id], cycle.id, cycle.name, cycle.cycle, cycle.is_completed,
+                        latest is not None and latest.cycle > cycle.cycle, enumerate(cycle.counts)
+                    )
+                    if repair and fix.needed:
+                        removed_names |= self._repair_cycle(cycle, fix, report)
+                        changed_games.add(cycle.game_id)
+            if changed_games:
+                report.batches += 1
+                for game_id in changed_games:
+                    self._bump_version(game_id)
+
+        if removed_names and self.name_index.is_built:
+            self.build_name_index()
+
+        return report.finish()
+
+    def _repair_cycle(self, cycle: _Cycle, fix: CycleRepair, report: IntegrityReport) -> bool:
+        """修复一个用户周期（调用方需持有锁），返回是否有用户名不再存在于该游戏中"""
+        cycles = self._game_cycles[cycle.game_id]
+        key = (cycle.name, cycle.cycle)
+        if cycles.get(key) is not cycle:
+            # 扫描后周期已被替换
+            return False
+
+        if fix.orphan:
+            if cycle.counts:
+                # 扫描后有新的记录写入
+                return False
+            del cycles[key]
+            report.mark_repaired("orphan_user")
+            if self._latest_cycles.get((cycle.game_id, cycle.name)) is not cycle:
+                return False
+            remaining = [other for (name, _), other in cycles.items() if name == cycle.name]
+            if remaining:
+                self._latest_cycles[(cycle.game_id, cycle.name)] = max(remaining, key=lambda other: other.cycle)
+                return False
+            del self._latest_cycles[(cycle.game_id, cycle.name)]
+            return True
+
+        if fix.duplicates:
+            # 记录数组只追加，快照按长度截取读取；去重时换成新的周期对象，已创建的快照仍读取旧对象
+            removed = set(fix.duplicates)
+            repaired = _Cycle(cycle.id, cycle.game_id, cycle.name, cycle.cycle)
+            repaired.is_completed = cycle.is_completed
+            for i, (record_id, record_date, count) in enumerate(zip(cycle.record_ids, cycle.dates, cycle.counts)):
+                if i not in removed:
+                    repaired.append(record_id, record_date, count)
+            cycles[key] = repaired
+            if self._latest_cycles.get((cycle.game_id, cycle.name)) is cycle:
+                self._latest_cycles[(cycle.game_id, cycle.name)] = repaired
+            cycle = repaired
+            report.mark_repaired("duplicate")
+
+        if fix.set_completed:
+            cycle.is_completed = True
+            report.mark_repaired("completion")
+        return False
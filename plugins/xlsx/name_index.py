@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# pypinyin 导入较慢，首次使用时才加载；None 表示尚未尝试加载
+_pinyin_module = None
+# 是否已提示过 pypinyin 未安装（每个进程只提示一次）
+_pinyin_warned = False
+
+
+def _load_pinyin():
+    """加载 pypinyin，未安装时仅支持英文名首字母"""
+    global _pinyin_module
+    if _pinyin_module is None:
+        try:
+            import pypinyin
+            _pinyin_module = pypinyin
+        except ImportError:
+            _pinyin_module = False
+    return _pinyin_module
+
+
+def warn_if_pinyin_missing():
+    """pypinyin 未安装时提示一次：中文用户名无法按拼音首字母匹配"""
+    global _pinyin_warned
+    if not _load_pinyin() and not _pinyin_warned:
+        _pinyin_warned = True
+        print("⚠️  未安装 pypinyin，用户名索引不支持拼音首字母匹配（pip install pypinyin）")
+
+
+def normalize_name(name: str) -> str:
+    """规范化用户名（去除首尾空白并忽略大小写）"""
+    return name.strip().casefold()
+
+
+def name_initials(name: str) -> str:
+    """获取用户名的拼音首字母，如 "张三" -> "zs" """
+    pypinyin = _load_pinyin()
+    if pypinyin:
+        letters = pypinyin.lazy_pinyin(name, style=pypinyin.Style.FIRST_LETTER, errors='default')
+    else:
+        letters = list(name)
+    return "".join(c for c in "".join(letters).casefold() if c.isascii() and c.isalnum())
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """计算编辑距离，超过 max_distance 时提前返回 max_distance + 1"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        row_min = i
+        for j, cb in enumerate(b, 1):
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            current.append(value)
+            row_min = min(row_min, value)
+        if row_min > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+class _TrieNode:
+    """前缀树节点"""
+
+    __slots__ = ('children', 'names')
+
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.names: Set[str] = set()
+
+
+class _Trie:
+    """前缀树，键为规范化后的字符串，值为原始用户名"""
+
+    def __init__(self):
+        self.root = _TrieNode()
+
+    def insert(self, key: str, name: str):
+        node = self.root
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+        node.names.add(name)
+
+    def with_prefix(self, prefix: str, limit: int) -> List[str]:
+        """按键的长度由短到长返回以 prefix 开头的用户名"""
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+
+        result: List[str] = []
+        level = [node]
+        while level and len(result) < limit:
+            next_level = []
+            for current in level:
+                result.extend(sorted(current.names))
+                next_level.extend(current.children.values())
+            level = next_level
+        return result[:limit]
+
+
+class _GameNameIndex:
+    """单个游戏的用户名索引"""
+
+    def __init__(self):
+        self.exact: Set[str] = set()
+        self.names: Dict[str, str] = {}  # 规范化用户名 -> 原始用户名
+        self.by_length: Dict[int, List[str]] = {}
+        self.name_trie = _Trie()
+        self.initials_trie = _Trie()
+
+    def add(self, name: str):
+        name = name.strip()
+        key = normalize_name(name)
+        if not key or name in self.exact:
+            return
+        self.exact.add(name)
+        if key not in self.names:
+            self.names[key] = name
+            self.by_length.setdefault(len(key), []).append(key)
+        self.name_trie.insert(key, name)
+        initials = name_initials(name)
+        if initials:
+            self.initials_trie.insert(initials, name)
+
+
+class NameIndex:
+    """内存中的用户名索引，支持前缀、拼音首字母和编辑距离匹配
+
+    写入命令在工作线程中调用 add，查询可能在其他线程中进行，所有读写都持有同一把锁
+    """
+
+    def __init__(self):
+        self._games: Dict[int, _GameNameIndex] = {}
+        self._lock = threading.Lock()
+        self.is_built = False
+
+    def build(self, rows: Iterable[Tuple[int, str]]):
+        """根据 (game_id, name) 列表重建索引（在锁外构建新索引，完成后整体替换）"""
+        warn_if_pinyin_missing()
+        games: Dict[int, _GameNameIndex] = {}
+        for game_id, name in rows:
+            self._add_to(games, game_id, name)
+        with self._lock:
+            self._games = games
+            self.is_built = True
+
+    @staticmethod
+    def _add_to(games: Dict[int, _GameNameIndex], game_id: int, name: str):
+        game_index = games.get(game_id)
+        if game_index is None:
+            game_index = games[game_id] = _GameNameIndex()
+        game_index.add(name)
+
+    def add(self, game_id: int, name: str):
+        """增量添加用户名"""
+        with self._lock:
+            self._add_to(self._games, game_id, name)
+
+    def contains(self, game_id: int, name: str) -> bool:
+        """检查用户名是否存在（精确匹配）"""
+        with self._lock:
+            game_index = self._games.get(game_id)
+            return game_index is not None and name.strip() in game_index.exact
+
+    def search(self, game_id: int, query: str, limit: int = 5) -> List[str]:
+        """查找候选用户名：忽略大小写的精确匹配 > 前缀 > 拼音首字母 > 编辑距离"""
+        with self._lock:
+            return self._search(game_id, query, limit)
+
+    def _search(self, game_id: int, query: str, limit: int) -> List[str]:
+        game_index = self._games.get(game_id)
+        key = normalize_name(query)
+        if game_index is None or not key:
+            return []
+
+        candidates: List[str] = []
+
+        def extend(names: Iterable[str]):
+            for name in names:
+                if name not in candidates:
+                    candidates.append(name)
+
+        if key in game_index.names:
+            extend([game_index.names[key]])
+        extend(game_index.name_trie.with_prefix(key, limit))
+        if key.isascii() and key.isalnum():
+            extend(game_index.initials_trie.with_prefix(key, limit))
+
+        if len(candidates) < limit:
+            max_distance = 1 if len(key) <= 4 else 2
+            scored = []
+            for length in range(len(key) - max_distance, len(key) + max_distance + 1):
+                for other in game_index.by_length.get(length, ()):
+                    distance = edit_distance(key, other, max_distance)
+                    if distance <= max_distance:
+                        scored.append((distance, other))
+            scored.sort()
+            extend(game_index.names[other] for _, other in scored)
+
+        return candidates[:limit]
+
+    def resolve(self, game_id: int, query: str) -> Optional[str]:
+        """将输入解析为唯一的已有用户名，无法唯一确定时返回 None"""
+        with self._lock:
+            return self._resolve(game_id, query)
+
+    def _resolve(self, game_id: int, query: str) -> Optional[str]:
+        game_index = self._games.get(game_id)
+        key = normalize_name(query)
+        if game_index is None or not key:
+            return None
+        if query.strip() in game_index.exact:
+            return query.strip()
+        if key in game_index.names:
+            return game_index.names[key]
+
+        prefix_matches = game_index.name_trie.with_prefix(key, 2)
+        if len(prefix_matches) == 1:
+            return prefix_matches[0]
+        if prefix_matches:
+            return None
+
+        if key.isascii() and key.isalnum():
+            initials_matches = game_index.initials_trie.with_prefix(key, 2)
+            if len(initials_matches) == 1:
+                return initials_matches[0]
+        return None
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Hashable, Optional
+
+from .config import Config
+
+# 令牌桶数量超过该值时清理已经补满的桶
+_MAX_IDLE_BUCKETS = 1024
+
+
+class TokenBucket:
+    """令牌桶：按固定速率补充令牌，允许不超过容量的突发请求"""
+
+    __slots__ = ("capacity", "rate", "tokens", "updated")
+
+    def __init__(self, capacity: float, rate: float, now: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = now
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, cost: float = 1.0) -> float:
+        """令牌不足时需要等待的秒数，令牌充足时返回0"""
+        if self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    @property
+    def is_full(self) -> bool:
+        return self.tokens >= self.capacity
+
+
+class RateLimiter:
+    """按键（发送者、游戏等）独立计数的令牌桶限流器"""
+
+    def __init__(self, per_minute: float, burst: int):
+        self.rate = per_minute / 60
+        self.capacity = max(1, burst)
+        self._buckets: Dict[Hashable, TokenBucket] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def bucket(self, key: Hashable, now: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= _MAX_IDLE_BUCKETS:
+                self._evict_full(now)
+            bucket = self._buckets[key] = TokenBucket(self.capacity, self.rate, now)
+        else:
+            bucket.refill(now)
+        return bucket
+
+    def _evict_full(self, now: float):
+        for key, bucket in list(self._buckets.items()):
+            bucket.refill(now)
+            if bucket.is_full:
+                del self._buckets[key]
+
+
+class AdmissionController:
+    """记录命令的准入控制：发送者和游戏两级令牌桶限流，加上全局并发上限和排队上限"""
+
+    def __init__(self, config: Config):
+        self.user_limiter = RateLimiter(config.rate_limit_user_per_minute, config.rate_limit_user_burst)
+        self.game_limiter = RateLimiter(config.rate_limit_game_per_minute, config.rate_limit_game_burst)
+        self.max_in_flight = config.max_in_flight_records
+        self.max_queued = config.max_queued_records
+        self.in_flight = 0
+        self.queued = 0
+        # 信号量在首次使用时创建，确保绑定到运行中的事件循环
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def check_rate(self, sender_id: str, game_name: str) -> float:
+        """检查限流，允许时扣除令牌并返回0，否则返回需要等待的秒数（不扣除令牌）"""
+        now = time.monotonic()
+        buckets = []
+        if self.user_limiter.enabled:
+            buckets.append(self.user_limiter.bucket(sender_id, now))
+        if self.game_limiter.enabled:
+            buckets.append(self.game_limiter.bucket(game_name, now))
+
+        wait = max((bucket.wait_time() for bucket in buckets), default=0.0)
+        if wait > 0:
+            return wait
+        for bucket in buckets:
+            bucket.tokens -= 1
+        return 0.0
+
+    @property
+    def is_full(self) -> bool:
+        """并发和排队都已达到上限"""
+        return self.max_in_flight > 0 and self.queued >= self.max_queued and self.in_flight >= self.max_in_flight
+
+    @property
+    def will_queue(self) -> bool:
+        """新请求是否需要排队等待"""
+        return self.max_in_flight > 0 and self.in_flight >= self.max_in_flight
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """占用一个并发名额，名额已满时排队等待"""
+        if self.max_in_flight <= 0:
+            yield
+            return
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""导出使用的紧凑记录模型
+
+一个用户周期的记录按列存放：日期编码为16位整数（月*100+日），次数存放在整数数组中，
+每条记录只占几个字节，不再为每条记录创建元组和日期字符串。
+"""
+
+from array import array
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# 日期编码中表示"月份未补零"（如 5-13）的标记位
+UNPADDED_DATE_FLAG = 0x8000
+
+
+def encode_record_date(record_date: str) -> Optional[int]:
+    """将 MM-DD 或 M-D 格式的日期编码为16位整数，无法无损编码时返回 None"""
+    try:
+        month_part, day_part = record_date.split('-')
+        month, day = int(month_part), int(day_part)
+    except (ValueError, AttributeError):
+        return None
+
+    if not (1 <= month <= 12 and 1 <= day <= 31):
+        return None
+    if record_date == f"{month:02d}-{day:02d}":
+        return month * 100 + day
+    if record_date == f"{month}-{day}":
+        return UNPADDED_DATE_FLAG | (month * 100 + day)
+    return None
+
+
+@lru_cache(maxsize=None)
+def decode_record_date(code: int) -> str:
+    """解码日期（结果会被缓存，相同日期共用同一个字符串）"""
+    month, day = divmod(code & ~UNPADDED_DATE_FLAG, 100)
+    if code & UNPADDED_DATE_FLAG:
+        return f"{month}-{day}"
+    return f"{month:02d}-{day:02d}"
+
+
+class CycleRecords:
+    """一个用户周期及其全部记录，由完整导出和增量导出共用"""
+
+    __slots__ = ("id", "name", "cycle", "is_completed", "_dates", "_counts", "_raw_dates")
+
+    def __init__(self, cycle_id: int, name: str, cycle: int, is_completed: bool,
+                 records: Iterable[Tuple[str, int]] = ()):
+        self.id = cycle_id
+        self.name = name
+        self.cycle = cycle
+        self.is_completed = is_completed
+        self._dates = array('H')
+        self._counts = array('q')
+        # 出现无法编码的日期时，该周期改为保存原始日期字符串
+        self._raw_dates: Optional[List[str]] = None
+        for record_date, count in records:
+            self.append(record_date, count)
+
+    @property
+    def display_name(self) -> str:
+        """导出时的显示名：第一个周期为用户名，之后为 用户名(周期)"""
+        return f"{self.name}({self.cycle})" if self.cycle > 1 else self.name
+
+    def append(self, record_date: str, count: int):
+        if self._raw_dates is None:
+            code = encode_record_date(record_date)
+            if code is not None:
+                self._dates.append(code)
+                self._counts.append(count)
+                return
+            self._raw_dates = [decode_record_date(code) for code in self._dates]
+            self._dates = array('H')
+        self._raw_dates.append(record_date)
+        self._counts.append(count)
+
+    def records(self) -> Iterator[Tuple[str, int]]:
+        """逐条返回 (日期, 次数)"""
+        if self._raw_dates is not None:
+            return zip(self._raw_dates, self._counts)
+        return zip(map(decode_record_date, self._dates), self._counts)
+
+    def __len__(self) -> int:
+        return len(self._counts)
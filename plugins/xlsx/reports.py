@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import copy
+import datetime
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from .config import Config
+from .storage import StorageBackend
+from .excel_exporter import ExcelExporter
+from .export_retention import ALL_GAMES_KEY
+
+# 报表类型：单个游戏的 xlsx/csv/tsv 导出、所有游戏的合并导出、游戏概览文本
+REPORT_KINDS = ["xlsx", "csv", "tsv", "summary"]
+# 预生成配置中表示"每个游戏"的通配符
+EVERY_GAME = "*"
+
+
+class CachedReport:
+    """预生成的报表及其对应的数据版本"""
+
+    __slots__ = ("kind", "game", "version", "message", "filename", "data", "created_at")
+
+    def __init__(self, kind: str, game: str, version: int, message: str,
+                 filename: Optional[str], data: Optional[bytes]):
+        self.kind = kind
+        self.game = game
+        self.version = version
+        self.message = message
+        self.filename = filename
+        self.data = data
+        self.created_at = time.time()
+
+    @property
+    def size(self) -> int:
+        return len(self.data) if self.data else len(self.message.encode("utf-8"))
+
+
+def parse_report_specs(spec: str) -> List[Tuple[str, str]]:
+    """解析预生成配置，如 "summary,all,*:csv,原神"，返回 (报表类型, 游戏名) 列表
+
+    - summary: 游戏概览文本
+    - all: 所有游戏的合并xlsx
+    - *: 每个游戏的xlsx，*:csv 表示每个游戏的CSV
+    - <游戏名>[:格式]: 指定游戏的导出
+    """
+    specs = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        if item == "summary":
+            specs.append(("summary", ALL_GAMES_KEY))
+        elif item == "all":
+            specs.append(("xlsx", ALL_GAMES_KEY))
+        else:
+            game, _, kind = item.partition(":")
+            kind = kind.strip().lower() or "xlsx"
+            if kind in REPORT_KINDS and kind != "summary":
+                specs.append((kind, game.strip()))
+    return specs
+
+
+def parse_time_of_day(time_of_day: str) -> Tuple[int, int]:
+    """解析 HH:MM，格式或范围错误时抛出 ValueError"""
+    hour, sep, minute = time_of_day.strip().partition(":")
+    if not (sep and hour.isdigit() and minute.isdigit() and 0 <= int(hour) < 24 and 0 <= int(minute) < 60):
+        raise ValueError(f"时间格式应为 HH:MM: {time_of_day}")
+    return int(hour), int(minute)
+
+
+def seconds_until(time_of_day: str, now: Optional[datetime.datetime] = None) -> float:
+    """距离下一个 HH:MM 的秒数"""
+    now = now or datetime.datetime.now()
+    hour, minute = parse_time_of_day(time_of_day)
+    target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if target <= now:
+        target += datetime.timedelta(days=1)
+    return (target - now).total_seconds()
+
+
+class ReportCache:
+    """报表缓存：数据版本未变化时直接返回预生成的导出文件或概览文本"""
+
+    def __init__(self, db_manager: StorageBackend, excel_exporter: ExcelExporter, config: Config):
+        self.db_manager = db_manager
+        self.excel_exporter = excel_exporter
+        self.config = config
+        self.max_bytes = int(config.report_cache_max_mb * 1024 * 1024)
+        self._reports: "OrderedDict[Tuple[str, str], CachedReport]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        """只有配置了预生成时间才缓存报表，否则每次直接调用导出器生成"""
+        return bool(self.config.report_precompute_time)
+
+    def _version(self, game: str) -> Optional[int]:
+        """报表对应的数据版本，游戏不存在时返回 None"""
+        if game == ALL_GAMES_KEY:
+            return self.db_manager.data_version()
+        game_id = self.db_manager.get_game_id(game)
+        return self.db_manager.data_version(game_id) if game_id else None
+
+    def get(self, kind: str, game: str) -> Optional[CachedReport]:
+        """获取仍然有效的缓存报表"""
+        version = self._version(game)
+        with self._lock:
+            report = self._reports.get((kind, game))
+            if report is None or report.version != version:
+                self.misses += 1
+                return None
+            self._reports.move_to_end((kind, game))
+            self.hits += 1
+            return report
+
+    def build(self, kind: str, game: str) -> CachedReport:
+        """生成报表并缓存（生成成功时）"""
+        # 先读取版本再读取数据：生成期间有新写入时缓存会在下次访问时失效
+        version = self._version(game)
+        report = self._render(kind, game, version)
+        if version is not None and (report.data is not None or kind == "summary"):
+            self._store(report)
+        return report
+
+    def _render(self, kind: str, game: str, version: Optional[int] = None) -> CachedReport:
+        """调用导出器生成报表（不缓存）"""
+        if kind == "summary":
+            message, filename, data = self.excel_exporter.list_available_games(), None, None
+        elif kind == "xlsx" and game == ALL_GAMES_KEY:
+            message, filename, data = self.excel_exporter.export_all_games_to_buffer()
+        elif kind == "xlsx":
+            message, filename, data = self.excel_exporter.export_game_to_buffer(game)
+        else:
+            message, filename, data = self.excel_exporter.export_game_to_csv_buffer(game, kind)
+
+        return CachedReport(kind, game, version, message, filename, data)
+
+    def fetch(self, kind: str, game: str) -> Tuple[CachedReport, bool]:
+        """优先返回缓存报表，失效时重新生成，返回 (报表, 是否来自缓存)；未开启预生成时直接生成"""
+        if not self.enabled:
+            return self._render(kind, game), False
+        report = self.get(kind, game)
+        if report is not None:
+            return self._with_fresh_filename(report), True
+        return self.build(kind, game), False
+
+    def _with_fresh_filename(self, report: CachedReport) -> CachedReport:
+        """缓存的文件使用当前时间的文件名保存和上传，不覆盖或重复使用生成时的文件名"""
+        if report.filename is None:
+            return report
+        fresh = copy.copy(report)
+        fresh.filename = self.excel_exporter.make_export_filename(report.game, report.kind)
+        fresh.message = report.message.replace(report.filename, fresh.filename)
+        return fresh
+
+    def _store(self, report: CachedReport):
+        with self._lock:
+            self._reports[(report.kind, report.game)] = report
+            self._reports.move_to_end((report.kind, report.game))
+            # 超出缓存大小时淘汰最久未使用的报表
+            total = sum(r.size for r in self._reports.values())
+            while total > self.max_bytes and len(self._reports) > 1:
+                _, evicted = self._reports.popitem(last=False)
+                total -= evicted.size
+
+    def precompute(self) -> int:
+        """生成配置的所有报表，跳过数据未变化的报表，返回生成的数量"""
+        built = 0
+        games = self.excel_exporter.get_available_games()
+        for kind, game in parse_report_specs(self.config.report_precompute):
+            targets = games if game == EVERY_GAME else [game]
+            for target in targets:
+                if self.get(kind, target) is not None:
+                    continue
+                report = self.build(kind, target)
+                if report.data is not None or kind == "summary":
+                    built += 1
+                if self.config.debug_mode:
+                    print(f"已预生成报表: {kind} {target}")
+        return built
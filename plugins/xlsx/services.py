@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Optional
+
+from .config import Config
+from .database import DatabaseManager
+from .memory_storage import MemoryStorage
+from .storage import StorageBackend
+from .excel_exporter import ExcelExporter
+from .excel_importer import ExcelImporter
+
+
+# 可选的存储后端
+STORAGE_BACKENDS = {
+    "sqlite": DatabaseManager,
+    "memory": MemoryStorage,
+}
+
+
+def create_storage(config: Config) -> StorageBackend:
+    """根据配置创建存储后端"""
+    backend = STORAGE_BACKENDS.get(config.storage_backend.lower())
+    if backend is None:
+        raise ValueError(f"不支持的存储后端: {config.storage_backend}（可选: {', '.join(STORAGE_BACKENDS)}）")
+    return backend(config)
+
+
+class ServiceContainer:
+    """插件共享服务容器，配置和数据库管理器只创建一次"""
+
+    def __init__(self, config: Optional[Config] = None):
+        self.config = config or Config()
+        self._db_manager: Optional[StorageBackend] = None
+        self._excel_importer: Optional[ExcelImporter] = None
+        self._excel_exporter: Optional[ExcelExporter] = None
+
+    @property
+    def db_manager(self) -> StorageBackend:
+        if self._db_manager is None:
+            self._db_manager = create_storage(self.config)
+        return self._db_manager
+
+    @property
+    def excel_importer(self) -> ExcelImporter:
+        if self._excel_importer is None:
+            self._excel_importer = ExcelImporter(self.db_manager, self.config)
+        return self._excel_importer
+
+    @property
+    def excel_exporter(self) -> ExcelExporter:
+        if self._excel_exporter is None:
+            self._excel_exporter = ExcelExporter(self.db_manager, self.config)
+        return self._excel_exporter
+
+
+# 插件全局共享的服务容器
+services = ServiceContainer()
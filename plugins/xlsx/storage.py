@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""存储后端接口
+
+导入器、导出器、命令处理和HTTP接口只依赖这里定义的接口：
+- StorageBackend: 写入、查询和导入
+- StorageSnapshot: 导出等长时间读取使用的只读快照
+
+实现有基于SQLite的 DatabaseManager（database.py）和纯内存的 MemoryStorage（memory_storage.py），
+两者都是抽象基类，缺少任一 @abstractmethod 方法的实现在实例化时就会报错。
+"""
+
+import itertools
+from abc import ABC, abstractmethod
+from types import TracebackType
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Type
+
+from .config import Config
+from .import_pipeline import ImportReport, ParsedRow, run_pipeline
+from .integrity import IntegrityReport
+from .name_index import NameIndex
+from .record_model import CycleRecords
+
+
+class CycleInfo(NamedTuple):
+    """一个用户周期"""
+    id: int
+    name: str
+    cycle: int
+    is_completed: bool
+
+
+class GameProgress(NamedTuple):
+    """用户在一个游戏中的最新周期进度"""
+    game_name: str
+    cycle: int
+    count: int
+    is_completed: bool
+    last_record_date: Optional[str]
+
+
+class StorageSnapshot(ABC):
+    """只读快照：快照内的所有读取看到同一时间点的数据，不阻塞写入"""
+
+    @abstractmethod
+    def games(self) -> List[Tuple[str, int]]:
+        """所有游戏的 (游戏名, 游戏ID)，按游戏名排序"""
+
+    @abstractmethod
+    def iter_cycles(self, game_id: int, order_by_name: bool = True, start_id: int = 0,
+                    name: Optional[str] = None) -> Iterator[CycleInfo]:
+        """逐个返回游戏的用户周期
+
+        order_by_name 为 True 时按 (用户名, 周期) 排序（导出顺序），否则按周期ID排序并从 start_id 开始（分页）
+        """
+
+    @abstractmethod
+    def cycle_records(self, game_id: int, user_id: int) -> List[Tuple[str, int]]:
+        """一个用户周期的全部 (日期, 次数) 记录"""
+
+    def cycle_summary(self, game_id: int, user_id: int) -> Tuple[int, Optional[str], int]:
+        """一个用户周期的 (记录数, 最后记录日期, 最后次数)，没有记录时日期为 None"""
+        records = self.cycle_records(game_id, user_id)
+        if not records:
+            return 0, None, 0
+        return len(records), records[-1][0], records[-1][1]
+
+    @abstractmethod
+    def game_stats(self, game_id: int) -> Dict[str, Any]:
+        """游戏统计：用户数、周期数、已完成周期数、记录数和最后记录日期"""
+
+    @abstractmethod
+    def game_delta(self, game_id: int, since: int) -> Tuple[List[CycleRecords], int, int]:
+        """记录ID大于 since 的新记录按用户周期分组，返回 (用户周期列表, 记录数, 最大记录ID)"""
+
+    def close(self):
+        pass
+
+    def __enter__(self) -> 'StorageSnapshot':
+        return self
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]], exc: Optional[BaseException],
+                 traceback: Optional[TracebackType]):
+        self.close()
+
+
+class StorageBackend(ABC):
+    """存储后端基类：数据版本、用户名索引、导入流程和结果消息由各实现共用"""
+
+    # 数据是否保存在磁盘上（内存后端不支持备份）
+    persistent = True
+
+    def __init__(self, config: Optional[Config] = None):
+        self.config = config or Config()
+        self.name_index = NameIndex()
+        # 数据版本：每次写入提交后递增，用于判断预生成的报表和ETag是否仍然有效
+        # （进程内计数，适用于内存后端；SQLite后端从数据库的版本表读取）
+        self._version_counter = itertools.count(1)
+        self._global_version = 0
+        self._game_versions: Dict[int, int] = {}
+
+    @property
+    @abstractmethod
+    def location(self) -> str:
+        """数据存放位置的说明（用于启动日志）"""
+
+    @abstractmethod
+    def snapshot(self, check_same_thread: bool = True) -> StorageSnapshot:
+        """创建只读快照，用于导出等长时间读取"""
+
+    def close(self):
+        """释放连接等资源（插件关闭时调用）"""
+        pass
+
+    def data_version(self, game_id: Optional[int] = None) -> int:
+        """返回游戏（或全部游戏）的数据版本，数据变化后版本号一定不同"""
+        if game_id is None:
+            return self._global_version
+        return self._game_versions.get(game_id, 0)
+
+    def _bump_version(self, game_id: Optional[int] = None):
+        """写入提交后更新数据版本"""
+        version = next(self._version_counter)
+        if game_id is not None:
+            self._game_versions[game_id] = version
+        self._global_version = version
+
+    # ===== 游戏 =====
+
+    @abstractmethod
+    def add_game(self, game_name: str) -> int:
+        """添加游戏，返回游戏ID（已存在时返回已有ID）"""
+
+    @abstractmethod
+    def get_game_id(self, game_name: str) -> Optional[int]:
+        """获取游戏ID"""
+
+    @abstractmethod
+    def get_games_list(self) -> List[Tuple[str]]:
+        """获取所有游戏列表（按创建顺序）"""
+
+    @abstractmethod
+    def get_game_records_count(self, game_name: str) -> int:
+        """获取指定游戏的总记录数"""
+
+    # ===== 记录 =====
+
+    @abstractmethod
+    def add_user_record(self, username: str, game_name: str, count: int = 1) -> str:
+        """为用户添加指定次数的记录，返回结果消息"""
+
+    @abstractmethod
+    def get_user_records(self, username: str, game_id: int, cycle: int = 1) -> List[Tuple[str, int]]:
+        """获取用户的所有记录"""
+
+    def get_user_latest_records(self, username: str, game_id: int, limit: int = 3, cycle: int = 1) -> List[Tuple[str, int]]:
+        """获取用户最新的N条记录（按时间正序）"""
+        return self.get_user_records(username, game_id, cycle)[-limit:]
+
+    def _next_counts(self, current_count: int, count: int) -> List[int]:
+        """从当前次数开始追加 count 次，达到完成次数时停止，返回新记录的次数列表"""
+        counts = []
+        total = current_count
+        for _ in range(count):
+            total += 1
+            counts.append(total)
+            # 检查是否达到完成次数
+            if total >= self.config.completion_count:
+                break
+        return counts
+
+    def _format_record_result(self, username: str, count: int, records_added: List[str], total_new_count: int) -> str:
+        """生成添加记录的结果消息"""
+        if count == 1:
+            # 单次记录的简洁消息
+            if total_new_count >= self.config.completion_count:
+                result_msg = f"✅ 已更新 {username} 的记录: {records_added[-1]} 🎉 恭喜完成{self.config.completion_count}次！"
+            else:
+                result_msg = f"✅ 已更新 {username} 的记录: {records_added[-1]}"
+        else:
+            # 批量记录的详细消息
+            if total_new_count >= self.config.completion_count:
+                result_msg = f"✅ 已为 {username} 添加 {len(records_added)} 条记录\n"
+                result_msg += f"记录: {', '.join(records_added)}\n"
+                result_msg += f"🎉 恭喜完成{self.config.completion_count}次！"
+            else:
+                result_msg = f"✅ 已为 {username} 添加 {len(records_added)} 条记录\n"
+                result_msg += f"记录: {', '.join(records_added)}\n"
+                result_msg += f"当前进度: {total_new_count}/{self.config.completion_count}"
+
+        return result_msg
+
+    def get_user_summary(self, username: str, game_name: str, limit: int = 3) -> Dict[str, Any]:
+        """获取用户在指定游戏中的摘要信息"""
+        game_id = self.get_game_id(game_name)
+        if not game_id:
+            return {"error": f"游戏 '{game_name}' 不存在"}
+
+        # 获取用户的最新记录
+        latest_records = self.get_user_latest_records(username, game_id, limit)
+
+        if not latest_records:
+            return {
+                "username": username,
+                "game_name": game_name,
+                "total_count": 0,
+                "latest_records": [],
+                "has_records": False
+            }
+
+        # 获取用户的总记录数
+        all_records = self.get_user_records(username, game_id)
+        total_count = len(all_records)
+        current_count = all_records[-1][1] if all_records else 0
+
+        return {
+            "username": username,
+            "game_name": game_name,
+            "total_count": total_count,
+            "current_count": current_count,
+            "latest_records": latest_records,
+            "has_records": True,
+            "completion_progress": f"{current_count}/{self.config.completion_count}"
+        }
+
+    @abstractmethod
+    def get_user_overview(self, username: str) -> List[GameProgress]:
+        """用户在所有游戏中最新周期的进度，按游戏名排序"""
+
+    # ===== 用户名索引 =====
+
+    @abstractmethod
+    def _iter_name_entries(self) -> Iterable[Tuple[int, str]]:
+        """所有 (游戏ID, 用户名)，用于构建用户名索引"""
+
+    def build_name_index(self):
+        """从用户数据构建内存用户名索引"""
+        self.name_index.build(self._iter_name_entries())
+
+        if self.config.debug_mode:
+            print("用户名索引构建完成")
+
+    def match_username(self, username: str, game_name: str, limit: int = 5) -> Tuple[Optional[str], List[str]]:
+        """匹配用户名，返回 (唯一解析结果, 候选用户名列表)"""
+        game_id = self.get_game_id(game_name)
+        if not game_id:
+            return None, []
+
+        if not self.name_index.is_built:
+            self.build_name_index()
+
+        if self.name_index.contains(game_id, username):
+            return username, []
+
+        resolved = self.name_index.resolve(game_id, username)
+        candidates = self.name_index.search(game_id, username, limit)
+        return resolved, candidates
+
+    # ===== 导入 =====
+
+    def import_from_excel_data(self, game_name: str, excel_data: Iterable[Sequence[Any]],
+                               report: Optional[ImportReport] = None) -> int:
+        """从Excel数据导入（流式管道，批量写入）"""
+        if report is None:
+            report = ImportReport(game_name, self.config.import_report_max_rejects)
+
+        game_id = self.add_game(game_name)
+
+        if self.config.debug_mode:
+            print(f"开始导入游戏: {game_name} (ID: {game_id})")
+
+        imported_count = self._write_parsed_rows(game_id, run_pipeline(excel_data, report), report)
+
+        if self.config.debug_mode:
+            print(f"导入完成，共导入 {imported_count} 条记录")
+            for rejected in report.rejected:
+                print(f"解析记录失败: {rejected.coordinate} {rejected.value}, 原因: {rejected.reason}")
+
+        return imported_count
+
+    @abstractmethod
+    def _write_parsed_rows(self, game_id: int, parsed_rows: Iterable[ParsedRow], report: ImportReport) -> int:
+        """写入阶段：写入解析后的行，返回写入的记录数"""
+
+    def import_from_excel_data_with_comparison(self, game_name: str, excel_data: Iterable[Sequence[Any]]) -> Dict[str, Any]:
+        """从Excel数据导入，并返回对比结果"""
+        # 获取导入前的记录数
+        records_before = self.get_game_records_count(game_name)
+        is_existing_game = self.get_game_id(game_name) is not None
+
+        # 执行导入
+        report = ImportReport(game_name, self.config.import_report_max_rejects)
+        imported_count = self.import_from_excel_data(game_name, excel_data, report)
+
+        # 获取导入后的记录数
+        records_after = self.get_game_records_count(game_name)
+
+        # 计算新增记录数
+        new_records = records_after - records_before
+
+        return {
+            "imported_count": imported_count,
+            "records_before": records_before,
+            "records_after": records_after,
+            "new_records": new_records,
+            "is_existing_game": is_existing_game,
+            "game_name": game_name,
+            "report": report
+        }
+
+    # ===== 增量导出水位 =====
+
+    @abstractmethod
+    def get_export_watermark(self, game_id: int) -> int:
+        """获取游戏的增量导出水位（上次导出的最后一条记录ID），从未导出时返回0"""
+
+    @abstractmethod
+    def set_export_watermark(self, game_id: int, last_record_id: int):
+        """增量导出完成后更新水位"""
+
+    # ===== 数据校验 =====
+
+    @abstractmethod
+    def check_integrity(self, repair: bool = False, batch_size: Optional[int] = None) -> IntegrityReport:
+        """按用户周期ID顺序分批扫描全部数据，报告异常；repair 为 True 时每批在一个事务中修复"""
+
+    def _new_integrity_report(self) -> IntegrityReport:
+        return IntegrityReport(self.config.completion_count, self.config.integrity_report_max_issues)
+
+    # ===== 维护（不支持的后端不做任何操作） =====
+
+    def archive_completed_cycles(self, batch_size: int = 200) -> int:
+        """压缩归档已完成周期的记录，返回归档的周期数"""
+        return 0
+
+    def migrate_to_shards(self) -> int:
+        """迁移到分库存储，返回迁移的游戏数"""
+        return 0
+
+    def all_db_paths(self) -> List[str]:
+        """所有数据库文件（用于备份）"""
+        return []
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""测试公共配置：导入插件之前初始化NoneBot，插件数据写入临时目录"""
+
+import os
+import tempfile
+import time
+from typing import List
+
+# 插件配置在导入时读取环境变量，必须在导入插件之前设置
+os.environ["EXCEL_FOLDER"] = tempfile.mkdtemp(prefix="xlsx-tests-")
+os.environ["SUPERUSERS"] = '["10001"]'
+
+import nonebot
+from nonebot.adapters.onebot.v11 import Adapter
+
+nonebot.init(driver="~fastapi", log_level="WARNING")
+nonebot.get_driver().register_adapter(Adapter)
+# 插件包导入时会注册命令，必须由NoneBot加载（测试模块导入插件的子模块之前）
+nonebot.load_plugin("plugins.xlsx")
+
+import pytest
+from nonebot.adapters.onebot.v11 import Bot, GroupMessageEvent, Message
+from nonebot.compat import type_validate_python
+
+from plugins.xlsx.config import Config
+from plugins.xlsx.database import DatabaseManager
+
+BOT_ID = 10000
+SUPERUSER_ID = 10001
+GROUP_ID = 20000
+
+
+class FakeBot(Bot):
+    """不连接QQ的机器人：记录发送的消息，其他API调用返回空结果"""
+
+    def __init__(self):
+        super().__init__(nonebot.get_adapter(Adapter), str(BOT_ID))
+        self.sent: List[str] = []
+
+    async def call_api(self, api: str, **data):
+        if api in ("send_msg", "send_group_msg", "send_private_msg"):
+            self.sent.append(str(data["message"]))
+            return {"message_id": len(self.sent)}
+        return {}
+
+
+def group_message(text: str, user_id: int = SUPERUSER_ID) -> GroupMessageEvent:
+    """构造一条群消息事件"""
+    return type_validate_python(GroupMessageEvent, {
+        "time": int(time.time()), "self_id": BOT_ID, "post_type": "message", "sub_type": "normal",
+        "user_id": user_id, "message_type": "group", "group_id": GROUP_ID, "message_id": int(time.time_ns() % 2**31),
+        "message": Message(text), "original_message": Message(text), "raw_message": text, "font": 0,
+        "sender": {"user_id": user_id, "nickname": "测试", "role": "admin"}, "to_me": False,
+    })
+
+
+@pytest.fixture
+def config(tmp_path) -> Config:
+    return Config(excel_folder=str(tmp_path), completion_count=30)
+
+
+@pytest.fixture
+def db(config) -> DatabaseManager:
+    return DatabaseManager(config)
+
+
+@pytest.fixture(scope="session")
+def plugin():
+    """已加载的插件主模块（数据保存在 EXCEL_FOLDER 临时目录）"""
+    from plugins.xlsx import __main__ as plugin_main
+    return plugin_main
+
+
+@pytest.fixture
+def bot() -> FakeBot:
+    return FakeBot()
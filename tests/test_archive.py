@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""已完成周期的归档与恢复"""
+
+from plugins.xlsx.config import Config
+
+
+def live_record_ids(db, game_id, user_id):
+    conn = db.connect(game_id)
+    ids = [row[0] for row in conn.execute('SELECT id FROM records WHERE user_id = ? ORDER BY id', (user_id,))]
+    conn.close()
+    return ids
+
+
+def test_archiving_is_opt_in():
+    assert Config().archive_completed_cycles is False
+
+
+def test_archive_round_trip(db):
+    db.add_game("原神")
+    game_id = db.get_game_id("原神")
+    db.add_user_record("张三", "原神", 30)
+    db.add_user_record("李四", "原神", 5)
+    before = db.get_user_records("张三", game_id)
+    total_before = db.get_game_records_count("原神")
+
+    assert db.archive_completed_cycles() == 1
+
+    user_id = db.get_user_id("张三", game_id)
+    assert live_record_ids(db, game_id, user_id) == []
+    assert db.get_user_records("张三", game_id) == before
+    assert db.get_user_latest_records("张三", game_id, 3) == before[-3:]
+    assert db.get_game_records_count("原神") == total_before
+    with db.snapshot() as snapshot:
+        assert snapshot.cycle_records(game_id, user_id) == before
+        assert snapshot.game_stats(game_id)["archived_records"] == 30
+
+
+def test_restore_keeps_original_record_ids(db):
+    db.add_game("原神")
+    game_id = db.get_game_id("原神")
+    db.add_user_record("张三", "原神", 30)
+    user_id = db.get_user_id("张三", game_id)
+    original_ids = live_record_ids(db, game_id, user_id)
+
+    db.archive_completed_cycles()
+    # 向已归档的周期导入记录时先恢复归档数据
+    db.import_from_excel_data("原神", [["张三", "05-01_31"]])
+
+    restored_ids = live_record_ids(db, game_id, user_id)
+    assert restored_ids[:30] == original_ids
+    assert len(restored_ids) == 31
+
+
+def test_restored_cycle_is_not_exported_again(db):
+    db.add_game("原神")
+    game_id = db.get_game_id("原神")
+    db.add_user_record("张三", "原神", 30)
+    with db.snapshot() as snapshot:
+        _, record_count, last_record_id = snapshot.game_delta(game_id, db.get_export_watermark(game_id))
+    assert record_count == 30
+    db.set_export_watermark(game_id, last_record_id)
+
+    assert db.archive_completed_cycles() == 1
+    db.import_from_excel_data("原神", [["张三", "05-01_31"]])
+
+    with db.snapshot() as snapshot:
+        cycles, record_count, _ = snapshot.game_delta(game_id, db.get_export_watermark(game_id))
+    assert record_count == 1
+    assert [list(cycle.records()) for cycle in cycles] == [[("05-01", 31)]]
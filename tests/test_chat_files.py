@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""群文件导入（本地HTTP服务代替OneBot文件下载地址）和文件上传"""
+
+import asyncio
+import base64
+import functools
+import hashlib
+import io
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from nonebot.message import handle_event
+from openpyxl import Workbook
+
+from conftest import FakeBot, group_message
+from plugins.xlsx.config import Config
+from plugins.xlsx.file_uploader import FileUploader
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def file_server(tmp_path):
+    """在临时目录上启动本地HTTP服务，返回 (目录, 根地址)"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=str(tmp_path)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield tmp_path, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+class GroupFileBot(FakeBot):
+    """群文件中只有一个文件，下载地址指向本地HTTP服务"""
+
+    def __init__(self, file_name: str, file_size: int, url: str):
+        super().__init__()
+        self.file = {"file_id": "f1", "file_name": file_name, "file_size": file_size, "busid": 102}
+        self.url = url
+
+    async def call_api(self, api: str, **data):
+        if api == "get_group_root_files":
+            return {"files": [self.file]}
+        if api == "get_group_file_url":
+            return {"url": self.url}
+        return await super().call_api(api, **data)
+
+
+def import_group_file(bot):
+    """/文档导入 群文件，再回复序号1，返回导入结果"""
+    async def run():
+        await handle_event(bot, group_message("/文档导入 群文件"))
+        await handle_event(bot, group_message("1"))
+    asyncio.run(run())
+    return bot.sent[-1]
+
+
+def test_group_file_import(plugin, file_server):
+    folder, root = file_server
+    workbook = Workbook()
+    workbook.active.append(["王五", "06-01_1", "06-02_2", "06-03_3"])
+    workbook.save(folder / "崩坏三.xlsx")
+    size = (folder / "崩坏三.xlsx").stat().st_size
+
+    result = import_group_file(GroupFileBot("崩坏三.xlsx", size, f"{root}/崩坏三.xlsx"))
+    assert result.startswith("✅"), result
+    assert plugin.db_manager.get_game_records_count("崩坏三") == 3
+
+
+def test_group_file_listed_over_size_limit_is_skipped(plugin, file_server):
+    folder, root = file_server
+    requested = []
+    bot = GroupFileBot("大文件.xlsx", plugin.chat_file_importer.max_bytes + 1, f"{root}/大文件.xlsx")
+    call_api = bot.call_api
+
+    async def tracked_call_api(api: str, **data):
+        requested.append(api)
+        return await call_api(api, **data)
+
+    bot.call_api = tracked_call_api
+
+    # 群文件列表中的大小已超限，不请求下载地址
+    result = import_group_file(bot)
+    assert result.startswith("❌ 下载群文件失败"), result
+    assert "get_group_file_url" not in requested
+
+
+def test_group_file_over_size_limit_is_not_downloaded(plugin, file_server, monkeypatch):
+    folder, root = file_server
+    (folder / "太大.xlsx").write_bytes(b"x" * 4096)
+    monkeypatch.setattr(plugin.chat_file_importer, "max_bytes", 1024)
+
+    # 群文件列表中的大小未超限，下载时按响应头拒绝
+    result = import_group_file(GroupFileBot("太大.xlsx", 100, f"{root}/太大.xlsx"))
+    assert result.startswith("❌ 下载群文件失败"), result
+    assert "超过限制" in result
+    assert plugin.db_manager.get_game_id("太大") is None
+
+
+class StreamUploadBot(FakeBot):
+    """记录 upload_file_stream 分块，完成时返回文件路径"""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.uploads = []
+
+    async def call_api(self, api: str, **data):
+        if api == "upload_file_stream":
+            if data.get("is_complete"):
+                return {"file_path": "/tmp/uploaded.xlsx"}
+            self.chunks.append(data)
+            return {}
+        if api in ("upload_group_file", "upload_private_file"):
+            self.uploads.append(data)
+            return {}
+        return await super().call_api(api, **data)
+
+
+def test_large_file_is_uploaded_in_chunks():
+    uploader = FileUploader(Config(upload_stream_threshold_mb=0.001, upload_chunk_size_kb=1))
+    data = bytes(range(256)) * 20
+    bot = StreamUploadBot()
+    # 哈希在工作线程中计算，不阻塞事件循环
+    hash_threads = []
+    sha256 = uploader._sha256
+
+    def tracked_sha256(stream):
+        hash_threads.append(threading.current_thread())
+        return sha256(stream)
+
+    uploader._sha256 = tracked_sha256
+
+    file = asyncio.run(uploader.upload(bot, group_message("上传"), io.BytesIO(data), "导出.xlsx"))
+
+    assert file == "/tmp/uploaded.xlsx"
+    assert [chunk["chunk_index"] for chunk in bot.chunks] == [0, 1, 2, 3, 4]
+    assert b"".join(base64.b64decode(chunk["chunk_data"]) for chunk in bot.chunks) == data
+    assert {chunk["expected_sha256"] for chunk in bot.chunks} == {hashlib.sha256(data).hexdigest()}
+    assert hash_threads and hash_threads[0] is not threading.main_thread()
+    assert bot.uploads == [{"group_id": 20000, "file": file, "name": "导出.xlsx"}]
+
+
+def test_small_file_is_uploaded_as_base64():
+    uploader = FileUploader(Config())
+    bot = StreamUploadBot()
+
+    file = asyncio.run(uploader.upload(bot, group_message("上传"), b"hello", "a.csv"))
+
+    assert file == "base64://" + base64.b64encode(b"hello").decode()
+    assert not bot.chunks
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""并发 +1：回滚日志和WAL模式下每个用户的次数恰好为 1..N，并发读取和在线备份看到的是某一时间点的完整数据"""
+
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import pytest
+
+from plugins.xlsx.backup import BackupManager
+from plugins.xlsx.config import Config
+from plugins.xlsx.database import DatabaseManager
+
+USERS = ["张三", "李四", "王五", "赵六"]
+ADDS_PER_USER = 50
+
+
+@pytest.fixture(params=[False, True], ids=["rollback", "wal"])
+def db(request, tmp_path):
+    # 次数不会达到完成次数，所有记录都在第一个周期
+    db_manager = DatabaseManager(Config(excel_folder=str(tmp_path), completion_count=1000000, db_wal_mode=request.param))
+    db_manager.add_game("原神")
+    yield db_manager
+    db_manager.close()
+
+
+def add_concurrently(db: DatabaseManager, during=None):
+    """多个线程同时为每个用户 +1，during 在写入进行中执行"""
+    started = threading.Event()
+
+    def add(username: str):
+        started.set()
+        return db.add_user_record(username, "原神", 1)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [executor.submit(add, username) for username in USERS * ADDS_PER_USER]
+        started.wait()
+        result = during() if during else None
+        assert all(future.result().startswith("✅") for future in futures)
+    return result
+
+
+def snapshot_counts(db: DatabaseManager) -> Dict[str, List[int]]:
+    game_id = db.get_game_id("原神")
+    with db.snapshot() as snapshot:
+        return {
+            info.name: [count for _, count in snapshot.cycle_records(game_id, info.id)]
+            for info in snapshot.iter_cycles(game_id)
+        }
+
+
+def test_concurrent_adds_are_atomic(db):
+    during = add_concurrently(db, lambda: snapshot_counts(db))
+
+    for counts in during.values():
+        assert counts == list(range(1, len(counts) + 1))
+    assert snapshot_counts(db) == {username: list(range(1, ADDS_PER_USER + 1)) for username in USERS}
+
+
+def test_backup_during_concurrent_adds(db):
+    # 每步只复制一页，备份过程中穿插写入
+    config = Config(
+        excel_folder=db.config.excel_folder, db_wal_mode=db.config.db_wal_mode, backup_pages_per_step=1, backup_step_sleep_ms=1
+    )
+    backup = add_concurrently(db, BackupManager(db, config).create_backup)
+
+    conn = sqlite3.connect(os.path.join(backup["path"], "records.db"))
+    rows = conn.execute("SELECT u.name, r.count FROM records r JOIN users u ON u.id = r.user_id ORDER BY r.id").fetchall()
+    conn.close()
+    backed_up: Dict[str, List[int]] = {}
+    for name, count in rows:
+        backed_up.setdefault(name, []).append(count)
+    for counts in backed_up.values():
+        assert counts == list(range(1, len(counts) + 1))
+
+    assert snapshot_counts(db) == {username: list(range(1, ADDS_PER_USER + 1)) for username in USERS}
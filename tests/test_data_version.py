@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""数据版本保存在数据库中：重启和其他进程的写入后 ETag 仍然正确"""
+
+from starlette.requests import Request
+
+from plugins.xlsx.database import DatabaseManager
+from plugins.xlsx.http_api import RecordsApi
+
+
+def stats_etag(api: RecordsApi, game_name: str) -> str:
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+    return api.game_stats(request, game_name).headers["etag"]
+
+
+def test_version_survives_restart(config, db):
+    game_id = db.add_game("原神")
+    db.add_user_record("张三", "原神", 3)
+    version = db.data_version(game_id)
+    assert version > 0
+
+    restarted = DatabaseManager(config)
+    assert restarted.data_version(game_id) == version
+    assert restarted.data_version() == db.data_version()
+    restarted.close()
+
+
+def test_write_from_another_process_changes_version(config, db):
+    game_id = db.add_game("原神")
+    db.add_user_record("张三", "原神", 1)
+    before = db.data_version(game_id)
+    before_all = db.data_version()
+
+    other = DatabaseManager(config)
+    other.add_user_record("张三", "原神", 1)
+    other.close()
+
+    assert db.data_version(game_id) > before
+    assert db.data_version() > before_all
+
+
+def test_failed_write_keeps_version(db):
+    game_id = db.add_game("原神")
+    db.add_user_record("张三", "原神", 1)
+    before = db.data_version(game_id)
+
+    try:
+        with db.write_transaction(game_id) as cursor:
+            db._bump_data_version(cursor, game_id)
+            raise RuntimeError("写入失败")
+    except RuntimeError:
+        pass
+
+    assert db.data_version(game_id) == before
+
+
+def test_etag_follows_database(config, db):
+    db.add_game("原神")
+    db.add_user_record("张三", "原神", 1)
+    etag = stats_etag(RecordsApi(db, config), "原神")
+
+    restarted = DatabaseManager(config)
+    assert stats_etag(RecordsApi(restarted, config), "原神") == etag
+    restarted.add_user_record("张三", "原神", 1)
+    restarted.close()
+
+    assert stats_etag(RecordsApi(db, config), "原神") != etag
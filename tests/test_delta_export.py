@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""增量导出：按记录ID水位只导出新记录，文件交付后才推进水位"""
+
+import csv
+import io
+
+import pytest
+
+from plugins.xlsx.excel_exporter import ExcelExporter
+from plugins.xlsx.memory_storage import MemoryStorage
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def storage(request, config, db):
+    return db if request.param == "sqlite" else MemoryStorage(config)
+
+
+def delta_rows(exporter: ExcelExporter):
+    message, filename, data, delta = exporter.export_game_delta_to_buffer("原神", "csv")
+    rows = list(csv.reader(io.StringIO(data.decode("utf-8-sig")))) if data else []
+    return message, rows, delta
+
+
+def test_watermark_advances_only_after_commit(config, storage):
+    storage.add_game("原神")
+    storage.add_user_record("张三", "原神", 2)
+    storage.add_user_record("李四", "原神", 1)
+    exporter = ExcelExporter(storage, config)
+
+    message, rows, delta = delta_rows(exporter)
+    assert "首次增量导出" in message
+    assert [row[0] for row in rows] == ["张三", "李四"]
+    assert delta["record_count"] == 3
+
+    # 未提交时再次导出得到相同的内容
+    assert delta_rows(exporter)[1] == rows
+
+    exporter.commit_delta_export(delta)
+    message, rows, delta = delta_rows(exporter)
+    assert message.startswith("📭") and rows == [] and delta is None
+
+    storage.add_user_record("张三", "原神", 1)
+    message, rows, delta = delta_rows(exporter)
+    assert [row[0] for row in rows] == ["张三"]
+    cells = [cell for cell in rows[0][1:] if cell]
+    assert len(cells) == 1 and cells[0].endswith("_3")
+    assert delta["record_count"] == 1
+
+
+def test_watermark_never_moves_back(storage):
+    game_id = storage.add_game("原神")
+    storage.set_export_watermark(game_id, 10)
+    storage.set_export_watermark(game_id, 5)
+    assert storage.get_export_watermark(game_id) == 10
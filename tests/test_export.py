@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Excel导出：单元格的值和样式"""
+
+import io
+
+from openpyxl import load_workbook
+
+from plugins.xlsx.excel_exporter import ExcelExporter
+from plugins.xlsx.record_model import CycleRecords
+
+
+def test_each_cell_keeps_its_value_and_style(db, config):
+    exporter = ExcelExporter(db, config)
+    wb = exporter.build_game_workbook({
+        'game_name': "原神",
+        'game_id': 1,
+        'users': [
+            CycleRecords(1, "张三", 1, True, [("05-01", 1), ("05-02", 2)]),
+            CycleRecords(2, "张三", 2, False, [("05-03", 1)]),
+            CycleRecords(3, "李四", 1, False, []),
+        ],
+    })
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    ws = load_workbook(buffer)["代肝记录"]
+
+    rows = [[cell.value for cell in row] for row in ws.iter_rows()]
+    assert rows == [["张三", "05-01_1", "05-02_2"], ["张三(2)", "05-03_1", None], ["李四", None, None]]
+
+    def fill(coordinate):
+        return ws[coordinate].fill.fgColor.rgb if ws[coordinate].fill.fill_type else None
+
+    assert [fill(f"A{row}") for row in (1, 2, 3)] == ["00FFFF00"] * 3
+    assert [fill("B1"), fill("C1"), fill("B2")] == ["00ADD8E6", "00ADD8E6", None]
+    assert all(ws[coordinate].alignment.horizontal == "center" for coordinate in ("A1", "B1", "C1", "A2", "B2", "A3"))
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""合并导出（多sheet）和压缩包导出再导入后数据不变，普通多sheet工作簿仍按文件名导入为一个游戏"""
+
+import io
+import zipfile
+
+import pytest
+
+from plugins.xlsx.config import Config
+from plugins.xlsx.database import DatabaseManager
+from plugins.xlsx.excel_exporter import ExcelExporter
+from plugins.xlsx.excel_importer import ExcelImporter
+
+GAMES = ["原神", "崩坏/星穹铁道"]
+
+
+def game_contents(db: DatabaseManager, game_name: str):
+    """游戏的全部用户周期：(用户名, 周期, 是否完成, 记录)"""
+    game_id = db.get_game_id(game_name)
+    with db.snapshot() as snapshot:
+        return [
+            (info.name, info.cycle, info.is_completed, snapshot.cycle_records(game_id, info.id))
+            for info in snapshot.iter_cycles(game_id)
+        ]
+
+
+@pytest.fixture
+def source(config, db):
+    for game_name in GAMES:
+        db.add_game(game_name)
+        db.add_user_record("张三", game_name, 30)
+        db.add_user_record("张三", game_name, 2)
+        db.add_user_record("李四", game_name, 5)
+    return ExcelExporter(db, config)
+
+
+@pytest.fixture
+def target(tmp_path):
+    db_manager = DatabaseManager(Config(excel_folder=str(tmp_path / "target"), completion_count=30))
+    yield db_manager
+    db_manager.close()
+
+
+def test_multi_sheet_round_trip(db, source, target):
+    message, filename, data = source.export_all_games_to_buffer()
+    assert data is not None, message
+
+    message = ExcelImporter(target).import_excel_bytes(data, filename)
+    assert message.startswith("✅"), message
+
+    # sheet名中不允许的字符由映射sheet还原为原游戏名
+    assert sorted(name for name, in target.get_games_list()) == sorted(GAMES)
+    for game_name in GAMES:
+        assert game_contents(target, game_name) == game_contents(db, game_name)
+        assert [info[:2] for info in game_contents(target, game_name)] == [("张三", 1), ("张三", 2), ("李四", 1)]
+
+
+def test_bundle_round_trip(db, source, target):
+    stream = io.BytesIO()
+    success_count, failed_games = source.write_games_bundle(stream, GAMES)
+    assert (success_count, failed_games) == (len(GAMES), [])
+
+    importer = ExcelImporter(target)
+    with zipfile.ZipFile(stream) as bundle:
+        assert sorted(bundle.namelist()) == ["原神.xlsx", "崩坏_星穹铁道.xlsx"]
+        for entry_name in bundle.namelist():
+            assert importer.import_excel_bytes(bundle.read(entry_name), entry_name).startswith("✅")
+
+    # 压缩包中每个游戏一个文件，按文件名导入
+    assert game_contents(target, "原神") == game_contents(db, "原神")
+    assert game_contents(target, "崩坏_星穹铁道") == game_contents(db, "崩坏/星穹铁道")
+
+
+def workbook_bytes(sheets):
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    wb.remove(wb.active)
+    for title, rows in sheets:
+        ws = wb.create_sheet(title)
+        for row in rows:
+            ws.append(row)
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def test_workbook_without_game_map_imports_as_one_game(target):
+    data = workbook_bytes([("Sheet1", [["张三", "05-01_1", "05-02_2"]]), ("Sheet2", [])])
+
+    message = ExcelImporter(target).import_excel_bytes(data, "原神.xlsx")
+    assert message.startswith("✅"), message
+    assert target.get_games_list() == [("原神",)]
+    assert [info[:2] for info in game_contents(target, "原神")] == [("张三", 1)]
+
+
+def test_legacy_merged_export_splits_sheets_when_enabled(tmp_path):
+    data = workbook_bytes([("原神", [["张三", "05-01_1"]]), ("崩坏3", [["李四", "05-01_1"]])])
+    db_manager = DatabaseManager(Config(excel_folder=str(tmp_path / "legacy"), import_split_sheets=True))
+    try:
+        message = ExcelImporter(db_manager).import_excel_bytes(data, "all_games_export_06-15-1432.xlsx")
+        assert message.startswith("✅"), message
+        assert sorted(name for name, in db_manager.get_games_list()) == ["原神", "崩坏3"]
+    finally:
+        db_manager.close()
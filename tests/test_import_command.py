@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""/文档导入 <文件名> 命令（通过伪造的 OneBot 事件触发）"""
+
+import asyncio
+import os
+import threading
+
+from nonebot.message import handle_event
+from openpyxl import Workbook
+
+from conftest import group_message
+
+
+def write_xlsx(path, rows):
+    workbook = Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    workbook.save(path)
+
+
+def test_import_file_command(plugin, bot, monkeypatch):
+    write_xlsx(os.path.join(plugin.plugin_config.excel_folder, "星穹铁道.xlsx"), [
+        ["张三", "05-01_1", "05-02_2"],
+        ["李四", "05-01_1"],
+    ])
+
+    # 导入应在工作线程中执行，不阻塞事件循环
+    import_threads = []
+    import_excel_file = plugin.excel_importer.import_excel_file
+
+    def tracked_import(filename):
+        import_threads.append(threading.current_thread())
+        return import_excel_file(filename)
+
+    monkeypatch.setattr(plugin.excel_importer, "import_excel_file", tracked_import)
+
+    asyncio.run(handle_event(bot, group_message("/文档导入 星穹铁道")))
+
+    assert len(bot.sent) == 1
+    assert bot.sent[0].startswith("✅"), bot.sent[0]
+    assert import_threads and import_threads[0] is not threading.main_thread()
+
+    db_manager = plugin.db_manager
+    game_id = db_manager.get_game_id("星穹铁道")
+    assert game_id is not None
+    assert db_manager.get_game_records_count("星穹铁道") == 3
+    assert len(db_manager.get_user_records("张三", game_id)) == 2
+
+
+def test_import_missing_file(plugin, bot):
+    asyncio.run(handle_event(bot, group_message("/文档导入 不存在的文件")))
+
+    assert len(bot.sent) == 1
+    assert bot.sent[0].startswith("❌ 未找到文件")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""数据校验：发现各类异常，修复可自动修复的异常，断档和提前完成只报告"""
+
+import pytest
+
+from plugins.xlsx.config import Config
+from plugins.xlsx.database import DatabaseManager
+from plugins.xlsx.memory_storage import MemoryStorage
+
+
+def import_anomalies(storage):
+    storage.import_from_excel_data("原神", [
+        ["张三", "05-01_1", "05-01_2", "05-02_2", "05-03_3"],   # 重复次数
+        ["李四", "05-01_1", "05-02_4"],                         # 断档
+        ["王五(2)", "05-01_1"],                                 # 已有后续周期但第一个周期未完成
+        ["王五", "05-01_1", "05-01_2"],
+        ["赵六", "05-01_1", "05-01_2完"],                        # 最新周期提前完成
+    ])
+
+
+def found(report):
+    return {kind: count for kind, count in report.issues.items() if count}
+
+
+@pytest.fixture(params=[False, True], ids=["single", "sharded"])
+def sqlite_storage(request, tmp_path):
+    db_manager = DatabaseManager(Config(excel_folder=str(tmp_path), completion_count=30, db_sharding=request.param))
+    yield db_manager
+    db_manager.close()
+
+
+def test_check_and_repair_sqlite(sqlite_storage):
+    db = sqlite_storage
+    import_anomalies(db)
+    game_id = db.get_game_id("原神")
+    conn = db.connect(game_id)
+    conn.execute("INSERT INTO users (name, game_id, cycle) VALUES ('孙七', ?, 1)", (game_id,))
+    conn.execute("INSERT INTO records (user_id, record_date, count) VALUES (99999, '05-05', 1)")
+    conn.commit()
+    conn.close()
+    version = db.data_version(game_id)
+
+    report = db.check_integrity()
+    assert found(report) == {"duplicate": 1, "gap": 1, "completion": 2, "orphan_user": 1, "orphan_records": 1}
+    assert report.repairable == 4
+    assert db.data_version(game_id) == version
+
+    repaired = db.check_integrity(repair=True, batch_size=2)
+    assert repaired.repaired == {"duplicate": 1, "gap": 0, "completion": 1, "orphan_user": 1, "orphan_records": 1}
+    assert repaired.batches >= 2
+    assert db.data_version(game_id) > version
+
+    after = db.check_integrity()
+    assert found(after) == {"gap": 1, "completion": 1}
+    assert after.repairable == 0
+    assert db.get_user_records("张三", game_id) == [("05-01", 1), ("05-01", 2), ("05-03", 3)]
+    assert db.get_user_id("孙七", game_id) is None
+
+
+def test_repair_archived_cycle(db):
+    db.add_game("原神")
+    game_id = db.get_game_id("原神")
+    db.add_user_record("张三", "原神", 30)
+    user_id = db.get_user_id("张三", game_id)
+    conn = db.connect(game_id)
+    conn.execute("INSERT INTO records (user_id, record_date, count) VALUES (?, '05-06', 30)", (user_id,))
+    conn.commit()
+    conn.close()
+    assert db.archive_completed_cycles() == 1
+
+    repaired = db.check_integrity(repair=True)
+    assert repaired.repaired["duplicate"] == 1
+    assert [count for _, count in db.get_user_records("张三", game_id)] == list(range(1, 31))
+    assert db.check_integrity().total_issues == 0
+
+
+def test_check_and_repair_memory(config):
+    storage = MemoryStorage(config)
+    import_anomalies(storage)
+    game_id = storage.get_game_id("原神")
+    snapshot = storage.snapshot()
+
+    report = storage.check_integrity()
+    assert found(report) == {"duplicate": 1, "gap": 1, "completion": 2}
+
+    repaired = storage.check_integrity(repair=True, batch_size=2)
+    assert repaired.repaired == {"duplicate": 1, "gap": 0, "completion": 1, "orphan_user": 0, "orphan_records": 0}
+    assert found(storage.check_integrity()) == {"gap": 1, "completion": 1}
+    assert storage.get_user_records("张三", game_id) == [("05-01", 1), ("05-01", 2), ("05-03", 3)]
+
+    # 修复前创建的快照仍然读取修复前的数据
+    user_id = next(info.id for info in snapshot.iter_cycles(game_id) if info.name == "张三")
+    assert len(snapshot.cycle_records(game_id, user_id)) == 4
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""用户名索引：匹配规则，以及写入线程添加用户名时并发查询不会出错"""
+
+import threading
+
+from plugins.xlsx.name_index import NameIndex
+
+
+def test_search_and_resolve():
+    index = NameIndex()
+    index.build([(1, "Alice"), (1, "Alina"), (1, "Bob"), (2, "Carol")])
+
+    assert index.resolve(1, "alice") == "Alice"
+    assert index.resolve(1, "bo") == "Bob"
+    assert index.resolve(1, "ali") is None
+    assert index.search(1, "ali") == ["Alice", "Alina"]
+    assert index.search(1, "bob1") == ["Bob"]
+    assert index.search(2, "Bob") == []
+
+
+def test_concurrent_add_and_search():
+    index = NameIndex()
+    index.build([(1, "a0")])
+    errors = []
+    done = threading.Event()
+
+    def writer():
+        # 写入命令在工作线程中向同一前缀下添加用户名
+        for i in range(1, 2000):
+            index.add(1, "a" + chr(0x4e00 + i))
+        done.set()
+
+    def reader():
+        try:
+            while not done.is_set():
+                index.search(1, "a", limit=100)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert index.contains(1, "a" + chr(0x4e00 + 1999))
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""记录命令的限流：默认关闭，参数解析失败或因并发已满被拒绝的命令不消耗令牌"""
+
+import asyncio
+
+import pytest
+from nonebot.message import handle_event
+
+from conftest import group_message
+from plugins.xlsx.config import Config
+from plugins.xlsx.rate_limit import AdmissionController
+
+
+@pytest.fixture(scope="module")
+def game_command(plugin):
+    """注册一次游戏命令，重复注册会让每条命令收到多次回复"""
+    plugin.db_manager.add_game("明日方舟")
+    plugin.register_game_commands()
+
+
+def test_limits_are_opt_in():
+    config = Config()
+    assert config.rate_limit_user_per_minute == 0
+    assert config.rate_limit_game_per_minute == 0
+    assert config.max_in_flight_records == 0
+
+
+def test_invalid_arguments_do_not_take_tokens(plugin, bot, monkeypatch, game_command):
+    monkeypatch.setattr(plugin, "admission", AdmissionController(
+        Config(rate_limit_user_per_minute=1, rate_limit_user_burst=1)
+    ))
+
+    async def send(*texts):
+        for text in texts:
+            await handle_event(bot, group_message(text))
+
+    asyncio.run(send("/明日方舟 张三", "/明日方舟 张三 abc", "/明日方舟 张三 101"))
+    assert all(reply.startswith("❌") for reply in bot.sent), bot.sent
+
+    asyncio.run(send("/明日方舟 张三 +1", "/明日方舟 张三 +1"))
+    assert bot.sent[3].startswith("✅"), bot.sent[3]
+    assert bot.sent[4].startswith("🚦"), bot.sent[4]
+
+
+def test_rejected_when_full_does_not_take_tokens(plugin, bot, monkeypatch, game_command):
+    admission = AdmissionController(Config(
+        rate_limit_user_per_minute=1, rate_limit_user_burst=1, max_in_flight_records=1, max_queued_records=0
+    ))
+    monkeypatch.setattr(plugin, "admission", admission)
+
+    async def send(text):
+        await handle_event(bot, group_message(text))
+
+    admission.in_flight = 1
+    asyncio.run(send("/明日方舟 李四 +1"))
+    assert bot.sent[0] == "🚦 当前请求过多，请稍后再试"
+
+    admission.in_flight = 0
+    asyncio.run(send("/明日方舟 李四 +1"))
+    assert bot.sent[1].startswith("✅"), bot.sent
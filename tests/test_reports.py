@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""报表缓存：默认不缓存，开启预生成后按数据库中的数据版本失效，缓存的文件使用新文件名"""
+
+import itertools
+
+import pytest
+
+from plugins.xlsx.config import Config
+from plugins.xlsx.database import DatabaseManager
+from plugins.xlsx.excel_exporter import ExcelExporter
+from plugins.xlsx.reports import ReportCache, parse_time_of_day
+
+
+@pytest.fixture
+def precompute_config(config):
+    return Config(excel_folder=config.excel_folder, completion_count=30, report_precompute_time="04:00")
+
+
+def make_cache(db, config):
+    exporter = ExcelExporter(db, config)
+    # 每次生成不同的文件名，不依赖当前时间
+    counter = itertools.count(1)
+    exporter.make_export_filename = lambda game_name, ext="xlsx": f"{game_name}_export_{next(counter)}.{ext}"
+    return ReportCache(db, exporter, config)
+
+
+def test_precompute_is_opt_in():
+    assert Config().report_precompute_time == ""
+
+
+def test_disabled_cache_exports_directly(config, db):
+    db.add_game("原神")
+    db.add_user_record("张三", "原神", 1)
+    cache = make_cache(db, config)
+
+    first, cached = cache.fetch("csv", "原神")
+    assert not cached
+    second, cached = cache.fetch("csv", "原神")
+    assert not cached
+    assert second.filename != first.filename
+    assert cache.hits == 0 and not cache._reports
+
+
+def test_cache_hit_uses_fresh_filename(precompute_config, db):
+    db.add_game("原神")
+    db.add_user_record("张三", "原神", 1)
+    cache = make_cache(db, precompute_config)
+
+    built, cached = cache.fetch("xlsx", "原神")
+    assert not cached
+    hit, cached = cache.fetch("xlsx", "原神")
+    assert cached
+    assert hit.data == built.data
+    assert hit.filename != built.filename
+    assert hit.filename in hit.message and built.filename not in hit.message
+
+
+def test_write_from_another_process_invalidates_cache(precompute_config, db):
+    db.add_game("原神")
+    db.add_user_record("张三", "原神", 1)
+    cache = make_cache(db, precompute_config)
+
+    report, cached = cache.fetch("csv", "原神")
+    assert not cached and report.data is not None
+    assert cache.fetch("csv", "原神")[1]
+
+    other = DatabaseManager(precompute_config)
+    other.add_user_record("李四", "原神", 1)
+    other.close()
+
+    report, cached = cache.fetch("csv", "原神")
+    assert not cached
+    assert "李四".encode("utf-8") in report.data
+
+
+@pytest.mark.parametrize("value", ["3am", "4", "24:00", "04:60", ""])
+def test_invalid_precompute_time(value):
+    with pytest.raises(ValueError):
+        parse_time_of_day(value)
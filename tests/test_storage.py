@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""存储后端接口和内存后端的流式导入"""
+
+import pytest
+
+from plugins.xlsx.memory_storage import MemoryStorage
+from plugins.xlsx.storage import StorageBackend, StorageSnapshot
+
+
+def test_backends_are_abstract(config, db):
+    class Incomplete(StorageBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete(config)
+    with pytest.raises(TypeError):
+        StorageSnapshot()
+
+    # 两个实现都提供了全部抽象方法
+    for backend in (db, MemoryStorage(config)):
+        with backend.snapshot() as snapshot:
+            assert snapshot.games() == []
+
+
+def test_memory_import_streams_rows(config):
+    storage = MemoryStorage(config)
+    game_id = storage.add_game("原神")
+    written_before_next_row = []
+
+    def rows():
+        yield ["张三", "10-01_1", "10-02_2"]
+        # 下一行被读取时上一行已经写入
+        written_before_next_row.append(storage.get_user_records("张三", game_id))
+        yield ["李四", "10-01_1"]
+
+    assert storage.import_from_excel_data("原神", rows()) == 3
+    assert written_before_next_row == [[("10-01", 1), ("10-02", 2)]]
+
+
+def test_memory_import_failure_leaves_no_data(config):
+    storage = MemoryStorage(config)
+    storage.add_game("原神")
+    storage.add_user_record("张三", "原神", 2)
+    game_id = storage.get_game_id("原神")
+    before = storage.get_user_records("张三", game_id)
+    snapshot = storage.snapshot()
+
+    def rows():
+        yield ["张三", "10-01_3", "10-01_4"]
+        yield ["李四", "10-01_1"]
+        raise OSError("读取中断")
+
+    with pytest.raises(OSError):
+        storage.import_from_excel_data("原神", rows())
+
+    assert storage.get_user_records("张三", game_id) == before
+    assert storage.get_user_records("李四", game_id) == []
+    assert storage.add_user_record("李四", "原神").startswith("✅")
+    assert storage.get_user_records("李四", game_id) == [(before[0][0], 1)]
+    assert [info.name for info in snapshot.iter_cycles(game_id)] == ["张三"]